@@ -0,0 +1,83 @@
+"""
+Микробенчмарк применения подстановок к шаблону.
+
+Сравнивает прежнюю реализацию (глубокое копирование списка элементов и вставка
+каждого вхождения через list.insert, по одному перестроению шаблона на подстановку)
+с однопроходным Template.apply_substitutions.
+
+Запуск: python -m benchmarks.apply_substitution
+"""
+import copy
+import timeit
+
+from recompression.models import const as c, equation as eq, option as opt, substitution as sb, var as v
+from utils.list import indexes
+
+
+def legacy_apply_substitution(elements: list, subst: sb.Substitution) -> list:
+    elements_cpy = copy.deepcopy(elements)
+
+    var_indexes = indexes(elements, subst.var)
+    if len(var_indexes) == 0:
+        return elements_cpy
+
+    elements_cpy = [el for el in elements_cpy if el != subst.var]
+
+    replacement = None
+    if isinstance(subst, sb.PopLeft):
+        replacement = [subst.const, subst.var]
+    elif isinstance(subst, sb.PopRight):
+        replacement = [subst.var, subst.const]
+    elif isinstance(subst, sb.EmptySubstitution):
+        replacement = []
+
+    for j, index in enumerate(var_indexes):
+        for i, replacer in enumerate(replacement):
+            elements_cpy.insert(j + index + i, replacer)
+
+    return elements_cpy
+
+
+def legacy_apply_option(elements: list, option: opt.Option) -> list:
+    for subst in option.substitutions:
+        elements = legacy_apply_substitution(elements, subst)
+
+    return elements
+
+
+def build_case(occurrences: int) -> tuple[list, opt.Option]:
+    x, y, z = v.Var('X'), v.Var('Y'), v.Var('Z')
+    a, b = c.AlphabetConst('a'), c.AlphabetConst('b')
+
+    elements = []
+    for _ in range(occurrences):
+        elements.extend([x, a, y, b, z])
+
+    option = opt.Option([sb.PopLeft(x, b), sb.PopRight(y, a), sb.EmptySubstitution(z)], None)
+
+    return elements, option
+
+
+def run(occurrences: int, repeat: int) -> tuple[float, float]:
+    elements, option = build_case(occurrences)
+    template = eq.Template(*elements)
+    equation = eq.Equation(template, eq.Sample(c.AlphabetConst('a')))
+
+    if legacy_apply_option(elements, option) != list(option.apply_to(equation).template.elements):
+        raise AssertionError('результаты реализаций не совпадают')
+
+    legacy = min(timeit.repeat(lambda: legacy_apply_option(elements, option), number=1, repeat=repeat))
+    current = min(timeit.repeat(lambda: option.apply_to(equation), number=1, repeat=repeat))
+
+    return legacy, current
+
+
+def main():
+    print(f'{"вхождений":>10} {"прежняя, мс":>12} {"текущая, мс":>12} {"ускорение":>10}')
+    for occurrences in (10, 100, 300, 1000):
+        legacy, current = run(occurrences, repeat=5)
+        print(f'{occurrences:>10} {legacy * 1000:>12.3f} {current * 1000:>12.3f} {legacy / current:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
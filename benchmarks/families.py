@@ -0,0 +1,88 @@
+"""
+Параметризованные семейства сопоставлений для бенчмарков решателя.
+
+Совместные сопоставления строятся подстановкой случайных слов вместо переменных шаблона,
+поэтому решение у них есть всегда. Генератор случайных чисел инициализируется именем
+случая, так что сопоставления не меняются от запуска к запуску
+"""
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+_VARS = 'XYZWUV'
+
+
+@dataclass(frozen=True)
+class Case:
+    family: str
+    param: int
+    equation: str
+    is_satisfiable: bool
+
+    @property
+    def name(self) -> str:
+        return f'{self.family}/{self.param}'
+
+
+def _substitute(rng: random.Random, template: str, alphabet: str, value_len: int) -> str:
+    values = {
+        sym: ''.join(rng.choice(alphabet) for _ in range(value_len)) for sym in dict.fromkeys(template) if sym.isupper()
+    }
+    return ''.join(values.get(sym, sym) for sym in template)
+
+
+def _case(family: str, param: int, template: str, alphabet: str = 'ab', value_len: int = 2) -> Case:
+    rng = random.Random(f'{family}/{param}')
+    return Case(family, param, f'{template}={_substitute(rng, template, alphabet, value_len)}', True)
+
+
+def sample_length() -> Iterator[Case]:
+    # шаблон фиксирован, растут значения переменных, а с ними длина образца
+    for value_len in (1, 2, 3, 4):
+        yield _case('sample_length', value_len, 'XaY', value_len=value_len)
+
+
+def var_count() -> Iterator[Case]:
+    # переменные разделены константами: XaY, XaYbZ, XaYbZaW, ...
+    for count in (2, 3, 4):
+        template = ''.join(var + 'ab'[i % 2] for i, var in enumerate(_VARS[:count]))[:-1]
+        yield _case('var_count', count, template, value_len=1)
+
+
+def repeated_vars() -> Iterator[Case]:
+    # переменные X и Y чередуются: XYX, XYXY, XYXYX, ...
+    for occurrences in (3, 4, 5):
+        yield _case('repeated_vars', occurrences, ('XY' * occurrences)[:occurrences], value_len=2)
+
+
+def long_runs() -> Iterator[Case]:
+    # образец состоит из длинных блоков одной константы
+    for run_len in (4, 8, 16):
+        yield Case('long_runs', run_len, f'XbY={"a" * run_len}b{"a" * run_len}', True)
+
+    # три переменные над одним блоком: вариантов его сжатия - квадратично от длины блока
+    yield Case('long_runs', 30, f'XYZ={"a" * 30}', True)
+
+
+def unsatisfiable() -> Iterator[Case]:
+    # X должна одновременно быть a^n и a^(n+1)
+    for run_len in (4, 8, 16, 32):
+        yield Case('unsatisfiable', run_len, f'XbX={"a" * run_len}b{"a" * (run_len + 1)}', False)
+
+
+FAMILIES = {
+    'sample_length': sample_length,
+    'var_count': var_count,
+    'repeated_vars': repeated_vars,
+    'long_runs': long_runs,
+    'unsatisfiable': unsatisfiable,
+}
+
+
+def get_cases(families: list[str] | None = None) -> Iterator[Case]:
+    """
+    :param families: имена семейств, по умолчанию все
+    :return: сопоставления выбранных семейств
+    """
+    for name in families if families is not None else FAMILIES:
+        yield from FAMILIES[name]()
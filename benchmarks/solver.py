@@ -0,0 +1,231 @@
+"""
+Бенчмарк решателя на сгенерированных семействах сопоставлений (см. benchmarks.families).
+
+Каждое сопоставление решается при каждом наборе эвристик; записываются время (лучшее из
+нескольких повторов), число узлов, глубина дерева, число решений и пиковая память (tracemalloc,
+отдельным прогоном, чтобы трассировка не искажала время). Результаты можно сохранить в JSON
+и сравнить с сохраненными ранее: при росте метрики больше допустимого порога бенчмарк
+завершается с кодом 1.
+
+Запуск:
+    python -m benchmarks.solver -save baseline.json
+    python -m benchmarks.solver -baseline baseline.json -threshold 0.2
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from benchmarks import families
+from main import collect_tree_stats, parse_equation, reset_tables
+from recompression import solver
+from recompression.heuristics import counting, heuristics as h, length, parikh, prefix_suffix
+
+HEURISTICS = {
+    'pref-suff': prefix_suffix.PrefixSuffixHeuristics,
+    'length': length.LengthHeuristics,
+    'parikh': parikh.ParikhHeuristics,
+    'z3': counting.CountingHeuristics,
+}
+
+# без эвристик деревья даже небольших сопоставлений слишком велики для бенчмарка
+COMBINATIONS = [
+    'pref-suff',
+    'length',
+    'parikh',
+    'z3',
+    'pref-suff+length',
+    'pref-suff+parikh',
+    'pref-suff+length+parikh+z3',
+]
+
+# разница во времени меньше этой не считается регрессией, каким бы ни было отношение
+_MIN_TIME_DELTA = 0.005
+
+
+@dataclass
+class Result:
+    case: str
+    equation: str
+    heuristics: str
+    time: float
+    nodes: int
+    depth: int
+    solutions: int
+    peak_memory: int
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.case, self.heuristics
+
+
+def create_heuristics(combination: str) -> list[h.Heurisitcs]:
+    return [HEURISTICS[name]() for name in combination.split('+')]
+
+
+def run_case(case: families.Case, combination: str, repeat: int) -> Result:
+    # таблицы не растут от случая к случаю и не влияют на время следующих случаев
+    reset_tables()
+    equation = parse_equation(case.equation)
+
+    best_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        root, _ = solver.Solver(create_heuristics(combination)).solve(equation)
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+    tracemalloc.start()
+    try:
+        solver.Solver(create_heuristics(combination)).solve(equation)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    stats = collect_tree_stats(root)
+    if case.is_satisfiable != (stats.solution_nodes_count > 0):
+        raise AssertionError(f'{case.name}: неверное число решений {stats.solution_nodes_count}')
+
+    return Result(
+        case=case.name,
+        equation=case.equation,
+        heuristics=combination,
+        time=best_time,
+        nodes=stats.nodes_count,
+        depth=stats.depth,
+        solutions=stats.solution_nodes_count,
+        peak_memory=peak_memory,
+    )
+
+
+def compare(results: list[Result], baseline: list[Result], threshold: float) -> list[str]:
+    """
+    :param results: результаты текущего запуска
+    :param baseline: сохраненные результаты
+    :param threshold: допустимый относительный рост времени, числа узлов, глубины и памяти
+    :return: описания регрессий. Изменение числа решений - всегда регрессия, как и случай, которого
+        нет среди сохраненных результатов, или сохраненный случай, не попавший в запуск. Случаи
+        семейств и наборов эвристик, которые не запускались, не сравниваются
+    """
+    baseline_by_key = {result.key: result for result in baseline}
+
+    regressions = []
+    for result in results:
+        name = f'{result.case} [{result.heuristics}]'
+        base = baseline_by_key.get(result.key)
+        if base is None:
+            regressions.append(f'{name}: нет в сохраненных результатах')
+            continue
+
+        if result.solutions != base.solutions:
+            regressions.append(f'{name}: решений {result.solutions}, было {base.solutions}')
+
+        for metric in ('time', 'nodes', 'depth', 'peak_memory'):
+            current, previous = getattr(result, metric), getattr(base, metric)
+            if current <= previous * (1 + threshold):
+                continue
+            if metric == 'time' and current - previous < _MIN_TIME_DELTA:
+                continue
+
+            regressions.append(f'{name}: {metric} {current:.6g}, было {previous:.6g} (+{current / previous - 1:.0%})')
+
+    keys = {result.key for result in results}
+    runs = {(_get_family(result.case), result.heuristics) for result in results}
+    for base in baseline:
+        if base.key not in keys and (_get_family(base.case), base.heuristics) in runs:
+            regressions.append(f'{base.case} [{base.heuristics}]: нет в результатах запуска')
+
+    return regressions
+
+
+def _get_family(case: str) -> str:
+    return case.rpartition('/')[0]
+
+
+def load(path: str) -> list[Result]:
+    with open(path, encoding='utf-8') as f:
+        return [Result(**result) for result in json.load(f)['results']]
+
+
+def save(path: str, results: list[Result]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'results': [asdict(result) for result in results]}, f, ensure_ascii=False, indent=2)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-families',
+        nargs='+',
+        choices=list(families.FAMILIES),
+        default=None,
+        help='Семейства сопоставлений, по умолчанию все'
+    )
+    parser.add_argument(
+        '-heuristics',
+        nargs='+',
+        default=COMBINATIONS,
+        metavar='COMBINATION',
+        help=f'Наборы эвристик через +, из {", ".join(HEURISTICS)}'
+    )
+    parser.add_argument(
+        '-repeat',
+        default=3,
+        type=int,
+        metavar='N',
+        help='Сколько раз решать каждое сопоставление, время - лучшее из N'
+    )
+    parser.add_argument(
+        '-save',
+        metavar='PATH',
+        help='Сохранить результаты в JSON по пути PATH'
+    )
+    parser.add_argument(
+        '-baseline',
+        metavar='PATH',
+        help='Сравнить результаты с сохраненными по пути PATH'
+    )
+    parser.add_argument(
+        '-threshold',
+        default=0.2,
+        type=float,
+        help='Допустимый относительный рост метрик при сравнении с -baseline'
+    )
+
+    args = parser.parse_args()
+    for combination in args.heuristics:
+        unknown = [name for name in combination.split('+') if name not in HEURISTICS]
+        if len(unknown) > 0:
+            parser.error(f'неизвестные эвристики: {", ".join(unknown)}')
+
+    return args
+
+
+def main():
+    args = parse_arguments()
+
+    print(f'{"сопоставление":<20} {"эвристики":<28} {"время, мс":>10} {"узлов":>8} {"глубина":>8} '
+          f'{"решений":>8} {"память, КБ":>11}')
+    results = []
+    for case in families.get_cases(args.families):
+        for combination in args.heuristics:
+            result = run_case(case, combination, args.repeat)
+            results.append(result)
+            print(f'{result.case:<20} {result.heuristics:<28} {result.time * 1000:>10.2f} {result.nodes:>8} '
+                  f'{result.depth:>8} {result.solutions:>8} {result.peak_memory / 1024:>11.1f}', flush=True)
+
+    if args.save is not None:
+        save(args.save, results)
+
+    if args.baseline is not None:
+        regressions = compare(results, load(args.baseline), args.threshold)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if len(regressions) > 0:
+            exit(1)
+
+
+if __name__ == '__main__':
+    main()
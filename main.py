@@ -1,24 +1,49 @@
 import argparse
+import cProfile
+import itertools
+import json
 import sys
-from dataclasses import dataclass
-
-from recompression import solver
-from recompression.heuristics import counting, prefix_suffix
-from recompression.models import equation as eq, const as c, var as v, compression_node as cn
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from dataclasses import asdict, dataclass
+
+from recompression import budget as bg, search, solution, solver
+from recompression.heuristics import counting, length, parikh, prefix_suffix
+from recompression.models import equation as eq, const as c, var as v, compression_node as cn, \
+    symbol_table as st, var_restriction as vr
 from recompression.output import tree_image
 
 
 @dataclass
 class Config:
     use_counting_heuristics: bool
+    use_parikh_heuristics: bool
     use_prefix_suffix_heuristics: bool
+    use_length_heuristics: bool
+    adaptive_heuristics: bool
     tree_image_path: str | None
-
-
-def parse_arguments() -> tuple[str, Config]:
+    tree_image_collapse_failed: bool
+    tree_image_max_depth: int | None
+    memo_size: int
+    use_symmetry: bool
+    solutions_only: bool
+    search_policy: search.SearchPolicy
+    workers: int
+    solutions_limit: int | None
+    batch_path: str | None
+    max_nodes: int | None
+    time_limit: float | None
+    max_memory: int | None
+    profile_path: str | None
+    cprofile_path: str | None
+
+
+def parse_arguments() -> tuple[str | None, Config]:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         'equation',
+        nargs='?',
         help='Сопоставление которое необходимо решить'
     )
 
@@ -30,6 +55,14 @@ def parse_arguments() -> tuple[str, Config]:
         help='Использовать эвристику подсчета констант (z3)'
     )
 
+    parser.add_argument(
+        '-parikh',
+        required=False,
+        default=None,
+        action=argparse.BooleanOptionalAction,
+        help='Использовать быструю проверку чисел вхождений констант без z3 (включается вместе с -z3)'
+    )
+
     parser.add_argument(
         '-pref-suff',
         required=False,
@@ -38,19 +71,199 @@ def parse_arguments() -> tuple[str, Config]:
         help='Использовать эвристику подсчета префиксов и суффиксов'
     )
 
+    parser.add_argument(
+        '-length',
+        required=False,
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help='Использовать эвристику сравнения длин шаблона и образца'
+    )
+
+    parser.add_argument(
+        '-adaptive',
+        required=False,
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help='Запускать первыми эвристики, которые дешевле отбрасывают ветви, и пропускать дорогие эвристики '
+             'на глубинах, где они ничего не отбрасывают'
+    )
+
     parser.add_argument(
         '-output',
         required=False,
         metavar='PATH',
-        help='Сохранить дерево разбора по пути PATH'
+        help='Сохранить дерево разбора по пути PATH: .dot и .gv - описание для Graphviz, '
+             'остальные расширения - изображение, нарисованное dot'
+    )
+
+    parser.add_argument(
+        '-collapse-failed',
+        required=False,
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help='В -output заменять поддеревья без решений одним узлом с числом их узлов'
+    )
+
+    parser.add_argument(
+        '-output-depth',
+        required=False,
+        default=None,
+        type=int,
+        metavar='N',
+        help='В -output выводить только N верхних уровней дерева'
+    )
+
+    parser.add_argument(
+        '-memo',
+        required=False,
+        default=0,
+        type=int,
+        metavar='SIZE',
+        help='Переиспользовать поддеревья уже разобранных уравнений, храня не более SIZE записей'
+    )
+
+    parser.add_argument(
+        '-symmetry',
+        required=False,
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help='Считать одинаковыми уравнения, отличающиеся только именами переменных и версиями констант'
+    )
+
+    parser.add_argument(
+        '-solutions-only',
+        required=False,
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help='Отбрасывать построенные поддеревья без решений, оставляя в дереве только пути к решениям. '
+             'Число узлов и глубина дерева учитывают отброшенные узлы'
+    )
+
+    parser.add_argument(
+        '-search',
+        required=False,
+        default=search.SearchPolicy.DFS,
+        type=search.SearchPolicy,
+        choices=list(search.SearchPolicy),
+        help='Порядок раскрытия узлов: в глубину (dfs), в ширину (bfs) или по длине уравнения (best)'
+    )
+
+    parser.add_argument(
+        '-j',
+        required=False,
+        default=1,
+        type=int,
+        metavar='N',
+        help='Раскрывать независимые поддеревья в N процессах'
+    )
+
+    parser.add_argument(
+        '-limit',
+        required=False,
+        default=None,
+        type=int,
+        metavar='K',
+        help='Остановить поиск после K найденных решений и вывести их'
+    )
+
+    parser.add_argument(
+        '-first',
+        dest='limit',
+        action='store_const',
+        const=1,
+        help='Остановить поиск после первого найденного решения, то же, что -limit 1'
+    )
+
+    parser.add_argument(
+        '-batch',
+        required=False,
+        metavar='FILE',
+        help='Решить все сопоставления из FILE (по одному template=sample или JSON-объекту в строке) '
+             'в -j процессах и выводить по строке JSON на каждое по мере готовности'
+    )
+
+    parser.add_argument(
+        '-max-nodes',
+        required=False,
+        default=None,
+        type=int,
+        metavar='N',
+        help='Остановить поиск, когда в дереве будет N узлов, и вывести недостроенное дерево'
+    )
+
+    parser.add_argument(
+        '-time-limit',
+        '-timeout',
+        dest='time_limit',
+        required=False,
+        default=None,
+        type=float,
+        metavar='SECONDS',
+        help='Остановить поиск через SECONDS секунд (в режиме -batch - для каждого сопоставления)'
+    )
+
+    parser.add_argument(
+        '-max-memory',
+        required=False,
+        default=None,
+        type=int,
+        metavar='MB',
+        help='Остановить поиск, когда процесс займет больше MB мегабайт памяти'
+    )
+
+    parser.add_argument(
+        '-profile',
+        required=False,
+        metavar='PATH',
+        help='Сохранить в JSON по пути PATH число вызовов, суммарное и наибольшее время и число произведенных '
+             'элементов каждого этапа поиска'
+    )
+
+    parser.add_argument(
+        '-cprofile',
+        required=False,
+        metavar='PATH',
+        help='Выполнить поиск под cProfile и сохранить статистику pstats по пути PATH'
     )
 
     args = parser.parse_args()
 
+    if (args.equation is None) == (args.batch is None):
+        parser.error('необходимо указать либо сопоставление, либо -batch FILE')
+    if args.output_depth is not None and args.output_depth < 1:
+        parser.error('-output-depth должен быть не меньше 1')
+    if args.limit is not None and args.limit < 0:
+        parser.error('-limit должен быть не меньше 0')
+    if args.memo < 0:
+        parser.error('-memo должен быть не меньше 0')
+    if args.max_nodes is not None and args.max_nodes <= 0:
+        parser.error('-max-nodes должен быть больше 0')
+    if args.time_limit is not None and args.time_limit <= 0:
+        parser.error('-time-limit должен быть больше 0')
+    if args.max_memory is not None and args.max_memory <= 0:
+        parser.error('-max-memory должен быть больше 0')
+
     return args.equation, Config(
         use_counting_heuristics=args.z3,
+        use_parikh_heuristics=args.z3 if args.parikh is None else args.parikh,
         use_prefix_suffix_heuristics=args.pref_suff,
-        tree_image_path=args.output
+        use_length_heuristics=args.length,
+        adaptive_heuristics=args.adaptive,
+        tree_image_path=args.output,
+        tree_image_collapse_failed=args.collapse_failed,
+        tree_image_max_depth=args.output_depth,
+        memo_size=args.memo,
+        use_symmetry=args.symmetry,
+        solutions_only=args.solutions_only,
+        search_policy=args.search,
+        workers=args.j,
+        solutions_limit=args.limit,
+        batch_path=args.batch,
+        max_nodes=args.max_nodes,
+        time_limit=args.time_limit,
+        max_memory=args.max_memory * 1024 * 1024 if args.max_memory is not None else None,
+        profile_path=args.profile,
+        cprofile_path=args.cprofile,
     )
 
 
@@ -67,9 +280,41 @@ def parse_equation(raw: str) -> eq.Equation:
 
     return eq.Equation(tpl, spl)
 
+
+def create_solver(config: Config, workers: int, profile: bool = False) -> solver.Solver:
+    heuristics = []
+    if config.use_prefix_suffix_heuristics:
+        heuristics.append(prefix_suffix.PrefixSuffixHeuristics())
+    if config.use_length_heuristics:
+        heuristics.append(length.LengthHeuristics())
+    if config.use_parikh_heuristics:
+        heuristics.append(parikh.ParikhHeuristics())
+    if config.use_counting_heuristics:
+        heuristics.append(counting.CountingHeuristics())
+
+    return solver.Solver(
+        heuristics,
+        memo_size=config.memo_size,
+        symmetry=config.use_symmetry,
+        solutions_only=config.solutions_only,
+        policy=config.search_policy,
+        workers=workers,
+        adaptive_heuristics=config.adaptive_heuristics,
+        profile=profile,
+        budget=bg.Budget(max_nodes=config.max_nodes, time_limit=config.time_limit, max_memory=config.max_memory),
+    )
+
+
 def main():
     equation_raw, config = parse_arguments()
 
+    if config.batch_path is not None:
+        try:
+            run_batch(config)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            exit(1)
+        return
 
     try:
         equation = parse_equation(equation_raw)
@@ -77,21 +322,45 @@ def main():
         print(e, file=sys.stderr)
         exit(1)
 
-    heuristics = []
-    if config.use_prefix_suffix_heuristics:
-        heuristics.append(prefix_suffix.PrefixSuffixHeuristics())
-    if config.use_counting_heuristics:
-        heuristics.append(counting.CountingHeuristics())
-
-    s = solver.Solver(heuristics)
-
+    profiler = cProfile.Profile() if config.cprofile_path is not None else None
     try:
-        root_node, solver_stats = s.solve(equation)
+        s = create_solver(config, config.workers, profile=config.profile_path is not None)
+        if profiler is not None:
+            profiler.enable()
+        if config.solutions_limit is None:
+            root_node, solver_stats = s.solve(equation)
+        else:
+            solver_stats = solver.SolverStats()
+            solutions = list(itertools.islice(s.solve_iter(equation, solver_stats), config.solutions_limit))
     except ValueError as e:
         print(e, file=sys.stderr)
         exit(1)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+    if profiler is not None:
+        profiler.dump_stats(config.cprofile_path)
+        print(f'Статистика cProfile сохранена по пути {config.cprofile_path}')
+    if config.profile_path is not None:
+        save_profile(config.profile_path, solver_stats)
+        print(f'Статистика этапов поиска сохранена по пути {config.profile_path}')
+
+    if config.solutions_limit is not None:
+        print(f'Найдено решений: {len(solutions)}')
+        for i, path in enumerate(solutions, 1):
+            print(f'Решение {i}:')
+            print(format_solution(path))
+
+        if len(solutions) == 0:
+            return
+
+        root_node = solutions[0][0]
 
     print(f'Решено за {solver_stats.total_working_time:.4f} секунд')
+    if solver_stats.truncated:
+        print(f'Поиск остановлен, исчерпано ограничение {solver_stats.exhausted_budget}: '
+              f'дерево построено частично')
 
     stats = collect_tree_stats(root_node)
     for name, timings in solver_stats.heuristics_timings.items():
@@ -99,13 +368,19 @@ def main():
     for name, count in solver_stats.branches_dropped_by_heuristics.items():
         print(f'Эвристика {name} отбросила {count} ветвей')
 
+    if config.memo_size > 0:
+        print(f'Повторно использовано поддеревьев: {solver_stats.memo_hits}, '
+              f'промахов таблицы: {solver_stats.memo_misses}')
+    if config.use_symmetry:
+        print(f'Переиспользовано поддеревьев симметричных соседних узлов: {solver_stats.siblings_deduplicated}')
+
     print(f'Глубина итогового дерева {stats.depth}')
     print(f'Всего в дереве {stats.nodes_count} узлов')
     print(f'Всего в дереве {stats.solution_nodes_count} узлов-решений')
 
     if config.tree_image_path is not None:
         print('Сохраняется изображение...')
-        generator = tree_image.TreeImage()
+        generator = tree_image.TreeImage(config.tree_image_collapse_failed, config.tree_image_max_depth)
         try:
             generator.generate(config.tree_image_path, root_node)
         except Exception as e:
@@ -114,6 +389,179 @@ def main():
         print(f'Изображение сохранено по пути {config.tree_image_path}')
 
 
+def save_profile(path: str, solver_stats: solver.SolverStats):
+    """
+    Сохраняет статистику этапов поиска в JSON, этапы упорядочены по убыванию суммарного времени
+    """
+    phases = sorted(solver_stats.phases.items(), key=lambda item: item[1].total_time, reverse=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_time': solver_stats.total_working_time,
+            'phases': {phase: asdict(phase_stats) for phase, phase_stats in phases},
+        }, f, ensure_ascii=False, indent=2)
+
+
+@dataclass
+class BatchItem:
+    line: int
+    equation: str
+    id: str | int | None = None
+    # строка файла не разобрана, сопоставления нет
+    error: str | None = None
+
+
+def read_batch(path: str) -> Iterator[BatchItem]:
+    """
+    Читает сопоставления пакета. Строка файла - либо сопоставление template=sample, либо JSON-объект
+    с полем equation или полями template и sample и необязательным полем id. Пустые строки и строки,
+    начинающиеся с #, пропускаются. Для неразобранной строки возвращается элемент с полем error
+
+    :param path: путь к файлу пакета
+    :return: сопоставления с номерами их строк
+    """
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+
+            if not line.startswith('{'):
+                yield BatchItem(line_number, line)
+                continue
+
+            try:
+                obj = json.loads(line)
+                raw = obj['equation'] if 'equation' in obj else f"{obj['template']}={obj['sample']}"
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                yield BatchItem(line_number, line, error=f'некорректное сопоставление ({e})')
+                continue
+
+            yield BatchItem(line_number, raw, obj.get('id'))
+
+
+_batch_solver: solver.Solver | None = None
+_BATCH_TASKS_PER_WORKER = 4
+
+
+def _init_batch_worker(config: Config):
+    # решатель и эвристики (вместе с z3) создаются один раз на процесс и переиспользуются
+    global _batch_solver
+    _batch_solver = create_solver(config, workers=1)
+
+
+def solve_batch_item(s: solver.Solver, item: BatchItem) -> dict:
+    """
+    Решает одно сопоставление пакета в текущем процессе
+
+    :param s: решатель
+    :param item: сопоставление
+    :return: результат для вывода в JSON: решено ли сопоставление, время, число узлов дерева и значения
+        переменных в решениях. Если поиск остановлен ограничением - поле truncated с его именем,
+        при ошибке - поле error
+    """
+    result = {'line': item.line, 'equation': item.equation}
+    if item.id is not None:
+        result['id'] = item.id
+
+    start = time.perf_counter()
+    try:
+        root, solver_stats = s.solve(parse_equation(item.equation))
+    except ValueError as e:
+        return result | {'solved': False, 'error': str(e)}
+
+    elapsed = time.perf_counter() - start
+    if solver_stats.truncated:
+        result['truncated'] = str(solver_stats.exhausted_budget)
+
+    assignments = []
+    for path in solution.get_solution_paths(root):
+        assignment = solution.get_assignment(path)
+        assignments.append(tuple(sorted(
+            (str(var), ''.join(str(el) for el in value)) for var, value in assignment.items()
+        )))
+    assignments = list(dict.fromkeys(assignments))
+
+    return result | {
+        'solved': len(assignments) > 0,
+        'time': round(elapsed, 6),
+        'nodes': collect_tree_stats(root).nodes_count,
+        'solutions': [dict(assignment) for assignment in assignments],
+    }
+
+
+def reset_tables():
+    """
+    Сбрасывает таблицу символов и битовые маски ограничений. Они общие для процесса и пополняются
+    каждым решенным сопоставлением, поэтому процесс, решающий много сопоставлений, сбрасывает их
+    между ними. Уравнения и деревья, построенные до сброса, становятся недействительными
+    """
+    st.reset()
+    vr.reset()
+
+
+def _solve_batch_item_in_worker(item: BatchItem) -> dict:
+    # от предыдущих сопоставлений процесса остались только результаты в JSON
+    reset_tables()
+    return solve_batch_item(_batch_solver, item)
+
+
+def run_batch(config: Config):
+    """
+    Решает сопоставления пакета в пуле из config.workers процессов и выводит по строке JSON
+    на каждое сопоставление в порядке завершения. Файл читается по мере решения: в очереди пула
+    не больше _BATCH_TASKS_PER_WORKER сопоставлений на процесс
+    """
+    workers = max(config.workers, 1)
+
+    def print_result(result: dict):
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_batch_worker,
+        initargs=(config,),
+    )
+    try:
+        pending = set()
+        for item in read_batch(config.batch_path):
+            if item.error is not None:
+                print_result({'line': item.line, 'error': item.error})
+                continue
+
+            pending.add(pool.submit(_solve_batch_item_in_worker, item))
+            if len(pending) >= workers * _BATCH_TASKS_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    print_result(future.result())
+
+        for future in as_completed(pending):
+            print_result(future.result())
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def format_solution(path: list[cn.CompressionNode]) -> str:
+    """
+    :param path: путь от корня дерева до узла-решения
+    :return: сжатия и подстановки на пути, по одному узлу в строке
+    """
+    equation = path[0].equation
+    lines = [f'    {equation}']
+    for node in path[1:]:
+        equation = node.get_equation(equation)
+        parts = []
+        if node.compression_action is not None:
+            action, new_const = node.compression_action
+            parts.append(f'{action} → {new_const}')
+        if node.option is not None and not node.option.is_empty:
+            parts.append(str(node.option))
+        parts.append(str(equation))
+
+        lines.append('    ' + '; '.join(parts))
+
+    return '\n'.join(lines)
+
+
 @dataclass
 class TreeStats:
     depth: int
@@ -134,30 +582,35 @@ def collect_tree_stats(node: cn.CompressionNode) -> TreeStats:
 def calculate_nodes(node: cn.CompressionNode) -> tuple[int, int]:
     children_ids = set()
     solution_ids = set()
+    # узлы, отброшенные решателем вместе с поддеревьями без решений
+    pruned_count = 0
 
-    def _inner(innder_node: cn.CompressionNode):
-        if innder_node.equation.is_solved:
-            solution_ids.add(innder_node.id)
+    stack = [node]
+    while stack:
+        inner_node = stack.pop()
+        if inner_node.id in children_ids:
+            continue
 
-        children_ids.add(innder_node.id)
+        if inner_node.is_solved:
+            solution_ids.add(inner_node.id)
 
-        for child in innder_node.children:
-            _inner(child)
+        children_ids.add(inner_node.id)
+        pruned_count += inner_node.pruned_nodes
+        stack.extend(inner_node.children)
 
-    _inner(node)
-
-    return len(children_ids), len(solution_ids)
+    return len(children_ids) + pruned_count, len(solution_ids)
 
 
 def calculate_tree_depth(node: cn.CompressionNode) -> int:
-    if len(node.children) == 0:
-        return 1
-
     max_depth = 0
-    for child in node.children:
-        max_depth = max(max_depth, calculate_tree_depth(child))
 
-    return max_depth + 1
+    stack = [(node, 1)]
+    while stack:
+        inner_node, depth = stack.pop()
+        max_depth = max(max_depth, depth + inner_node.pruned_depth)
+        stack.extend((child, depth + 1) for child in inner_node.children)
+
+    return max_depth
 
 
 if __name__ == '__main__':
@@ -0,0 +1,126 @@
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from enum import Enum
+
+
+class BudgetKind(Enum):
+    NODES = 'nodes'
+    TIME = 'time'
+    MEMORY = 'memory'
+
+    def __str__(self):
+        return f'{self.value}'
+
+    __repr__ = __str__
+
+
+@dataclass(frozen=True)
+class Budget:
+    """
+    Ограничения поиска. Когда одно из них исчерпано, решатель останавливается и возвращает
+    недостроенное дерево с уже найденными решениями
+    """
+    # сколько узлов можно создать; проверяется перед раскрытием узла и перед каждым его вариантом,
+    # поэтому тривиальные решения последнего варианта могут немного превысить ограничение
+    max_nodes: int | None = None
+    # сколько секунд может длиться поиск
+    time_limit: float | None = None
+    # сколько байт памяти может занимать процесс (при включенном tracemalloc - сколько байт выделено
+    # под отслеживаемые объекты)
+    max_memory: int | None = None
+    # момент (по time.time()), к которому поиск должен закончиться. Задается поддеревьям, которые раскрываются
+    # в других процессах: поддерево из очереди пула начинается позже, но заканчивается к тому же сроку
+    deadline: float | None = None
+
+    @property
+    def is_unlimited(self) -> bool:
+        return self.max_nodes is None and self.time_limit is None and self.max_memory is None and self.deadline is None
+
+    def start(self) -> 'BudgetTracker':
+        return BudgetTracker(self)
+
+
+class BudgetTracker:
+    """
+    Следит за ограничениями одного запуска поиска
+    """
+
+    # память проверяется не при каждом раскрытии узла: это дороже проверки числа узлов и времени
+    MEMORY_CHECK_PERIOD = 256
+
+    def __init__(self, budget: Budget):
+        self._budget = budget
+        now = time.monotonic()
+        deadlines = []
+        if budget.time_limit is not None:
+            deadlines.append(now + budget.time_limit)
+        if budget.deadline is not None:
+            deadlines.append(now + budget.deadline - time.time())
+        self._deadline = min(deadlines, default=None)
+        self._checks = 0
+
+    def get_remaining(self, nodes: int, parts: int = 1) -> Budget:
+        """
+        :param nodes: сколько узлов уже создано
+        :param parts: на сколько частей делится оставшийся поиск
+        :return: ограничения одной части оставшегося поиска (для поддеревьев, раскрываемых в других процессах):
+            оставшиеся узлы делятся между частями поровну, время задается общим сроком окончания,
+            ограничение памяти остается прежним
+        """
+        max_nodes = None
+        if self._budget.max_nodes is not None:
+            max_nodes = max(self._budget.max_nodes - nodes, 0) // parts
+
+        time_left = self.get_time_left()
+
+        return Budget(
+            max_nodes=max_nodes,
+            max_memory=self._budget.max_memory,
+            deadline=time.time() + time_left if time_left is not None else None,
+        )
+
+    def get_time_left(self) -> float | None:
+        """
+        :return: сколько секунд осталось до окончания поиска, либо None, если время не ограничено
+        """
+        if self._deadline is None:
+            return None
+
+        return max(self._deadline - time.monotonic(), 0)
+
+    def check(self, nodes: int) -> BudgetKind | None:
+        """
+        :param nodes: сколько узлов уже создано
+        :return: исчерпанное ограничение, либо None
+        """
+        if self._budget.max_nodes is not None and nodes >= self._budget.max_nodes:
+            return BudgetKind.NODES
+
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return BudgetKind.TIME
+
+        if self._budget.max_memory is not None:
+            self._checks += 1
+            if self._checks % self.MEMORY_CHECK_PERIOD == 0 and get_memory_usage() >= self._budget.max_memory:
+                return BudgetKind.MEMORY
+
+        return None
+
+
+def get_memory_usage() -> int:
+    """
+    :return: размер отслеживаемой памяти, если tracemalloc включен, иначе резидентной памяти процесса в байтах
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # без /proc доступен только пиковый размер: в килобайтах на Linux, в байтах на macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
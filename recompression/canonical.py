@@ -0,0 +1,313 @@
+import dataclasses
+import hashlib
+from array import array
+from collections.abc import Callable
+
+from recompression.models import actions as ac, compression_node as cn, const as c, equation as eq, \
+    option as opt, symbol_table as st, var as v, var_restriction as vr
+
+# Токен элемента в канонической форме: переменные нумеруются отрицательными числами,
+# свежие константы (полученные сжатием) - положительными, константы алфавита остаются своими символами
+Token = int | str
+
+Naming = dict[int, Token]
+
+
+@dataclasses.dataclass(frozen=True)
+class CanonicalForm:
+    """
+    Каноническая форма уравнения с ограничением: совпадает у уравнений, которые отличаются
+    только именами переменных и версиями констант, полученных сжатием
+    """
+    template: tuple[Token, ...]
+    sample: tuple[Token, ...]
+    restriction: tuple[frozenset, frozenset | None] | None
+
+    def digest(self) -> str:
+        """
+        :return: хеш, не зависящий от процесса и запуска, пригодный для хранилищ результатов между запусками
+        """
+        restriction = None
+        if self.restriction is not None:
+            simple, restriction_or = self.restriction
+            restriction = (
+                sorted(repr(atom) for atom in simple),
+                sorted(repr(atom) for atom in restriction_or) if restriction_or is not None else None,
+            )
+
+        return hashlib.sha1(repr((self.template, self.sample, restriction)).encode()).hexdigest()
+
+
+class Canonicalizer:
+    """
+    Переименовывает переменные и свежие константы уравнения в порядке первого вхождения
+    (сначала в шаблон, затем в образец, затем в ограничение)
+    """
+
+    def canonicalize(
+            self,
+            equation: eq.Equation,
+            restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None,
+    ) -> tuple[CanonicalForm, Naming]:
+        """
+        :param equation: уравнение
+        :param restriction: ограничение на переменные уравнения
+        :return: каноническая форма и соответствие идентификаторов таблицы символов токенам формы
+        """
+        naming: Naming = {}
+        counters = [0, 0]
+
+        def token(element_id: int) -> Token:
+            tok = naming.get(element_id)
+            if tok is not None:
+                return tok
+
+            if element_id < 0:
+                counters[0] += 1
+                tok = -counters[0]
+            else:
+                const = st.get_element(element_id)
+                if isinstance(const, c.AlphabetConst):
+                    tok = const.sym
+                else:
+                    counters[1] += 1
+                    tok = counters[1]
+
+            naming[element_id] = tok
+            return tok
+
+        template = tuple(token(el) for el in equation.template.ids)
+        sample = tuple(token(el) for el in equation.sample.ids)
+
+        return CanonicalForm(template, sample, self._canonicalize_restriction(restriction, naming, token)), naming
+
+    def _canonicalize_restriction(
+            self,
+            restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None,
+            naming: Naming,
+            token: Callable[[int], Token],
+    ) -> tuple[frozenset, frozenset | None] | None:
+        if restriction is None:
+            return None
+
+        def atom(restr: vr.Restriction) -> tuple | None:
+            var_id = st.get_id(restr.var)
+            # ограничения на переменные, которых уже нет в шаблоне, на решение не влияют
+            if var_id not in naming:
+                return None
+
+            if isinstance(restr, vr.VarNotEmpty):
+                return 'E', naming[var_id]
+            if isinstance(restr, vr.VarNotStartsWith):
+                return 'S', naming[var_id], token(st.get_id(restr.const))
+
+            return 'F', naming[var_id], token(st.get_id(restr.const))
+
+        simple = restriction.simple_restrictions if isinstance(restriction, vr.RestrictionAND) else []
+        restriction_or = restriction.restriction_or if isinstance(restriction, vr.RestrictionAND) else None
+        if isinstance(restriction, vr.RestrictionOR):
+            restriction_or = restriction
+        elif not isinstance(restriction, vr.RestrictionAND):
+            simple = [restriction]
+
+        simple_atoms = frozenset(a for a in map(atom, simple) if a is not None)
+
+        or_atoms = None
+        if restriction_or is not None:
+            left, right = atom(restriction_or.left), atom(restriction_or.right)
+            # дизъюнкция с ограничением на отсутствующую переменную тождественно истинна
+            if left is not None and right is not None and left not in simple_atoms and right not in simple_atoms:
+                or_atoms = frozenset((left, right))
+
+        if len(simple_atoms) == 0 and or_atoms is None:
+            return None
+
+        return simple_atoms, or_atoms
+
+
+class RenameConflict(Exception):
+    """
+    Поддерево нельзя переименовать: константа, созданная внутри него, совпала бы с константой целевого уравнения
+    """
+
+
+class Renaming:
+    """
+    Переименование элементов поддерева, построенного для уравнения с именованием source,
+    в элементы уравнения с той же канонической формой и именованием target
+    """
+
+    def __init__(self, source: Naming, target: Naming):
+        by_token = {tok: element_id for element_id, tok in target.items()}
+
+        self._translation: dict[int, int] = {}
+        for element_id, tok in source.items():
+            target_id = by_token.get(tok, element_id)
+            if target_id != element_id:
+                self._translation[element_id] = target_id
+
+        # идентификаторы, которые могут появиться в поддереве только как созданные внутри него константы
+        self._conflicting = set(target) - set(source)
+        # копии уже переименованных узлов: общие поддеревья остаются общими и в копии
+        self._copies: dict[int, cn.CompressionNode] = {}
+
+    @classmethod
+    def from_translation(cls, translation: dict[c.Const, c.Const]) -> 'Renaming':
+        """
+        :param translation: явное соответствие заменяемых констант новым
+        """
+        renaming = cls({}, {})
+        renaming._translation = {st.get_id(old): st.get_id(new) for old, new in translation.items()}
+
+        return renaming
+
+    @property
+    def is_identity(self) -> bool:
+        return len(self._translation) == 0
+
+    def rename_node(
+            self,
+            node: cn.CompressionNode,
+            next_node_id: Callable[[], int],
+            parent: cn.CompressionNode | None = None,
+    ) -> cn.CompressionNode:
+        """
+        Копирует поддерево узла, переименовывая в нем переменные и константы. Уравнение переименовывается
+        только у корня копии, уравнения остальных узлов восстанавливаются по их новым родителям
+
+        :param node: корень копируемого поддерева
+        :param next_node_id: источник идентификаторов новых узлов
+        :param parent: узел, к которому подвешивается копия
+        :return: копия поддерева
+        :raises RenameConflict: если переименование склеивает различные константы
+        """
+        root = None
+        stack: list[tuple[cn.CompressionNode, cn.CompressionNode | None]] = [(node, None)]
+        while stack:
+            original, copy_parent = stack.pop()
+
+            copy = self._copies.get(id(original))
+            if copy is not None:
+                if copy_parent is None:
+                    return copy
+                copy_parent.children.append(copy)
+                continue
+
+            copy = cn.CompressionNode(
+                next_node_id(),
+                self._equation(original.equation) if copy_parent is None else None,
+                self._option(original.option),
+                self._compression_action(original.compression_action),
+                [],
+                copy_parent if copy_parent is not None else parent,
+                original.is_solved,
+            )
+            copy.pruned_nodes = original.pruned_nodes
+            copy.pruned_depth = original.pruned_depth
+            self._copies[id(original)] = copy
+
+            if copy_parent is None:
+                root = copy
+            else:
+                copy_parent.children.append(copy)
+
+            stack.extend((child, copy) for child in reversed(original.children))
+
+        return root
+
+    def _id(self, element_id: int) -> int:
+        renamed = self._translation.get(element_id)
+        if renamed is not None:
+            return renamed
+
+        if element_id in self._conflicting:
+            raise RenameConflict(st.get_element(element_id))
+
+        return element_id
+
+    def _element(self, element: c.Const | v.Var) -> c.Const | v.Var:
+        return st.get_element(self._id(st.get_id(element)))
+
+    def _equation(self, equation: eq.Equation) -> eq.Equation:
+        return eq.Equation(
+            eq.Template.from_ids(array('i', map(self._id, equation.template.ids))),
+            eq.Sample.from_ids(array('i', map(self._id, equation.sample.ids))),
+        )
+
+    def _option(self, option: opt.Option | None) -> opt.Option | None:
+        if option is None:
+            return None
+
+        return opt.Option([self._atom(subst) for subst in option.substitutions], self._restriction(option.restriction))
+
+    def _restriction(
+            self,
+            restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None,
+    ) -> vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None:
+        if restriction is None:
+            return None
+
+        if isinstance(restriction, vr.RestrictionOR):
+            return vr.RestrictionOR(self._atom(restriction.left), self._atom(restriction.right))
+
+        if isinstance(restriction, vr.RestrictionAND):
+            return vr.RestrictionAND(
+                [self._atom(restr) for restr in restriction.simple_restrictions],
+                self._restriction(restriction.restriction_or),
+            )
+
+        return self._atom(restriction)
+
+    def _compression_action(
+            self,
+            compression_action: tuple[ac.CompressBlockAction | ac.CompressPairAction, c.Const] | None,
+    ) -> tuple[ac.CompressBlockAction | ac.CompressPairAction, c.Const] | None:
+        if compression_action is None:
+            return None
+
+        action, new_const = compression_action
+        if isinstance(action, ac.CompressPairAction):
+            action = ac.CompressPairAction((self._element(action.pair[0]), self._element(action.pair[1])))
+        else:
+            action = ac.CompressBlockAction(self._element(action.const), action.len, action.indexes)
+
+        if isinstance(new_const, c.BlockConst) and new_const.compression_factor is None:
+            return action, self._block_const(new_const)
+
+        return action, self._element(new_const)
+
+    def _block_const(self, block_const: c.BlockConst) -> c.BlockConst:
+        """
+        Константа блока без степени сжатия не встречается в уравнениях, поэтому переименовывается
+        так же, как константы ее блоков
+        """
+        renamed_id = self._translation.get(st.get_id(block_const))
+        if renamed_id is not None:
+            return st.get_element(renamed_id)
+
+        for element_id, renamed_id in self._translation.items():
+            element = st.get_element(element_id)
+            is_same_block = isinstance(element, c.BlockConst) and element.sym == block_const.sym \
+                and element.version == block_const.version
+            if is_same_block:
+                renamed = st.get_element(renamed_id)
+                return c.BlockConst(renamed.sym, renamed.version)
+
+        # уравнения узлов внутри поддерева не переименовываются, поэтому созданные в нем блоки проверяются здесь
+        for element_id in self._conflicting:
+            element = st.get_element(element_id)
+            if isinstance(element, c.BlockConst) and (element.sym, element.version) == (block_const.sym,
+                                                                                         block_const.version):
+                raise RenameConflict(element)
+
+        return block_const
+
+    def _atom(self, atom):
+        """
+        Переименовывает подстановку или простое ограничение: у всех них есть поле var и, возможно, const
+        """
+        changes = {'var': self._element(atom.var)}
+        if hasattr(atom, 'const'):
+            changes['const'] = self._element(atom.const)
+
+        return dataclasses.replace(atom, **changes)
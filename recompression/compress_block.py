@@ -0,0 +1,52 @@
+from recompression.models import equation as eq, const as c
+
+
+class BlockCompressor:
+    def __init__(self):
+        self._version_counter = 1
+        self._table = {}
+
+    def reset(self):
+        self._version_counter = 1
+        self._table = {}
+
+    def compress_block(
+            self,
+            const: c.Const,
+            equation: eq.Equation,
+            compressed_sample: eq.Sample | None = None,
+    ) -> tuple[c.BlockConst, eq.Equation]:
+        """
+        Сжимает блоки константы const в уравнении eq.
+        Каждый максимальный блок a^n, n >= 2, превращается в константу a_(i).n, где версия i одна
+        для всех блоков константы a
+
+        :param const: константа, блоки которой сжимаются
+        :param equation: уравнение
+        :param compressed_sample: образец уравнения, в котором блоки уже сжаты этим компрессором
+        :return: new_const - константа блока без степени сжатия, equation - новое уравнение
+        """
+        if const not in self._table:
+            self._table[const] = c.BlockConst(const.sym, self._version_counter)
+
+        new_const = self._table[const]
+
+        self._version_counter += 1
+
+        if compressed_sample is None:
+            compressed_sample = equation.sample.with_replaced_blocks(const, new_const)
+
+        return new_const, eq.Equation(
+            template=equation.template.with_replaced_blocks(const, new_const),
+            sample=compressed_sample,
+        )
+
+    def get_const(self, const: c.Const) -> c.BlockConst:
+        """
+        Возвращает константу блоков const без степени сжатия, создавая ее, если блоки const еще не сжимались
+        """
+        if const not in self._table:
+            self._table[const] = c.BlockConst(const.sym, self._version_counter)
+            self._version_counter += 1
+
+        return self._table[const]
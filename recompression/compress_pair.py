@@ -10,13 +10,20 @@ class PairCompressor:
         self._version_counter = 1
         self._table = {}
 
-    def compress_pair(self, pair: c.Pair, equation: eq.Equation) -> tuple[c.Const, eq.Equation]:
+    def compress_pair(
+            self,
+            pair: c.Pair,
+            equation: eq.Equation,
+            compressed_sample: eq.Sample | None = None,
+    ) -> tuple[c.Const, eq.Equation]:
         """
         Сжимает пару pair в уравнении eq.
         Пара вида a_ib_j превращается в константу a_(max(i, j)+1)
     
         :param pair: сжимаемая пара
         :param equation: уравнение
+        :param compressed_sample: образец уравнения, в котором пара уже сжата этим компрессором. Варианты
+            раскрытия переменных меняют только шаблон, поэтому образец достаточно сжать один раз на действие
         :return: new_const - константа, полученная в результате сжатия, equation - новое уравнение
         """
         a, b = pair
@@ -28,7 +35,20 @@ class PairCompressor:
 
         self._version_counter += 1
 
+        if compressed_sample is None:
+            compressed_sample = equation.sample.with_replaced_pair(pair, new_const)
+
         return new_const, eq.Equation(
             template=equation.template.with_replaced_pair(pair, new_const),
-            sample=equation.sample.with_replaced_pair(pair, new_const),
+            sample=compressed_sample,
         )
+
+    def get_const(self, pair: c.Pair) -> c.PairConst:
+        """
+        Возвращает константу пары pair, создавая ее, если пара еще не сжималась
+        """
+        if pair not in self._table:
+            self._table[pair] = c.PairConst(pair[0].sym, self._version_counter)
+            self._version_counter += 1
+
+        return self._table[pair]
@@ -1,9 +1,24 @@
-import itertools
-
-from recompression.models import equation as eq, option as opt, const as c, substitution as sb
-
-
-def get_empty_options(pair: c.Pair, template: eq.Template, parent_option: opt.Option | None = None):
+from collections.abc import Iterator
+
+from recompression.models import equation as eq, option as opt, const as c, substitution as sb, var as v, \
+    var_restriction as vr
+
+
+def get_empty_options(
+        pair: c.Pair,
+        template: eq.Template,
+        parent_option: opt.Option | None = None,
+) -> Iterator[opt.Option]:
+    """
+    Варианты обнуления переменных, которые стоят между константами пары. Подмножества обнуляемых
+    переменных перебираются в глубину, а ограничения накапливаются битовыми масками. Если обнуление
+    уже выбранных переменных противоречит ограничению родителя, все продолжения выбора отбрасываются сразу
+
+    :param pair: сжимаемая пара
+    :param template: шаблон уравнения
+    :param parent_option: вариант, которым получено уравнение
+    :return: варианты с пустыми подстановками и ограничениями VarNotEmpty для остальных переменных
+    """
     if parent_option is None:
         parent_option = opt.Option([], None)
 
@@ -11,47 +26,48 @@ def get_empty_options(pair: c.Pair, template: eq.Template, parent_option: opt.Op
 
     a, b = pair
 
-    maybe_empty_vars = set()
+    maybe_empty_vars = {}
     for (g_type, start, g_len) in var_groups:
         subgroup = template.elements[start:start+g_len]
         left = template.elements[start - 1] if start - 1 >= 0 else None
         right = template.elements[start+g_len] if start + g_len < len(template.elements) else None
 
         if g_type == eq.VarGroupType.GENERIC and left == a and right == b:
-            maybe_empty_vars.update(subgroup)
+            maybe_empty_vars.update(dict.fromkeys(subgroup))
         elif g_type == eq.VarGroupType.LEFT and right == b:
-            maybe_empty_vars.update(subgroup[1:])
+            maybe_empty_vars.update(dict.fromkeys(subgroup[1:]))
         elif g_type == eq.VarGroupType.RIGHT and left == a:
-            maybe_empty_vars.update(subgroup[:-1])
+            maybe_empty_vars.update(dict.fromkeys(subgroup[:-1]))
         elif g_type == eq.VarGroupType.LEFT_RIGHT:
-            maybe_empty_vars.update(subgroup[1:-1])
+            maybe_empty_vars.update(dict.fromkeys(subgroup[1:-1]))
 
-    empty_vars = set()
+    empty_vars = []
     for var in maybe_empty_vars:
         subst = sb.EmptySubstitution(var)
         if parent_option.restriction is None or parent_option.restriction.is_substitution_satisfies(subst):
-            empty_vars.add(var)
-
-    options = []
-    for elements_count in range(0, len(empty_vars) + 1):
-        for empty_vars_combination in itertools.combinations(empty_vars, r=elements_count):
-            not_empty_vars = empty_vars.difference(empty_vars_combination)
-
-            substs = [sb.EmptySubstitution(var) for var in empty_vars_combination]
-            restrs = [opt.VarNotEmpty(var) for var in not_empty_vars]
-
-            restriction = None
-            if len(restrs) == 1:
-                restriction = restrs[0]
-            elif len(restrs) > 1:
-                restriction = opt.RestrictionAND(restrs, None)
-
-            option = opt.Option(substs, restriction)
-            options.extend([
-                opt.Option(option.substitutions, comb.restriction) for comb in parent_option.combine(option)
-            ])
-
-    return list(set(options))
+            empty_vars.append(var)
+
+    parent_mask = vr.RestrictionMask.from_restriction(parent_option.restriction)
+    parent_violated, parent_satisfied = vr.get_substitutions_masks(parent_option.substitutions)
+
+    # стек: индекс следующей переменной, обнуленные переменные, маска их нарушений, маска VarNotEmpty остальных
+    stack: list[tuple[int, list[v.Var], int, int]] = [(0, [], 0, 0)]
+    while stack:
+        i, emptied, violated, not_empty = stack.pop()
+        if i == len(empty_vars):
+            mask = parent_mask.combine(vr.RestrictionMask(not_empty, None))[0]
+            mask = mask.apply(parent_violated | violated, parent_satisfied)
+            if mask is not None:
+                yield opt.Option([sb.EmptySubstitution(var) for var in emptied], mask.to_restriction())
+            continue
+
+        var = empty_vars[i]
+        var_violated, _ = vr.get_substitutions_masks([sb.EmptySubstitution(var)])
+        if parent_mask.apply(parent_violated | violated | var_violated, parent_satisfied) is not None:
+            stack.append((i + 1, emptied + [var], violated | var_violated, not_empty))
+
+        # переменная остается непустой; этот выбор кладется последним, чтобы первым шел вариант без обнулений
+        stack.append((i + 1, emptied, violated, not_empty | vr.get_atom_mask(vr.VarNotEmpty(var))))
 
 
 def get_full_empty_option(template: eq.Template, parent_option: opt.Option) -> opt.Option | None:
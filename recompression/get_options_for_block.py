@@ -0,0 +1,242 @@
+from collections import Counter
+from collections.abc import Iterator
+
+from recompression.models import const as c, equation as eq, option as opt, substitution as sb, var as v, \
+    var_restriction as vr, symbol_table as st
+
+
+def get_options_for_block(
+        equation: eq.Equation,
+        const: c.Const,
+        parent_option: opt.Option | None,
+) -> Iterator[opt.Option]:
+    """
+    Варианты раскрытия переменных перед сжатием блоков константы a=const. Каждая переменная X либо пуста,
+    либо целиком состоит из блока X=a^m, либо X=a^l X a^r, где новая X не пуста, не начинается
+    и не заканчивается на a. Варианты строятся лениво, по одному, без повторов
+
+    :param equation: уравнение
+    :param const: константа, блоки которой сжимаются
+    :param parent_option: вариант, которым получено уравнение
+    :return: варианты с подстановками и ограничениями на новые переменные
+    """
+    if parent_option is None:
+        parent_option = opt.Option([], None)
+
+    block_lengths = equation.sample.get_block_lengths(const)
+    if len(block_lengths) == 0:
+        yield parent_option
+        return
+
+    seen = set()
+    for choices in _iter_choices(equation.template.ids, const, Counter(block_lengths), parent_option.restriction):
+        substs = [subst for _, choice in choices for subst in choice]
+        option = opt.Option(substs, _release_restriction(parent_option.restriction, substs)).normalize()
+        if option is None:
+            continue
+
+        new_restrictions = []
+        for var, choice in choices:
+            if _is_var_kept(choice):
+                new_restrictions.extend(_get_new_var_restrictions(var, const))
+
+        options = [option]
+        if len(new_restrictions) > 0:
+            options = [
+                opt.Option(option.substitutions, o.restriction) for o in opt.Option([], option.restriction).combine(
+                    opt.Option([], _restriction_from_list(new_restrictions, None)),
+                )
+            ]
+
+        for o in options:
+            key = o.get_key()
+            if key not in seen:
+                seen.add(key)
+                yield o
+
+
+def _iter_choices(
+        template_ids,
+        const: c.Const,
+        blocks: Counter,
+        restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None,
+) -> Iterator[list[tuple[v.Var, list[sb.Substitution]]]]:
+    """
+    Перебирает подстановки переменных, проходя шаблон слева направо: переменная выбирает подстановку
+    при первом вхождении, а остальные ее вхождения применяют уже выбранную.
+
+    Новые переменные не начинаются и не заканчиваются на a, поэтому каждый блок a в шаблоне после
+    подстановок максимален и соответствует своему блоку a образца. Блок закрывается константой,
+    оставшейся переменной или краем шаблона и занимает блок образца той же длины; длины, выталкиваемые
+    из переменной, ограничены длинами еще не занятых блоков, поэтому невозможные варианты не строятся
+
+    :param blocks: сколько блоков a каждой длины есть в образце
+    :return: переменные в порядке первого вхождения и их подстановки
+    """
+    const_id = st.get_id(const)
+    chosen: dict[int, tuple[int, int, int | None]] = {}
+
+    def close(run: int, free: Counter) -> Counter | None:
+        """
+        :return: незанятые блоки образца после закрытия блока длины run, либо None, если такого блока нет
+        """
+        if run == 0:
+            return free
+        if free[run] == 0:
+            return None
+
+        free = free.copy()
+        free[run] -= 1
+        return free
+
+    def walk(i: int, run: int, free: Counter) -> Iterator[list[tuple[v.Var, list[sb.Substitution]]]]:
+        while i < len(template_ids):
+            el = template_ids[i]
+            i += 1
+
+            if el == const_id:
+                run += 1
+                if run > max((length for length, count in free.items() if count > 0), default=0):
+                    return
+                continue
+
+            if el > 0:
+                free = close(run, free)
+                if free is None:
+                    return
+                run = 0
+                continue
+
+            if el not in chosen:
+                var = st.get_element(el)
+                for choice in _get_var_choices(var, const, run, free):
+                    substs = _get_substitutions(var, const, choice)
+                    if restriction is not None and not all(map(restriction.is_substitution_satisfies, substs)):
+                        continue
+
+                    chosen[el] = choice
+                    yield from walk(i - 1, run, free)
+                    del chosen[el]
+                return
+
+            left, right, block = chosen[el]
+            if block is not None:
+                run += block
+                continue
+
+            free = close(run + left, free)
+            if free is None:
+                return
+            run = right
+
+        if close(run, free) is not None:
+            yield [
+                (st.get_element(var_id), _get_substitutions(st.get_element(var_id), const, choice))
+                for var_id, choice in chosen.items()
+            ]
+
+    yield from walk(0, 0, blocks)
+
+
+def _get_var_choices(var: v.Var, const: c.Const, run: int, free: Counter) -> Iterator[tuple[int, int, int | None]]:
+    """
+    :param run: длина незакрытого блока a перед переменной
+    :param free: незанятые блоки образца
+    :return: подстановки переменной: (0, 0, m) - X=a^m, m=0 - X пуста, (l, r, None) - X=a^l X a^r
+    """
+    max_len = max((length for length, count in free.items() if count > 0), default=0)
+
+    for m in range(0, max_len - run + 1):
+        yield 0, 0, m
+
+    for left in range(0, max_len - run + 1):
+        if run + left > 0 and free[run + left] == 0:
+            continue
+
+        # блок слева занимает один из блоков образца, справа остаются остальные
+        rest = free.copy()
+        rest[run + left] -= 1
+        max_right = max((length for length, count in rest.items() if count > 0 and length > 0), default=0)
+        for right in range(0, max_right + 1):
+            yield left, right, None
+
+
+def _get_substitutions(var: v.Var, const: c.Const, choice: tuple[int, int, int | None]) -> list[sb.Substitution]:
+    left, right, block = choice
+    if block == 0:
+        return [sb.EmptySubstitution(var)]
+    if block is not None:
+        return [sb.BlockSubstitution(var, const, block)]
+
+    # пустой список - переменная не меняется, но на нее накладываются ограничения новой переменной
+    pops = []
+    if left > 0:
+        pops.append(sb.PopBlockLeft(var, const, left))
+    if right > 0:
+        pops.append(sb.PopBlockRight(var, const, right))
+
+    return pops
+
+
+def _is_var_kept(choice: list[sb.Substitution]) -> bool:
+    """
+    :return: остается ли переменная в шаблоне после подстановок варианта
+    """
+    return len(choice) == 0 or isinstance(choice[0], (sb.PopBlockLeft, sb.PopBlockRight))
+
+
+def _get_new_var_restrictions(var: v.Var, const: c.Const) -> list[vr.Restriction]:
+    return [vr.VarNotEmpty(var), vr.VarNotStartsWith(var, const), vr.VarNotEndsWith(var, const)]
+
+
+def _release_restriction(
+        restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None,
+        substs: list[sb.Substitution],
+) -> vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None:
+    """
+    Убирает из ограничения условия, которые подстановки заведомо выполняют: если X=a^l X, то X не пуста
+    и не начинается ни с какой константы, кроме a, а новая X этими условиями уже не связана
+    """
+    if restriction is None:
+        return None
+
+    def is_released(restr: vr.Restriction) -> bool:
+        for subst in substs:
+            if subst.var != restr.var or isinstance(subst, sb.EmptySubstitution):
+                continue
+
+            if isinstance(restr, vr.VarNotEmpty):
+                return True
+            if isinstance(restr, vr.VarNotStartsWith) and restr.const != subst.const and isinstance(
+                    subst, (sb.PopBlockLeft, sb.BlockSubstitution),
+            ):
+                return True
+            if isinstance(restr, vr.VarNotEndsWith) and restr.const != subst.const and isinstance(
+                    subst, (sb.PopBlockRight, sb.BlockSubstitution),
+            ):
+                return True
+
+        return False
+
+    if isinstance(restriction, vr.RestrictionOR):
+        return None if is_released(restriction.left) or is_released(restriction.right) else restriction
+
+    if not isinstance(restriction, vr.RestrictionAND):
+        return None if is_released(restriction) else restriction
+
+    simple = [restr for restr in restriction.simple_restrictions if not is_released(restr)]
+    restriction_or = _release_restriction(restriction.restriction_or, substs)
+
+    return _restriction_from_list(simple, restriction_or)
+
+
+def _restriction_from_list(
+        simple: list[vr.Restriction],
+        restriction_or: vr.RestrictionOR | None,
+) -> vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None:
+    if len(simple) == 0:
+        return restriction_or
+    if len(simple) == 1 and restriction_or is None:
+        return simple[0]
+
+    return vr.RestrictionAND(simple, restriction_or)
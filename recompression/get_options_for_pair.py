@@ -1,8 +1,8 @@
-from recompression.models import const as c, equation as eq, option as opt, var as v, var_restriction as vr
+from collections.abc import Iterator
 
-from pprint import pprint
+from recompression.models import const as c, equation as eq, option as opt, var_restriction as vr, symbol_table as st
 
-from utils.list import combinations
+from utils.list import flatten
 
 
 def is_poping_essential(template: eq.Template, pair: c.Pair, poping: opt.PopLeft | opt.PopRight):
@@ -17,37 +17,50 @@ def get_options_for_pair(
         equation: eq.Equation,
         pair: c.Pair,
         parent_option: opt.Option,
-) -> list[opt.Option]:
+) -> Iterator[opt.Option]:
+    """
+    Варианты раскрытия переменных перед сжатием пары. Варианты строятся лениво, по одному,
+    без повторов (с точностью до порядка подстановок и ограничений)
+
+    :param equation: уравнение
+    :param pair: сжимаемая пара
+    :param parent_option: вариант, которым получено уравнение
+    :return: варианты с подстановками и ограничениями
+    """
     popings_raw = []
     a, b = pair
-    for i, var in enumerate(equation.template.elements):
-        if not isinstance(var, v.Var):
+    a_id, b_id = st.get_id(a), st.get_id(b)
+    ids = equation.template.ids
+    for i, var_id in enumerate(ids):
+        if var_id > 0:
             continue
 
-        left = equation.template.elements[i - 1] if i != 0 else None
-        right = equation.template.elements[i + 1] if i != len(equation.template.elements) - 1 else None
+        var = st.get_element(var_id)
+        left = ids[i - 1] if i != 0 else 0
+        right = ids[i + 1] if i != len(ids) - 1 else 0
 
-        if left == a:
+        if left == a_id:
             popings_raw.append((opt.PopLeft(var, b),))
 
-        if right == b:
+        if right == b_id:
             popings_raw.append((opt.PopRight(var, a),))
 
-        if isinstance(left, v.Var):
-            if left != var:
-                popings_raw.append((opt.PopLeft(var, b), opt.PopRight(left, a)))
+        if left < 0:
+            if left != var_id:
+                popings_raw.append((opt.PopLeft(var, b), opt.PopRight(st.get_element(left), a)))
             else:
                 popings_raw.append((opt.PopLeft(var, b), opt.PopRight(var, a)))
-        if isinstance(right, v.Var):
-            if right != var:
-                popings_raw.append((opt.PopRight(var, a), opt.PopLeft(right, b)))
+        if right < 0:
+            if right != var_id:
+                popings_raw.append((opt.PopRight(var, a), opt.PopLeft(st.get_element(right), b)))
             else:
                 popings_raw.append((opt.PopLeft(var, b), opt.PopRight(var, a)))
 
     popings = _dedup_popings(popings_raw)
 
     if len(popings) == 0:
-        return [parent_option]
+        yield parent_option
+        return
 
     options_raw = []
 
@@ -84,41 +97,55 @@ def get_options_for_pair(
                 opt.Option([], opt.RestrictionOR(_reverse_substitution(first), _reverse_substitution(second)))
             ])
 
-    if len(options_raw) == 1:
-        result = []
-        for o in options_raw[0]:
-            result.extend(parent_option.combine(o))
-
-        return list(set(result))
-
-    options = []
-    for comb in combinations(options_raw, len(popings)):
-        acc = [opt.Option([], None)]
-        for o in comb:
-            local_acc = []
-            for acc_el in acc:
-                local_acc.extend(acc_el.combine(o))
-            acc = local_acc
-        options.extend(acc)
-
-    result = []
-    for o in options:
-        result.extend(parent_option.combine(o))
-
-    return list(set(result))
+    seen = set()
+    for option in _iter_combined(options_raw, len(popings), parent_option):
+        key = option.get_key()
+        if key not in seen:
+            seen.add(key)
+            yield option
+
+
+def _iter_combined(options_raw: list[list[opt.Option]], n: int, parent_option: opt.Option) -> Iterator[opt.Option]:
+    """
+    Перебирает те же наборы вариантов, что и utils.list.combinations(options_raw, n), и объединяет
+    варианты каждого набора с родительским вариантом. Набор собирается по одному варианту, поэтому
+    начало набора, противоречащее родительскому варианту или самому себе, отсекает сразу все его продолжения
+    """
+    for i, group in enumerate(options_raw):
+        rest = flatten(options_raw[i + 1:i + n + 1])
+        for o in group:
+            yield from _extend(parent_option.combine(o), rest, 0, n - 1)
+
+
+def _extend(acc: list[opt.Option], rest: list[opt.Option], start: int, r: int) -> Iterator[opt.Option]:
+    """
+    :param acc: варианты, полученные объединением начала набора
+    :param rest: варианты, из которых выбирается продолжение набора
+    :param start: индекс в rest, начиная с которого выбирается следующий вариант
+    :param r: сколько вариантов осталось добавить в набор
+    """
+    if r == 0:
+        yield from acc
+        return
+
+    for j in range(start, len(rest) - r + 1):
+        extended = [o for acc_el in acc for o in acc_el.combine(rest[j])]
+        if len(extended) > 0:
+            yield from _extend(extended, rest, j + 1, r - 1)
 
 
 def _dedup_popings(popings_raw: Popings) -> Popings:
-    popings = set()
+    # словарь вместо множества: порядок вариантов не должен зависеть от хешей (версий) констант
+    popings = {}
     for poping in popings_raw:
         if len(poping) == 1:
-            popings.add(poping)
+            popings[poping] = None
             continue
 
         if (poping[1], poping[0]) not in popings:
-            popings.add(poping)
+            popings[poping] = None
 
-    popings_cpy = popings.copy()
+    popings_cpy = list(popings)
     for poping1 in popings_cpy:
         if len(poping1) != 1:
             continue
@@ -130,7 +157,7 @@ def _dedup_popings(popings_raw: Popings) -> Popings:
                 continue
 
             if pop in poping2:
-                popings.remove(poping1)
+                del popings[poping1]
                 break
 
     return list(popings)
@@ -142,19 +169,3 @@ def _reverse_substitution(subst: opt.PopLeft | opt.PopRight) -> opt.Restriction:
 
     return vr.VarNotEndsWith(subst.var, subst.const)
 
-
-if __name__ == '__main__':
-    eq_raw = 'bXYamXbZY=aa'
-    pair_raw = 'ab'
-
-    tpl = eq.Template(*[c.AlphabetConst(sym) if sym.islower() else v.Var(sym) for sym in eq_raw.split('=')[0]])
-    spl = eq.Sample(*[c.AlphabetConst(sym) for sym in eq_raw.split('=')[1]])
-    pr = (c.AlphabetConst(pair_raw[0]), c.AlphabetConst(pair_raw[1]))
-
-    # print(get_options_for_pair(tpl, pr, opt.Option([], None), 0))
-
-    pprint(combinations([
-        ['1-1', '1-2'],
-        ['2-1', '2-2'],
-        ['3-1', '3-2'],
-    ], 3))
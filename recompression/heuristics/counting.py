@@ -1,69 +1,84 @@
 import z3
 
-from recompression.heuristics import heuristics as h
-from recompression.models import equation as eq, var as v, option as opt, substitution as sb
-from utils.time import timeit
+from recompression.heuristics import heuristics as h, parikh
+from recompression.models import equation as eq, option as opt
 
 
 class CountingHeuristics(h.Heurisitcs):
-    def __init__(self):
+    """
+    Проверяет, что числа вхождений констант в шаблон и образец согласованы: для каждой константы c
+    число ее вхождений в шаблон плюс сумма по вхождениям переменных числа c в значении переменной
+    равно числу вхождений c в образец.
+
+    Решатель z3 не пересоздается: переменные модели кешируются, их неотрицательность добавляется
+    в базовую модель один раз, а ограничения конкретного уравнения добавляются между push и pop.
+    Уравнения с одинаковой системой ограничений (часто это соседние узлы) проверяются один раз,
+    а системы, которые решаются простой проверкой (см. parikh.decide), до z3 не доходят
+    """
+
+    def __init__(self, cache_size: int = 100000):
+        """
+        :param cache_size: сколько результатов проверки систем хранить, 0 - не хранить
+        """
         self._z3 = z3.Solver()
+        self._z3_vars: dict[tuple[int, int], z3.ArithRef] = {}
+        self._cache_size = cache_size
+        self._cache: dict[tuple, bool] = {}
+
+    def __getstate__(self):
+        # решатель z3 не сериализуется, в другом процессе создается новый
+        return {'cache_size': self._cache_size}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state['cache_size'])
 
     def get_name(self) -> str:
         return 'counting'
 
     def is_satisfable(self, equation: eq.Equation, option: opt.Option) -> bool:
-        self._z3.reset()
-
-        tpl_consts = equation.template.get_consts_set()
-
-        consts = equation.sample.get_consts_set().union(tpl_consts)
-        model = []
-        local_var_restrictions: dict[(v.Var, bool), any] = {}
-        variables = set()
-        for const in consts:
-            spl_count = 0
-            for element in equation.sample.elements:
-                if element == const:
-                    spl_count += 1
-
-            tpl_count = 0
-            for element in equation.template.elements:
-                if element == const:
-                    tpl_count += 1
-
-            local_model = z3.IntVal(tpl_count)
-            for element in equation.template.elements:
-                if not isinstance(element, v.Var):
-                    continue
-
-                var_name = str(element) + str(const)
-                var = z3.Int(var_name)
-                variables.add(var)
-                local_model += var
-                can_be_empty = True
-                if option.restriction is not None and not option.restriction.is_substitution_satisfies(
-                        sb.EmptySubstitution(element),
-                ):
-                    can_be_empty = False
-
-                if (element, can_be_empty) not in local_var_restrictions:
-                    local_var_restrictions[(element, can_be_empty)] = var
-                else:
-                    local_var_restrictions[(element, can_be_empty)] += var
-            model.append(local_model == z3.IntVal(spl_count))
-
-        model_restrictions = []
-        for k, val in local_var_restrictions.items():
-            if k[1]:
-                model_restrictions.append(val >= 0)
-            else:
-                model_restrictions.append(val > 0)
-
-        for var in variables:
-            model_restrictions.append(var >= 0)
-
-        self._z3.add(*model_restrictions, *model)
-        check_result = self._z3.check()
-
-        return check_result in (z3.sat, z3.unknown)
+        # система зависит только от числа вхождений, а не от самих переменных и констант
+        system = parikh.get_parikh_system(equation, option)
+        result = self._cache.get(system)
+        if result is None:
+            result = parikh.decide(system)
+            if result is None:
+                result = self._check(system)
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            if self._cache_size > 0:
+                self._cache[system] = result
+
+        return result
+
+    def _check(self, system: parikh.ParikhSystem) -> bool:
+        occurrences, not_empty, rows = system
+        z3_vars = [[self._get_var(i, j) for j in range(len(rows))] for i in range(len(occurrences))]
+
+        self._z3.push()
+        try:
+            for j, (tpl_count, spl_count) in enumerate(rows):
+                self._z3.add(z3.Sum(
+                    z3.IntVal(tpl_count),
+                    *[count * z3_vars[i][j] for i, count in enumerate(occurrences)],
+                ) == spl_count)
+
+            for i, is_not_empty in enumerate(not_empty):
+                if is_not_empty:
+                    self._z3.add(z3.Sum(*z3_vars[i]) > 0)
+
+            return self._z3.check() in (z3.sat, z3.unknown)
+        finally:
+            self._z3.pop()
+
+    def _get_var(self, i: int, j: int) -> z3.ArithRef:
+        """
+        :return: переменная модели - число вхождений j-ой константы в значение i-ой переменной
+        """
+        var = self._z3_vars.get((i, j))
+        if var is None:
+            var = z3.Int(f'x_{i}_{j}')
+            self._z3_vars[(i, j)] = var
+            # вызывается вне push/pop, поэтому неотрицательность остается в базовой модели
+            self._z3.add(var >= 0)
+
+        return var
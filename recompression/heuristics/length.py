@@ -0,0 +1,47 @@
+from collections import Counter
+
+from recompression.heuristics import heuristics as h
+from recompression.models import equation as eq, option as opt, substitution as sb, symbol_table as st
+
+
+class LengthHeuristics(h.Heurisitcs):
+    """
+    Проверка длин: длина образца равна числу констант шаблона плюс сумма по переменным числа вхождений
+    переменной, умноженного на ее длину. Непустые по ограничению варианта переменные имеют длину не меньше 1
+    """
+
+    def get_name(self) -> str:
+        return 'length'
+
+    def is_satisfable(self, equation: eq.Equation, option: opt.Option) -> bool:
+        tpl_ids = equation.template.ids
+
+        occurrences = Counter(el for el in tpl_ids if el < 0)
+        residual = len(equation.sample.ids) - (len(tpl_ids) - sum(occurrences.values()))
+        for var_id, count in occurrences.items():
+            is_not_empty = option.restriction is not None and not option.restriction.is_substitution_satisfies(
+                sb.EmptySubstitution(st.get_element(var_id)),
+            )
+            if is_not_empty:
+                residual -= count
+
+        if residual < 0:
+            return False
+
+        return is_representable(residual, set(occurrences.values()))
+
+
+def is_representable(value: int, coins: set[int]) -> bool:
+    """
+    :return: представимо ли value суммой чисел из coins с неотрицательными коэффициентами
+    """
+    mask = (1 << (value + 1)) - 1
+    # i-ый бит - представимо ли число i
+    reachable = 1
+    for coin in sorted(coins):
+        step = coin
+        while step <= value:
+            reachable |= (reachable << step) & mask
+            step *= 2
+
+    return (reachable >> value) & 1 == 1
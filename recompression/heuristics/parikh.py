@@ -0,0 +1,85 @@
+import math
+from collections import Counter
+from typing import NamedTuple
+
+from recompression.heuristics import heuristics as h
+from recompression.models import equation as eq, option as opt, substitution as sb, symbol_table as st
+
+
+class ParikhSystem(NamedTuple):
+    """
+    Система ограничений на числа вхождений констант: для каждой константы (строки) число ее вхождений
+    в шаблон плюс сумма по переменным числа вхождений переменной, умноженного на число этой константы
+    в значении переменной, равно числу вхождений константы в образец
+    """
+    # числа вхождений переменных в шаблон
+    occurrences: tuple[int, ...]
+    # может ли переменная быть пустой
+    not_empty: tuple[bool, ...]
+    # пары (вхождений в шаблон, вхождений в образец) для каждой константы
+    rows: tuple[tuple[int, int], ...]
+
+
+def get_parikh_system(equation: eq.Equation, option: opt.Option) -> ParikhSystem:
+    spl_counts = Counter(equation.sample.ids)
+    tpl_counts = Counter(equation.template.ids)
+
+    var_ids = sorted(el for el in tpl_counts if el < 0)
+    consts = set(spl_counts).union(el for el in tpl_counts if el > 0)
+
+    return ParikhSystem(
+        occurrences=tuple(tpl_counts[var_id] for var_id in var_ids),
+        not_empty=tuple(
+            option.restriction is not None and not option.restriction.is_substitution_satisfies(
+                sb.EmptySubstitution(st.get_element(var_id)),
+            )
+            for var_id in var_ids
+        ),
+        rows=tuple(sorted((tpl_counts[const_id], spl_counts[const_id]) for const_id in consts)),
+    )
+
+
+def decide(system: ParikhSystem) -> bool | None:
+    """
+    Решает систему в простых случаях без решателя
+
+    :return: совместна ли система, либо None, если простой проверки недостаточно
+    """
+    residuals = [spl_count - tpl_count for tpl_count, spl_count in system.rows]
+    if any(residual < 0 for residual in residuals):
+        return False
+
+    # каждое вхождение непустой переменной забирает хотя бы одну константу
+    if sum(count for count, is_not_empty in zip(system.occurrences, system.not_empty) if is_not_empty) > sum(
+            residuals):
+        return False
+
+    if len(system.occurrences) == 0:
+        return all(residual == 0 for residual in residuals)
+
+    divisor = math.gcd(*system.occurrences)
+    if any(residual % divisor != 0 for residual in residuals):
+        return False
+
+    if len(system.occurrences) == 1:
+        return True
+
+    # переменная с одним вхождением забирает все оставшиеся константы, если остальные могут быть пусты
+    for i, count in enumerate(system.occurrences):
+        if count == 1 and not any(is_not_empty for j, is_not_empty in enumerate(system.not_empty) if j != i):
+            return True
+
+    return None
+
+
+class ParikhHeuristics(h.Heurisitcs):
+    """
+    Быстрая проверка чисел вхождений констант без z3. Отбрасывает только те ветви, которые
+    отбросила бы и эвристика подсчета констант, поэтому ставится перед ней
+    """
+
+    def get_name(self) -> str:
+        return 'parikh'
+
+    def is_satisfable(self, equation: eq.Equation, option: opt.Option) -> bool:
+        return decide(get_parikh_system(equation, option)) is not False
@@ -7,25 +7,25 @@ class PrefixSuffixHeuristics(h.Heurisitcs):
         return 'prefix-suffix'
 
     def is_satisfable(self, equation: eq.Equation, option: opt.Option) -> bool:
-        tpl_consts = equation.template.get_consts()
-        if len(tpl_consts) > len(equation.sample.elements):
+        tpl_ids = equation.template.ids
+        spl_ids = equation.sample.ids
+
+        tpl_consts = [el for el in tpl_ids if el > 0]
+        if len(tpl_consts) > len(spl_ids):
             return False
 
-        if len(tpl_consts) == len(equation.sample.elements):
-            for i, const in enumerate(tpl_consts):
-                if equation.sample.elements[i] != const:
-                    return False
+        if len(tpl_consts) == len(spl_ids):
+            return tpl_consts == spl_ids.tolist()
 
-            return True
+        prefix_len = 0
+        while prefix_len < len(tpl_ids) and tpl_ids[prefix_len] > 0:
+            prefix_len += 1
 
-        tpl_pref, tpl_suff = equation.template.get_consts_prefix_suffix()
-        for i, const in enumerate(tpl_pref):
-            if equation.sample.elements[i] != const:
-                return False
+        suffix_len = 0
+        while suffix_len < len(tpl_ids) - prefix_len and tpl_ids[len(tpl_ids) - suffix_len - 1] > 0:
+            suffix_len += 1
 
-        for i, const in enumerate(tpl_suff):
-            el = equation.sample.elements[-len(tpl_suff) + i]
-            if el != const:
-                return False
+        if tpl_ids[:prefix_len] != spl_ids[:prefix_len]:
+            return False
 
-        return True
+        return suffix_len == 0 or tpl_ids[len(tpl_ids) - suffix_len:] == spl_ids[len(spl_ids) - suffix_len:]
@@ -0,0 +1,128 @@
+import math
+from collections.abc import Iterator
+
+from recompression.heuristics import heuristics as h
+
+
+class HeuristicsScheduler:
+    """
+    Определяет, в каком порядке запускать эвристики. Без адаптивности эвристики запускаются
+    в заданном порядке. Адаптивный планировщик по статистике текущего поиска ставит первой эвристику
+    с наименьшим временем работы на одну отброшенную ветвь, а дорогие эвристики, которые на
+    некоторой глубине еще ни разу ничего не отбросили, на этой глубине запускает лишь изредка.
+    Пропуск эвристики не теряет решений, но оставляет в дереве ветви, которые она бы отбросила
+    """
+
+    def __init__(
+            self,
+            heuristics: list[h.Heurisitcs],
+            adaptive: bool = False,
+            reorder_period: int = 256,
+            min_depth_calls: int = 64,
+            probe_period: int = 16,
+            expensive_ratio: float = 10,
+    ):
+        """
+        :param heuristics: эвристики в исходном порядке
+        :param adaptive: менять порядок эвристик и пропускать бесполезные
+        :param reorder_period: через сколько проверок пересчитывается порядок эвристик
+        :param min_depth_calls: сколько раз эвристика должна ничего не отбросить на глубине, чтобы ее пропускать
+        :param probe_period: пропускаемая эвристика все равно запускается на каждой probe_period-ой проверке
+        :param expensive_ratio: во сколько раз эвристика должна быть медленнее самой быстрой, чтобы ее пропускать
+        """
+        self._initial = list(heuristics)
+        self._adaptive = adaptive
+        self._reorder_period = reorder_period
+        self._min_depth_calls = min_depth_calls
+        self._probe_period = probe_period
+        self._expensive_ratio = expensive_ratio
+        self.reset()
+
+    def reset(self):
+        self._heuristics = list(self._initial)
+        self._checks = 0
+        self._expensive: set[str] = set()
+        # суммарное время, число запусков и отброшенных ветвей каждой эвристики
+        self._total_time: dict[str, float] = {}
+        self._calls: dict[str, int] = {}
+        self._drops: dict[str, int] = {}
+        # запуски, отброшенные ветви и пропуски эвристик по глубинам
+        self._depth_calls: dict[tuple[str, int], int] = {}
+        self._depth_drops: dict[tuple[str, int], int] = {}
+        self._depth_skips: dict[tuple[str, int], int] = {}
+
+    @property
+    def heuristics(self) -> list[h.Heurisitcs]:
+        """
+        :return: эвристики в текущем порядке
+        """
+        return list(self._heuristics)
+
+    def get_heuristics(self, depth: int) -> Iterator[h.Heurisitcs]:
+        """
+        :param depth: глубина проверяемого узла
+        :return: эвристики, которые нужно запустить, в порядке запуска
+        """
+        if not self._adaptive:
+            yield from self._heuristics
+            return
+
+        self._checks += 1
+        if self._checks % self._reorder_period == 0:
+            self._reorder()
+
+        for heuristic in self._heuristics:
+            if not self._is_skipped(heuristic.get_name(), depth):
+                yield heuristic
+
+    def record(self, heuristic: h.Heurisitcs, depth: int, is_dropped: bool, elapsed: float):
+        """
+        Запоминает результат и время запуска эвристики на глубине depth
+        """
+        if not self._adaptive:
+            return
+
+        name = heuristic.get_name()
+        self._total_time[name] = self._total_time.get(name, 0) + elapsed
+        self._calls[name] = self._calls.get(name, 0) + 1
+        if is_dropped:
+            self._drops[name] = self._drops.get(name, 0) + 1
+
+        key = (name, depth)
+        self._depth_calls[key] = self._depth_calls.get(key, 0) + 1
+        if is_dropped:
+            self._depth_drops[key] = self._depth_drops.get(key, 0) + 1
+
+    def _reorder(self):
+        def cost_per_drop(heuristic: h.Heurisitcs) -> tuple[float, float]:
+            name = heuristic.get_name()
+            calls = self._calls.get(name, 0)
+            # еще не запускавшиеся эвристики ставятся первыми, чтобы собрать по ним статистику
+            if calls == 0:
+                return -1, 0
+
+            drops = self._drops.get(name, 0)
+            total_time = self._total_time[name]
+            return (total_time / drops if drops > 0 else math.inf), total_time / calls
+
+        self._heuristics.sort(key=cost_per_drop)
+
+        # среднее время считается только по запускавшимся эвристикам
+        costs = {name: self._total_time[name] / calls for name, calls in self._calls.items() if calls > 0}
+        if len(costs) == 0:
+            self._expensive = set()
+            return
+
+        cheapest = min(costs.values())
+        self._expensive = {name for name, cost in costs.items() if cost > cheapest * self._expensive_ratio}
+
+    def _is_skipped(self, name: str, depth: int) -> bool:
+        if name not in self._expensive:
+            return False
+
+        key = (name, depth)
+        if self._depth_calls.get(key, 0) < self._min_depth_calls or self._depth_drops.get(key, 0) > 0:
+            return False
+
+        self._depth_skips[key] = self._depth_skips.get(key, 0) + 1
+        return self._depth_skips[key] % self._probe_period != 0
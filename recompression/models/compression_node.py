@@ -1,15 +1,47 @@
-from dataclasses import dataclass
-
 from recompression.models import actions as ac, equation as eq, option as opt, const as c
 
+CompressionAction = tuple[ac.CompressBlockAction | ac.CompressPairAction, c.BlockConst | c.PairConst]
+
 
-@dataclass
 class CompressionNode:
-    id: int
-    equation: eq.Equation
-    option: opt.Option | None
-    compression_action: tuple[ac.CompressBlockAction | ac.CompressPairAction, c.BlockConst | c.PairConst] | None
-    children: list['CompressionNode']
+    """
+    Узел дерева сжатий. Узел хранит только то, чем он отличается от родителя: вариант раскрытия
+    переменных и действие сжатия с полученной константой. Уравнение узла хранится, пока узел нужен
+    поиску, после чего освобождается (release_equation) и восстанавливается по требованию
+    повторным применением вариантов и сжатий от ближайшего предка, у которого оно есть.
+
+    Если поддеревья без решений отбрасываются (см. Solver, solutions_only), узел помнит, сколько узлов
+    отброшено среди его потомков и на какую глубину ниже него они спускались
+    """
+    __slots__ = (
+        'id', 'parent', 'option', 'compression_action', 'children', 'is_solved', 'pruned_nodes', 'pruned_depth',
+        '_equation',
+    )
+
+    def __init__(
+            self,
+            id: int,
+            equation: eq.Equation | None,
+            option: opt.Option | None,
+            compression_action: CompressionAction | None,
+            children: list['CompressionNode'],
+            parent: 'CompressionNode | None' = None,
+            is_solved: bool | None = None,
+    ):
+        """
+        :param equation: уравнение узла, None - уравнение восстанавливается по родителю
+        :param parent: родитель, по уравнению которого восстанавливается уравнение узла
+        :param is_solved: решено ли уравнение узла, по умолчанию проверяется по equation
+        """
+        self.id = id
+        self.parent = parent
+        self.option = option
+        self.compression_action = compression_action
+        self.children = children
+        self.is_solved = is_solved if is_solved is not None else equation.is_solved
+        self.pruned_nodes = 0
+        self.pruned_depth = 0
+        self._equation = equation
 
     @staticmethod
     def empty(equation: eq.Equation) -> 'CompressionNode':
@@ -20,3 +52,86 @@ class CompressionNode:
             compression_action=None,
             children=[],
         )
+
+    @property
+    def equation(self) -> eq.Equation:
+        if self._equation is not None:
+            return self._equation
+
+        path = []
+        node = self
+        while node._equation is None:
+            if node.parent is None:
+                raise ValueError(f'Уравнение узла {self.id} нельзя восстановить: у него нет предка с уравнением')
+            path.append(node)
+            node = node.parent
+
+        equation = node._equation
+        for node in reversed(path):
+            equation = node.replay(equation)
+
+        return equation
+
+    def release_equation(self):
+        """
+        Освобождает уравнение узла, если его можно восстановить по предку
+        """
+        if self.parent is not None:
+            self._equation = None
+
+    def detach(self) -> 'CompressionNode':
+        """
+        :return: копия узла без детей и предка, хранящая свое уравнение
+        """
+        return CompressionNode(self.id, self.equation, self.option, self.compression_action, [])
+
+    def prune(self):
+        """
+        Отбрасывает детей, поддеревья которых построены и не содержат решений: у такого ребенка
+        не осталось детей после его собственного prune
+        """
+        children = []
+        for child in self.children:
+            if child.is_solved or len(child.children) > 0:
+                children.append(child)
+                continue
+
+            self.pruned_nodes += 1 + child.pruned_nodes
+            self.pruned_depth = max(self.pruned_depth, 1 + child.pruned_depth)
+
+        if len(children) < len(self.children):
+            self.children = children
+
+    def get_equation(self, parent_equation: eq.Equation) -> eq.Equation:
+        """
+        :param parent_equation: уравнение родителя, если оно уже известно
+        :return: уравнение узла, восстановленное по уравнению родителя, если узел его не хранит
+        """
+        return self._equation if self._equation is not None else self.replay(parent_equation)
+
+    def replay(self, parent_equation: eq.Equation) -> eq.Equation:
+        """
+        :param parent_equation: уравнение родителя
+        :return: уравнение узла, полученное применением его варианта и сжатия к уравнению родителя
+        """
+        equation = self.option.apply_to(parent_equation) if self.option is not None else parent_equation
+        if self.compression_action is None:
+            return equation
+
+        action, new_const = self.compression_action
+        if isinstance(action, ac.CompressPairAction):
+            return eq.Equation(
+                template=equation.template.with_replaced_pair(action.pair, new_const),
+                sample=equation.sample.with_replaced_pair(action.pair, new_const),
+            )
+
+        return eq.Equation(
+            template=equation.template.with_replaced_blocks(action.const, new_const),
+            sample=equation.sample.with_replaced_blocks(action.const, new_const),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f'CompressionNode(id={self.id!r}, equation={self.equation!r}, option={self.option!r}, '
+            f'compression_action={self.compression_action!r}, children={self.children!r})'
+        )
@@ -1,10 +1,11 @@
-import copy
 import itertools
+from array import array
+from collections import Counter
+from collections.abc import Iterable
 from dataclasses import dataclass
 from enum import Enum
 
-from recompression.models import const as c, substitution as s, var as v
-from utils.list import indexes
+from recompression.models import const as c, substitution as s, var as v, symbol_table as st
 
 
 class VarGroupType(Enum):
@@ -20,141 +21,203 @@ class VarGroupType(Enum):
 
 
 class Template:
-    elements: list[v.Var | c.Const]
+    """
+    Шаблон уравнения. Элементы хранятся в виде буфера идентификаторов таблицы символов,
+    экземпляр неизменяем и после создания не копируется
+    """
+    __slots__ = ('_ids', '_var_groups')
 
     def __init__(self, *elements: v.Var | c.Const):
-        self.elements = list(elements)
+        self._ids = st.get_ids(elements)
+        self._var_groups = None
+
+    @classmethod
+    def from_ids(cls, ids: array) -> 'Template':
+        tpl = cls.__new__(cls)
+        tpl._ids = ids
+        tpl._var_groups = None
+        return tpl
+
+    def __getstate__(self):
+        # идентификаторы локальны для процесса, поэтому сериализуются сами элементы
+        return {'elements': list(self.elements)}
+
+    def __setstate__(self, state: dict[str, list[v.Var | c.Const]]):
+        self._ids = st.get_ids(state['elements'])
+        self._var_groups = None
+
+    @property
+    def ids(self) -> array:
+        return self._ids
+
+    @property
+    def elements(self) -> st.ElementsView:
+        return st.ElementsView(self._ids)
 
     def __str__(self):
-        if len(self.elements) == 0:
+        if len(self._ids) == 0:
             return '<empty>'
         return ''.join(str(el) for el in self.elements)
 
     __repr__ = __str__
 
     def __eq__(self, other: 'Template'):
-        if len(self.elements) != len(other.elements):
-            return False
-
-        for i in range(len(self.elements)):
-            if self.elements[i] != other.elements[i]:
-                return False
-
-        return True
+        return self._ids == other._ids
 
     def get_vars_set(self) -> set[v.Var]:
         """
         :return: множество переменных выражения
         """
 
-        return set([var for var in self.elements if isinstance(var, v.Var)])
+        # элементы добавляются в порядке первого вхождения: порядок обхода множества идентификаторов зависит
+        # от их значений, а они в разных процессах разные
+        return {st.get_element(el) for el in dict.fromkeys(self._ids) if el < 0}
 
     def get_consts_set(self) -> set[c.AbstractConst]:
         """
         :return: множество констант выражения
         """
 
-        return set(self.get_consts())
+        return {st.get_element(el) for el in dict.fromkeys(self._ids) if el > 0}
 
     def get_consts(self) -> list[c.AbstractConst]:
-        return [const for const in self.elements if isinstance(const, c.AbstractConst)]
+        return [st.get_element(el) for el in self._ids if el > 0]
 
     def apply_substitution(self, subst: s.Substitution) -> 'Template':
-        elements_cpy = copy.deepcopy(self.elements)
+        return self.apply_substitutions([subst])
 
-        var_indexes = indexes(self.elements, subst.var)
-        if len(var_indexes) == 0:
-            return Template(*elements_cpy)
+    def apply_substitutions(self, substs: Iterable[s.Substitution]) -> 'Template':
+        """
+        Применяет подстановки к шаблону за один проход по его элементам.
+        Подстановки одной и той же переменной применяются в порядке их следования
 
-        elements_cpy = [el for el in elements_cpy if el != subst.var]
+        :param substs: подстановки
+        :return: новый экземпляр Template, либо self, если ни одна подстановка его не меняет
+        """
 
-        replacement = None
-        if isinstance(subst, s.PopLeft):
-            replacement = [subst.const, subst.var]
-        elif isinstance(subst, s.PopRight):
-            replacement = [subst.var, subst.const]
-        elif isinstance(subst, s.EmptySubstitution):
-            replacement = []
+        replacements: dict[int, list[int]] = {}
+        for subst in substs:
+            var_id = st.get_id(subst.var)
+            replacement = replacements.setdefault(var_id, [var_id])
+            if var_id not in replacement:
+                continue
 
-        for j, index in enumerate(var_indexes):
-            for i, replacer in enumerate(replacement):
-                elements_cpy.insert(j + index + i, replacer)
+            position = replacement.index(var_id)
+            if isinstance(subst, s.PopLeft):
+                replacement.insert(position, st.get_id(subst.const))
+            elif isinstance(subst, s.PopRight):
+                replacement.insert(position + 1, st.get_id(subst.const))
+            elif isinstance(subst, s.EmptySubstitution):
+                replacement.pop(position)
+            elif isinstance(subst, s.PopBlockLeft):
+                replacement[position:position] = [st.get_id(subst.const)] * subst.count
+            elif isinstance(subst, s.PopBlockRight):
+                replacement[position + 1:position + 1] = [st.get_id(subst.const)] * subst.count
+            elif isinstance(subst, s.BlockSubstitution):
+                replacement[position:position + 1] = [st.get_id(subst.const)] * subst.count
+
+        if not any(var_id in replacements for var_id in set(self._ids) if var_id < 0):
+            return self
+
+        result = array('i')
+        for el in self._ids:
+            replacement = replacements.get(el)
+            if replacement is None:
+                result.append(el)
+            else:
+                result.extend(replacement)
 
-        return Template(*elements_cpy)
+        return Template.from_ids(result)
 
     def get_var_groups(self) -> list[tuple[VarGroupType, int, int]]:
-        result = []
-        current_group = []
-        for i, el in enumerate(self.elements):
-            if isinstance(el, v.Var):
-                current_group.append(el)
-                continue
+        """
+        :return: максимальные группы подряд идущих переменных и их подгруппы по типам в виде
+            (тип, индекс начала, длина). Шаблон неизменяем, поэтому группы вычисляются один раз
+        """
+        if self._var_groups is None:
+            result = []
+            group_start = 0
+            for i in range(len(self._ids) + 1):
+                if i < len(self._ids) and self._ids[i] < 0:
+                    continue
 
-            for (t, start, end) in self._get_max_var_subgroups_by_types(current_group):
-                subgroup = current_group[start:end]
-                result.append(
-                    (t, i - len(current_group) + start, len(subgroup)),
-                )
+                group = self._ids[group_start:i]
+                for (t, start, end) in self._get_max_var_subgroups_by_types(group):
+                    result.append((t, group_start + start, len(group) - start - (-end if end is not None else 0)))
 
-            current_group = []
+                group_start = i + 1
 
-        for (t, start, end) in self._get_max_var_subgroups_by_types(current_group):
-            subgroup = current_group[start:end]
-            result.append(
-                (t, len(self.elements) - len(current_group) + start, len(subgroup)),
-            )
+            self._var_groups = result
 
-        return result
+        return list(self._var_groups)
 
     @staticmethod
-    def _get_max_var_subgroups_by_types(group: list[v.Var]) -> list[tuple[VarGroupType, int, int | None]]:
-        ts = []
-        if len(group) > 0:
-            ts.append((VarGroupType.GENERIC, 0, None))
-
-        for i in range(len(group)):
-            g = group[i:]
-            if len(g) > 1 and g[0] not in g[1:]:
+    def _get_max_var_subgroups_by_types(group) -> list[tuple[VarGroupType, int, int | None]]:
+        """
+        Подгруппы группы переменных g в виде (тип, начало, конец среза или None):
+            - GENERIC - вся группа;
+            - LEFT - самый длинный суффикс g[i:] длины > 1, в котором первая переменная больше не встречается;
+            - RIGHT - самый длинный префикс длины > 1, в котором последняя переменная больше не встречается;
+            - LEFT_RIGHT - самые длинные суффикс, префикс и срез g[i:-i] длины > 2, в которых первая и последняя
+              переменные больше не встречаются, либо совпадают и не встречаются между ними.
+
+        Вместо перебора срезов используются индексы соседних вхождений той же переменной,
+        поэтому время работы линейно по длине группы
+        """
+        n = len(group)
+        if n == 0:
+            return []
+
+        # индексы предыдущего и следующего вхождения той же переменной, -1 и n - если их нет
+        prev_index = [-1] * n
+        next_index = [n] * n
+        last_seen = {}
+        for i, el in enumerate(group):
+            j = last_seen.get(el)
+            if j is not None:
+                prev_index[i] = j
+                next_index[j] = i
+            last_seen[el] = i
+
+        def is_left_right(i: int, e: int) -> bool:
+            """
+            :return: подходит ли срез g[i:e + 1] под тип LEFT_RIGHT
+            """
+            if e - i + 1 <= 2:
+                return False
+            if group[i] == group[e]:
+                return next_index[i] == e
+
+            return next_index[i] > e and prev_index[e] < i
+
+        ts = [(VarGroupType.GENERIC, 0, None)]
+
+        for i in range(n - 1):
+            if next_index[i] == n:
                 ts.append((VarGroupType.LEFT, i, None))
                 break
 
-        for i in range(len(group)):
-            i_end = -i if i > 0 else None
-            g = group[:i_end]
-            if len(g) > 1 and g[-1] not in g[:-1]:
-                ts.append((VarGroupType.RIGHT, 0, i_end))
+        for p in range(n - 1, 0, -1):
+            if prev_index[p] == -1:
+                ts.append((VarGroupType.RIGHT, 0, p + 1 - n if p < n - 1 else None))
                 break
 
-        for i in range(len(group)):
-            g = group[i:]
-            if len(g) > 2 and g[0] == g[-1] and g[0] not in g[1:-1]:
-                ts.append((VarGroupType.LEFT_RIGHT, i, None))
-                break
-            if len(g) > 2 and g[0] != g[-1] and g[0] not in g[1:] and g[-1] not in g[:-1]:
+        for i in range(n):
+            if is_left_right(i, n - 1):
                 ts.append((VarGroupType.LEFT_RIGHT, i, None))
                 break
 
-        for i in range(len(group)):
-            i_end = -i if i > 0 else None
-            g = group[:i_end]
-            if len(g) > 2 and g[0] == g[-1] and g[0] not in g[1:-1]:
-                ts.append((VarGroupType.LEFT_RIGHT, 0, i_end))
-                break
-            if len(g) > 2 and g[0] != g[-1] and g[0] not in g[1:] and g[-1] not in g[:-1]:
-                ts.append((VarGroupType.LEFT_RIGHT, 0, i_end))
+        for e in range(n - 1, -1, -1):
+            if is_left_right(0, e):
+                ts.append((VarGroupType.LEFT_RIGHT, 0, e + 1 - n if e < n - 1 else None))
                 break
 
-        for i in range(len(group)):
-            i_end = -i if i > 0 else None
-            g = group[i:i_end]
-            if len(g) > 2 and g[0] == g[-1] and g[0] not in g[1:-1]:
-                ts.append((VarGroupType.LEFT_RIGHT, i, i_end))
-                break
-            if len(g) > 2 and g[0] != g[-1] and g[0] not in g[1:] and g[-1] not in g[:-1]:
-                ts.append((VarGroupType.LEFT_RIGHT, i, i_end))
+        for i in range(n):
+            if is_left_right(i, n - 1 - i):
+                ts.append((VarGroupType.LEFT_RIGHT, i, -i if i > 0 else None))
                 break
 
-        return list(set(ts))
+        return list(dict.fromkeys(ts))
 
     def with_replaced_pair(self, pair: c.Pair, const: c.Const) -> 'Template':
         """
@@ -165,27 +228,29 @@ class Template:
         :return: новый экзепляр Template с замененной парой
         """
 
-        compressed_elements = []
+        return Template.from_ids(_replace_pair(self._ids, pair, const)[0])
 
-        i = 0
-        while i < len(self.elements):
-            if i < len(self.elements) - 1 and (self.elements[i], self.elements[i + 1]) == pair:
-                compressed_elements.append(const)
-                i += 2
-            else:
-                compressed_elements.append(self.elements[i])
-                i += 1
+    def with_replaced_blocks(self, const: c.Const, block_const: c.BlockConst) -> 'Template':
+        """
+        Создает новый экземпляр Template, в котором каждый максимальный блок из n >= 2 констант const
+        заменен на константу block_const со степенью сжатия n
 
-        return Template(*compressed_elements)
+        :param const: константа, блоки которой сжимаются
+        :param block_const: константа блока без степени сжатия
+        :return: новый экзепляр Template со сжатыми блоками
+        """
+
+        return Template.from_ids(_replace_blocks(self._ids, const, block_const)[0])
 
     def get_consts_prefix_suffix(self) -> tuple[list[v.Var | c.Const], list[v.Var | c.Const]]:
+        ids = self._ids
+
         prefix_len = 0
-        while prefix_len < len(self.elements) and not isinstance(self.elements[prefix_len], v.Var):
+        while prefix_len < len(ids) and ids[prefix_len] > 0:
             prefix_len += 1
 
         suffix_len = 0
-        while suffix_len < len(self.elements) - prefix_len and not isinstance(
-                self.elements[len(self.elements) - suffix_len - 1], v.Var):
+        while suffix_len < len(ids) - prefix_len and ids[len(ids) - suffix_len - 1] > 0:
             suffix_len += 1
 
         return self.elements[:prefix_len], self.elements[len(self.elements) - suffix_len:]
@@ -197,10 +262,13 @@ class Template:
         :param pair: - пара
         :return: int - число вхождений пары в выражение
         """
+        a_id, b_id = st.get_id(pair[0]), st.get_id(pair[1])
+        ids = self._ids
+
         count = 0
 
-        for i in range(len(self.elements) - 1):
-            if self.elements[i] == pair[0] and self.elements[i + 1] == pair[1]:
+        for i in range(len(ids) - 1):
+            if ids[i] == a_id and ids[i + 1] == b_id:
                 count += 1
 
         return count
@@ -213,72 +281,195 @@ class SampleBlock:
     count: int
 
 
+class _SampleIndex:
+    """
+    Числа вхождений пар различных соседних констант и максимальных блоков длины >= 2 в образце.
+    При сжатии образца индекс пересчитывается только в окрестностях замененных элементов
+    """
+    __slots__ = ('pairs', 'blocks')
+
+    def __init__(self, pairs: dict[tuple[int, int], int], blocks: dict[tuple[int, int], int]):
+        self.pairs = pairs
+        self.blocks = blocks
+
+    @classmethod
+    def build(cls, ids: array) -> '_SampleIndex':
+        return cls(
+            dict(Counter(pair for pair in zip(ids, ids[1:]) if pair[0] != pair[1])),
+            dict(Counter(run for run in ((el, len(list(g))) for el, g in itertools.groupby(ids)) if run[1] >= 2)),
+        )
+
+    def updated(
+            self,
+            old_ids: array,
+            old_positions: list[int],
+            new_ids: array,
+            new_positions: list[int],
+    ) -> '_SampleIndex':
+        """
+        Пары и блоки, не касающиеся измененных элементов, при сжатии не меняются, поэтому достаточно
+        вычесть пары и блоки вокруг замененных элементов старого образца и добавить вокруг новых
+
+        :param old_ids: элементы старого образца
+        :param old_positions: индексы замененных элементов старого образца
+        :param new_ids: элементы нового образца
+        :param new_positions: индексы новых элементов нового образца
+        :return: индекс нового образца
+        """
+        pairs = dict(self.pairs)
+        blocks = dict(self.blocks)
+
+        for counts, items, delta in (
+                (pairs, _get_pairs_around(old_ids, old_positions), -1),
+                (pairs, _get_pairs_around(new_ids, new_positions), 1),
+                (blocks, _get_blocks_around(old_ids, old_positions), -1),
+                (blocks, _get_blocks_around(new_ids, new_positions), 1),
+        ):
+            for item in items:
+                count = counts.get(item, 0) + delta
+                if count == 0:
+                    del counts[item]
+                else:
+                    counts[item] = count
+
+        return _SampleIndex(pairs, blocks)
+
+
+def _get_pairs_around(ids: array, positions: list[int]) -> Iterable[tuple[int, int]]:
+    """
+    :return: пары различных констант, в которые входит хотя бы один элемент с индексом из positions
+    """
+    starts = sorted({start for p in positions for start in (p - 1, p) if 0 <= start < len(ids) - 1})
+    return ((ids[i], ids[i + 1]) for i in starts if ids[i] != ids[i + 1])
+
+
+def _get_blocks_around(ids: array, positions: list[int]) -> Iterable[tuple[int, int]]:
+    """
+    :return: максимальные блоки длины >= 2, в которые входит элемент с индексом из positions или соседний с ним
+    """
+    end = -1
+    for i in sorted({i for p in positions for i in (p - 1, p, p + 1) if 0 <= i < len(ids)}):
+        if i <= end:
+            continue
+
+        start = i
+        while start > 0 and ids[start - 1] == ids[i]:
+            start -= 1
+        end = i
+        while end < len(ids) - 1 and ids[end + 1] == ids[i]:
+            end += 1
+
+        if end - start + 1 >= 2:
+            yield ids[i], end - start + 1
+
+
 class Sample:
-    elements: list[c.Const]
+    """
+    Образец уравнения. Как и Template, хранит неизменяемый буфер идентификаторов таблицы символов.
+    Индекс пар и блоков строится при первом обращении и передается сжатым образцам
+    """
+    __slots__ = ('_ids', '_index')
 
     def __init__(self, *elements: c.Const):
-        self.elements = list(elements)
+        self._ids = st.get_ids(elements)
+        self._index = None
+
+    @classmethod
+    def from_ids(cls, ids: array) -> 'Sample':
+        spl = cls.__new__(cls)
+        spl._ids = ids
+        spl._index = None
+        return spl
+
+    def __getstate__(self):
+        # идентификаторы локальны для процесса, поэтому сериализуются сами элементы
+        return {'elements': list(self.elements)}
+
+    def __setstate__(self, state: dict[str, list[c.Const]]):
+        self._ids = st.get_ids(state['elements'])
+        self._index = None
+
+    @property
+    def ids(self) -> array:
+        return self._ids
+
+    def _get_index(self) -> _SampleIndex:
+        if self._index is None:
+            self._index = _SampleIndex.build(self._ids)
+
+        return self._index
+
+    @property
+    def elements(self) -> st.ElementsView:
+        return st.ElementsView(self._ids)
 
     def __str__(self):
-        if len(self.elements) == 0:
+        if len(self._ids) == 0:
             return '<empty>'
         return ''.join(str(el) for el in self.elements)
 
     __repr__ = __str__
 
-    def __eq__(self, other: 'Template'):
-        if len(self.elements) != len(other.elements):
-            return False
+    def __eq__(self, other: 'Sample'):
+        return self._ids == other._ids
 
-        for i in range(len(self.elements)):
-            if self.elements[i] != other.elements[i]:
-                return False
+    def get_pairs(self) -> dict[c.Pair, int]:
+        """
+        :return: числа вхождений пар различных соседних констант, порядок пар не определен
+        """
+        return {(st.get_element(a), st.get_element(b)): count for (a, b), count in self._get_index().pairs.items()}
 
-        return True
+    def get_pair_index(self, pair: c.Pair) -> int:
+        """
+        :return: индекс первого вхождения пары pair, либо -1, если пара не входит в образец
+        """
+        a_id, b_id = st.get_id(pair[0]), st.get_id(pair[1])
+        ids = self._ids
 
-    def get_pairs(self) -> dict[c.Pair, int]:
-        pairs = {}
-        for i in range(len(self.elements) - 1):
-            a, b = self.elements[i], self.elements[i + 1]
-            if a != b:
-                pair = (a, b)
-                if pair not in pairs:
-                    pairs[pair] = 1
-                else:
-                    pairs[pair] += 1
+        i = _find(ids, a_id, 0)
+        while i != -1 and (i == len(ids) - 1 or ids[i + 1] != b_id):
+            i = _find(ids, a_id, i + 1)
 
-        return pairs
+        return i
 
-    def get_blocks(self) -> list[tuple[SampleBlock, list[int]]]:
-        blocks = {}  # {(const, len): count}
-        blocks_indexes = {}  # {(const, len): [index, index]}
-        i = 0
-        for const, g in itertools.groupby(self.elements):
-            block_len = len(list(g))
-            if block_len < 2:
-                i += block_len
-                continue
+    def get_block_counts(self) -> list[SampleBlock]:
+        """
+        :return: максимальные блоки длины >= 2 по константам и длинам, порядок блоков не определен
+        """
+        return [
+            SampleBlock(const=st.get_element(const_id), len=block_len, count=count)
+            for (const_id, block_len), count in self._get_index().blocks.items()
+        ]
 
-            key = (const, block_len)
-            if key not in blocks:
-                blocks[key] = 1
-                blocks_indexes[key] = [i]
-            else:
-                blocks[key] += 1
-                blocks_indexes[key].append(i)
+    def get_block_indexes(self, const: c.Const, block_len: int) -> list[int]:
+        """
+        :return: индексы начал максимальных блоков константы const длины block_len
+        """
+        const_id = st.get_id(const)
+        ids = self._ids
 
-            i += block_len
+        indexes = []
+        i = _find(ids, const_id, 0)
+        while i != -1:
+            end = i
+            while end < len(ids) and ids[end] == const_id:
+                end += 1
+            if end - i == block_len:
+                indexes.append(i)
+            i = _find(ids, const_id, end)
 
-        result = []
-        for key, count in blocks.items():
-            result.append(
-                (SampleBlock(const=key[0], len=key[1], count=count), blocks_indexes[key]),
-            )
+        return indexes
 
-        return result
+    def get_blocks(self) -> list[tuple[SampleBlock, list[int]]]:
+        """
+        :return: максимальные блоки длины >= 2 и индексы их начал в порядке первого вхождения
+        """
+        result = [(block, self.get_block_indexes(block.const, block.len)) for block in self.get_block_counts()]
+
+        return sorted(result, key=lambda item: item[1][0])
 
     def get_consts_set(self) -> set[c.AbstractConst]:
-        return set(self.elements)
+        return {st.get_element(el) for el in set(self._ids)}
 
     def with_replaced_pair(self, pair: c.Pair, const: c.Const) -> 'Sample':
         """
@@ -289,18 +480,105 @@ class Sample:
         :return: новый экзепляр Sample с замененной парой
         """
 
-        compressed_elements = []
+        return self._compressed(*_replace_pair(self._ids, pair, const))
 
-        i = 0
-        while i < len(self.elements):
-            if i < len(self.elements) - 1 and (self.elements[i], self.elements[i + 1]) == pair:
-                compressed_elements.append(const)
-                i += 2
-            else:
-                compressed_elements.append(self.elements[i])
-                i += 1
+    def with_replaced_blocks(self, const: c.Const, block_const: c.BlockConst) -> 'Sample':
+        """
+        Создает новый экземпляр Sample, в котором каждый максимальный блок из n >= 2 констант const
+        заменен на константу block_const со степенью сжатия n
+
+        :param const: константа, блоки которой сжимаются
+        :param block_const: константа блока без степени сжатия
+        :return: новый экзепляр Sample со сжатыми блоками
+        """
 
-        return Sample(*compressed_elements)
+        return self._compressed(*_replace_blocks(self._ids, const, block_const))
+
+    def _compressed(self, ids: array, old_positions: list[int], new_positions: list[int]) -> 'Sample':
+        spl = Sample.from_ids(ids)
+        if self._index is not None:
+            spl._index = self._index.updated(self._ids, old_positions, ids, new_positions)
+
+        return spl
+
+    def get_block_lengths(self, const: c.Const) -> list[int]:
+        """
+        :return: длины максимальных блоков константы const, в том числе блоков длины 1
+        """
+        const_id = st.get_id(const)
+        return [len(list(g)) for el, g in itertools.groupby(self._ids) if el == const_id]
+
+
+def _find(ids: array, el: int, start: int) -> int:
+    """
+    :return: индекс первого вхождения el, начиная с start, либо -1
+    """
+    try:
+        return ids.index(el, start)
+    except ValueError:
+        return -1
+
+
+def _replace_pair(ids: array, pair: c.Pair, const: c.Const) -> tuple[array, list[int], list[int]]:
+    """
+    Вхождения пары ищутся поиском первого элемента пары, а участки между ними копируются целиком
+
+    :return: элементы со сжатой парой, индексы замененных элементов и индексы новых констант
+    """
+    a_id, b_id = st.get_id(pair[0]), st.get_id(pair[1])
+    const_id = st.get_id(const)
+
+    compressed = array('i')
+    old_positions = []
+    new_positions = []
+
+    copied = 0
+    i = _find(ids, a_id, 0)
+    while i != -1:
+        if i < len(ids) - 1 and ids[i + 1] == b_id:
+            compressed.extend(ids[copied:i])
+            new_positions.append(len(compressed))
+            compressed.append(const_id)
+            old_positions.extend((i, i + 1))
+            copied = i + 2
+            i = _find(ids, a_id, i + 2)
+        else:
+            i = _find(ids, a_id, i + 1)
+
+    compressed.extend(ids[copied:])
+
+    return compressed, old_positions, new_positions
+
+
+def _replace_blocks(ids: array, const: c.Const, block_const: c.BlockConst) -> tuple[array, list[int], list[int]]:
+    """
+    :return: элементы со сжатыми блоками, индексы замененных элементов и индексы новых констант
+    """
+    const_id = st.get_id(const)
+
+    compressed = array('i')
+    old_positions = []
+    new_positions = []
+
+    copied = 0
+    i = _find(ids, const_id, 0)
+    while i != -1:
+        end = i
+        while end < len(ids) and ids[end] == const_id:
+            end += 1
+
+        if end - i >= 2:
+            compressed.extend(ids[copied:i])
+            new_positions.append(len(compressed))
+            compressed.append(st.get_id(c.BlockConst(block_const.sym, block_const.version, end - i)))
+            old_positions.extend(range(i, end))
+            copied = end
+
+        i = _find(ids, const_id, end)
+
+    compressed.extend(ids[copied:])
+
+    return compressed, old_positions, new_positions
 
 
 @dataclass(frozen=True)
@@ -310,17 +588,11 @@ class Equation:
 
     @property
     def is_solved(self) -> bool:
-        if len(self.template.elements) == 1 and isinstance(self.template.elements[0], v.Var):
+        tpl_ids = self.template.ids
+        if len(tpl_ids) == 1 and tpl_ids[0] < 0:
             return True
 
-        if len(self.sample.elements) != len(self.template.elements):
-            return False
-
-        for i, el in enumerate(self.sample.elements):
-            if el != self.template.elements[i]:
-                return False
-
-        return True
+        return tpl_ids == self.sample.ids
 
     def __eq__(self, other) -> bool:
         if not isinstance(other, Equation):
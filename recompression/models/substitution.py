@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 
 from recompression.models import const, var
-from utils.symbols import EPSILON
+from utils.symbols import EPSILON, number_to_power_mapping
 
 
 @dataclass(frozen=True)
@@ -36,4 +36,53 @@ class EmptySubstitution:
     __repr__ = __str__
 
 
-Substitution = PopLeft | PopLeft | EmptySubstitution
+def _power(const_: const.Const, count: int) -> str:
+    return f'{const_}' + ''.join([number_to_power_mapping[char] for char in str(count)])
+
+
+@dataclass(frozen=True)
+class PopBlockLeft:
+    """
+    Переменная начинается с блока из count констант const: X=a^count X
+    """
+    var: var.Var
+    const: const.Const
+    count: int
+
+    def __str__(self):
+        return f'{self.var}={_power(self.const, self.count)}{self.var}'
+
+    __repr__ = __str__
+
+
+@dataclass(frozen=True)
+class PopBlockRight:
+    """
+    Переменная заканчивается блоком из count констант const: X=X a^count
+    """
+    var: var.Var
+    const: const.Const
+    count: int
+
+    def __str__(self):
+        return f'{self.var}={self.var}{_power(self.const, self.count)}'
+
+    __repr__ = __str__
+
+
+@dataclass(frozen=True)
+class BlockSubstitution:
+    """
+    Переменная целиком состоит из блока count констант const: X=a^count
+    """
+    var: var.Var
+    const: const.Const
+    count: int
+
+    def __str__(self):
+        return f'{self.var}={_power(self.const, self.count)}'
+
+    __repr__ = __str__
+
+
+Substitution = PopLeft | PopRight | EmptySubstitution | PopBlockLeft | PopBlockRight | BlockSubstitution
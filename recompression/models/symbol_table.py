@@ -0,0 +1,111 @@
+from array import array
+from collections.abc import Iterable, Sequence
+
+from recompression.models import const as c, var as v
+
+
+class SymbolTable:
+    """
+    Таблица символов: сопоставляет каждой константе положительный целочисленный идентификатор,
+    а каждой переменной - отрицательный. Равные элементы всегда получают один и тот же идентификатор,
+    поэтому сравнение элементов сводится к сравнению чисел, а проверка "является ли элемент переменной"
+    - к проверке знака
+    """
+
+    def __init__(self):
+        self._ids: dict[v.Var | c.Const, int] = {}
+        self._consts: list[c.Const | None] = [None]
+        self._vars: list[v.Var | None] = [None]
+
+    def get_id(self, element: v.Var | c.Const) -> int:
+        element_id = self._ids.get(element)
+        if element_id is not None:
+            return element_id
+
+        if isinstance(element, v.Var):
+            element_id = -len(self._vars)
+            self._vars.append(element)
+        else:
+            element_id = len(self._consts)
+            self._consts.append(element)
+
+        self._ids[element] = element_id
+
+        return element_id
+
+    def reset(self):
+        """
+        Забывает все элементы: буферы идентификаторов, полученные до сброса, становятся недействительными
+        """
+        self._ids = {}
+        self._consts = [None]
+        self._vars = [None]
+
+    def find_id(self, element: v.Var | c.Const) -> int | None:
+        return self._ids.get(element)
+
+    def get_ids(self, elements: Iterable[v.Var | c.Const]) -> array:
+        return array('i', [self.get_id(el) for el in elements])
+
+    def get_element(self, element_id: int) -> v.Var | c.Const:
+        if element_id > 0:
+            return self._consts[element_id]
+
+        return self._vars[-element_id]
+
+
+table = SymbolTable()
+
+
+def get_id(element: v.Var | c.Const) -> int:
+    return table.get_id(element)
+
+
+def get_ids(elements: Iterable[v.Var | c.Const]) -> array:
+    return table.get_ids(elements)
+
+
+def get_element(element_id: int) -> v.Var | c.Const:
+    return table.get_element(element_id)
+
+
+def reset():
+    table.reset()
+
+
+class ElementsView(Sequence):
+    """
+    Представление буфера идентификаторов в виде последовательности переменных и констант.
+    Объекты извлекаются из таблицы символов только при обращении к ним
+    """
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids: array):
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [table.get_element(element_id) for element_id in self._ids[index]]
+
+        return table.get_element(self._ids[index])
+
+    def __iter__(self):
+        return map(table.get_element, self._ids)
+
+    def __contains__(self, element) -> bool:
+        element_id = table.find_id(element)
+        return element_id is not None and element_id in self._ids
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ElementsView):
+            return self._ids == other._ids
+
+        return list(self) == other
+
+    def __str__(self):
+        return str(list(self))
+
+    __repr__ = __str__
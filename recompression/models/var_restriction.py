@@ -1,3 +1,5 @@
+import functools
+import operator
 import typing
 from dataclasses import dataclass
 
@@ -32,7 +34,10 @@ class VarNotStartsWith:
     const: const.Const
 
     def is_substitution_satisfies(self, subst: substitution.Substitution) -> bool:
-        return not isinstance(subst, substitution.PopLeft) or subst.var != self.var or subst.const != self.const
+        return not isinstance(
+            subst,
+            (substitution.PopLeft, substitution.PopBlockLeft, substitution.BlockSubstitution),
+        ) or subst.var != self.var or subst.const != self.const
 
     def __str__(self):
         return f'{self.var}≠{self.const}{self.var}'
@@ -49,7 +54,10 @@ class VarNotEndsWith:
     const: const.Const
 
     def is_substitution_satisfies(self, subst: substitution.Substitution) -> bool:
-        return not isinstance(subst, substitution.PopRight) or subst.var != self.var or subst.const != self.const
+        return not isinstance(
+            subst,
+            (substitution.PopRight, substitution.PopBlockRight, substitution.BlockSubstitution),
+        ) or subst.var != self.var or subst.const != self.const
 
     def __str__(self):
         return f'{self.var}≠{self.var}{self.const}'
@@ -105,7 +113,7 @@ class RestrictionAND:
         ) and restriction_or_satisfies
 
     def simplify(self) -> typing.Optional[typing.Union[Restriction, 'RestrictionAND', RestrictionOR]]:
-        simple_restrs = list(set(self.simple_restrictions))
+        simple_restrs = list(dict.fromkeys(self.simple_restrictions))
 
         if self.restriction_or is None:
             if len(simple_restrs) == 0:
@@ -143,6 +151,185 @@ class RestrictionAND:
     __repr__ = __str__
 
 
+# Битовые маски простых ограничений: каждое встреченное простое ограничение получает свой бит.
+# Как и идентификаторы таблицы символов, маски локальны для процесса и не сериализуются
+_atom_masks: dict[Restriction, int] = {}
+_atoms: list[Restriction] = []
+# маски всех ограничений VarNotStartsWith и VarNotEndsWith каждой переменной
+_starts_masks: dict[var.Var, int] = {}
+_ends_masks: dict[var.Var, int] = {}
+
+
+def get_atom_mask(atom: Restriction) -> int:
+    mask = _atom_masks.get(atom)
+    if mask is None:
+        mask = 1 << len(_atoms)
+        _atom_masks[atom] = mask
+        _atoms.append(atom)
+        if isinstance(atom, VarNotStartsWith):
+            _starts_masks[atom.var] = _starts_masks.get(atom.var, 0) | mask
+        elif isinstance(atom, VarNotEndsWith):
+            _ends_masks[atom.var] = _ends_masks.get(atom.var, 0) | mask
+
+    return mask
+
+
+def reset():
+    """
+    Забывает биты простых ограничений и кеши масок. Биты выдаются по порядку, поэтому без сброса маски
+    удлиняются с каждым новым ограничением. Маски, полученные до сброса (в том числе сохраненные
+    в вариантах), становятся недействительными
+    """
+    _atom_masks.clear()
+    _atoms.clear()
+    _starts_masks.clear()
+    _ends_masks.clear()
+    _get_substitution_masks.cache_clear()
+    _to_restriction.cache_clear()
+
+
+def _get_atoms(mask: int) -> list[Restriction]:
+    atoms = []
+    while mask:
+        low = mask & -mask
+        atoms.append(_atoms[low.bit_length() - 1])
+        mask ^= low
+
+    return atoms
+
+
+@functools.lru_cache(maxsize=None)
+def _get_substitution_masks(subst: substitution.Substitution) -> tuple[int, int]:
+    """
+    :return: маска простых ограничений, которые подстановка нарушает, и маска тех, которые она заведомо выполняет
+    """
+    violated = []
+    if isinstance(subst, substitution.EmptySubstitution):
+        violated.append(VarNotEmpty(subst.var))
+    if isinstance(subst, (substitution.PopLeft, substitution.PopBlockLeft, substitution.BlockSubstitution)):
+        violated.append(VarNotStartsWith(subst.var, subst.const))
+    if isinstance(subst, (substitution.PopRight, substitution.PopBlockRight, substitution.BlockSubstitution)):
+        violated.append(VarNotEndsWith(subst.var, subst.const))
+
+    satisfied = 0
+    if isinstance(subst, (substitution.PopLeft, substitution.PopRight)):
+        satisfied = get_atom_mask(VarNotEmpty(subst.var))
+
+    return functools.reduce(operator.or_, map(get_atom_mask, violated), 0), satisfied
+
+
+def get_substitutions_masks(substs: typing.Iterable[substitution.Substitution]) -> tuple[int, int]:
+    """
+    Если X=bX, то X начинается с b и выполняет X≠cX для любой другой константы c (X=Xb - симметрично).
+    Такие ограничения могут получить биты позже, чем подстановка, поэтому их маска не кешируется
+
+    :return: маска простых ограничений, которые подстановки нарушают, и маска тех, которые они заведомо выполняют
+    """
+    violated = 0
+    satisfied = 0
+    for subst in substs:
+        subst_violated, subst_satisfied = _get_substitution_masks(subst)
+        violated |= subst_violated
+        satisfied |= subst_satisfied
+        if isinstance(subst, substitution.PopLeft):
+            satisfied |= _starts_masks.get(subst.var, 0) & ~subst_violated
+        elif isinstance(subst, substitution.PopRight):
+            satisfied |= _ends_masks.get(subst.var, 0) & ~subst_violated
+
+    return violated, satisfied
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _to_restriction(
+        simple_mask: int,
+        alternatives: tuple[int, int] | None,
+) -> 'RestrictionAND | RestrictionOR | Restriction | None':
+    simple = _get_atoms(simple_mask)
+    restriction_or = None
+    if alternatives is not None:
+        restriction_or = RestrictionOR(*(_atoms[mask.bit_length() - 1] for mask in alternatives))
+
+    if len(simple) == 0:
+        return restriction_or
+    if len(simple) == 1 and restriction_or is None:
+        return simple[0]
+
+    return RestrictionAND(simple, restriction_or)
+
+
+@dataclass(frozen=True)
+class RestrictionMask:
+    """
+    Ограничение в виде битовых масок: конъюнкция простых ограничений simple и, возможно,
+    дизъюнкция двух простых ограничений alternatives. Объединение ограничений - это побитовое ИЛИ,
+    а проверка подстановок - пересечение с масками нарушаемых ими ограничений
+    """
+    simple: int
+    alternatives: tuple[int, int] | None
+
+    @classmethod
+    def from_restriction(cls, restriction: 'RestrictionAND | RestrictionOR | Restriction | None') -> 'RestrictionMask':
+        if restriction is None:
+            return cls(0, None)
+        if isinstance(restriction, RestrictionOR):
+            return cls(0, (get_atom_mask(restriction.left), get_atom_mask(restriction.right)))
+        if isinstance(restriction, RestrictionAND):
+            alternatives = None
+            if restriction.restriction_or is not None:
+                alternatives = cls.from_restriction(restriction.restriction_or).alternatives
+
+            return cls(functools.reduce(operator.or_, map(get_atom_mask, restriction.simple_restrictions), 0),
+                       alternatives)
+
+        return cls(get_atom_mask(restriction), None)
+
+    def to_restriction(self) -> 'RestrictionAND | RestrictionOR | Restriction | None':
+        """
+        :return: ограничение из простых ограничений в порядке их битов. Ограничения неизменяемы,
+            поэтому одинаковые маски разделяют один экземпляр
+        """
+        return _to_restriction(self.simple, self.alternatives)
+
+    def combine(self, other: 'RestrictionMask') -> list['RestrictionMask']:
+        """
+        :return: конъюнкция ограничений в виде списка вариантов: две дизъюнкции раскрываются в четыре варианта
+        """
+        simple = self.simple | other.simple
+        if self.alternatives is None or other.alternatives is None:
+            return [RestrictionMask(simple, self.alternatives or other.alternatives)]
+
+        return [
+            RestrictionMask(simple | left | right, None)
+            for left in self.alternatives for right in other.alternatives
+        ]
+
+    def apply(self, violated: int, satisfied: int) -> typing.Optional['RestrictionMask']:
+        """
+        Убирает из ограничения условия, которые подстановки выполняют, и разрешает дизъюнкцию,
+        если подстановки нарушают одну из ее сторон
+
+        :param violated: маска ограничений, которые подстановки нарушают (см. get_substitutions_masks)
+        :param satisfied: маска ограничений, которые подстановки заведомо выполняют
+        :return: упрощенное ограничение, либо None, если подстановки ему противоречат
+        """
+        simple = self.simple & ~satisfied
+        if simple & violated:
+            return None
+
+        alternatives = self.alternatives
+        if alternatives is not None:
+            left, right = alternatives
+            if (left | right) & (simple | satisfied):
+                alternatives = None
+            elif left & violated and right & violated:
+                return None
+            elif left & violated or right & violated:
+                simple |= right if left & violated else left
+                alternatives = None
+
+        return RestrictionMask(simple, alternatives)
+
+
 def display():
     x = var.Var('X')
     y = var.Var('Y')
@@ -0,0 +1,158 @@
+from collections.abc import Iterator
+from typing import TextIO
+
+from recompression.models import compression_node as cn, option as opt, actions as ac, const as c, equation as eq
+
+_NODE_ATTRS = 'shape=box'
+_SOLUTION_ATTRS = 'color=lightgreen fillcolor=lightgreen style=filled shape=box'
+_FAILED_ATTRS = 'color=red shape=box'
+_COLLAPSED_ATTRS = 'color=red shape=ellipse'
+_HIDDEN_ATTRS = 'color=gray shape=ellipse'
+
+
+class DotWriter:
+    """
+    Выводит дерево в формате DOT (Graphviz) по строкам: узлы обходятся без рекурсии, промежуточное
+    дерево не строится, а уравнения восстанавливаются по уравнениям родителей. Общие поддеревья
+    (см. Solver, memo_size) выводятся один раз
+    """
+
+    def __init__(self, collapse_failed: bool = False, max_depth: int | None = None):
+        """
+        :param collapse_failed: заменять поддеревья без решений, подвешенные к одному узлу, одним узлом
+            с числом их узлов (вместе с отброшенными решателем, см. Solver, solutions_only)
+        :param max_depth: сколько уровней дерева выводить, поддеревья ниже заменяются одним узлом с числом их узлов
+        """
+        if max_depth is not None and max_depth < 1:
+            raise ValueError('Глубина должна быть положительной')
+
+        self._collapse_failed = collapse_failed
+        self._max_depth = max_depth
+
+    def write(self, out: TextIO, root: cn.CompressionNode):
+        for line in self.iter_lines(root):
+            out.write(line)
+            out.write('\n')
+
+    def iter_lines(self, root: cn.CompressionNode) -> Iterator[str]:
+        alive_ids = _get_alive_ids(root) if self._collapse_failed else None
+
+        yield 'strict digraph tree {'
+
+        visited = {root.id}
+        stack = [(root, root.equation, 1)]
+        while stack:
+            node, equation, depth = stack.pop()
+            yield _node_line(f'n{node.id}', _get_label(node, equation), _get_attrs(node))
+
+            children = node.children
+            if self._max_depth is not None and depth >= self._max_depth:
+                if len(children) > 0:
+                    hidden = sum(_get_size(child) for child in children)
+                    yield from _summary_lines(node, f'Не показано узлов: {hidden}', _HIDDEN_ATTRS)
+                continue
+
+            if alive_ids is not None:
+                failed = node.pruned_nodes + sum(_get_size(child) for child in children if child.id not in alive_ids)
+                if failed > 0:
+                    yield from _summary_lines(node, f'Узлов без решений: {failed}', _COLLAPSED_ATTRS)
+                children = [child for child in children if child.id in alive_ids]
+
+            for child in children:
+                yield f'    n{node.id} -> n{child.id};'
+
+            for child in reversed(children):
+                if child.id not in visited:
+                    visited.add(child.id)
+                    stack.append((child, child.get_equation(equation), depth + 1))
+
+        yield '}'
+
+
+def _get_alive_ids(root: cn.CompressionNode) -> set[int]:
+    """
+    :return: идентификаторы узлов, в поддеревьях которых есть решения
+    """
+    alive_ids = set()
+    visited = set()
+    stack = [(root, False)]
+    while stack:
+        node, is_exited = stack.pop()
+        if is_exited:
+            if node.is_solved or any(child.id in alive_ids for child in node.children):
+                alive_ids.add(node.id)
+            continue
+
+        if node.id in visited:
+            continue
+        visited.add(node.id)
+
+        stack.append((node, True))
+        stack.extend((child, False) for child in node.children)
+
+    return alive_ids
+
+
+def _get_size(root: cn.CompressionNode) -> int:
+    """
+    :return: число узлов поддерева вместе с отброшенными решателем
+    """
+    size = 0
+    visited = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.id in visited:
+            continue
+        visited.add(node.id)
+
+        size += 1 + node.pruned_nodes
+        stack.extend(node.children)
+
+    return size
+
+
+def _summary_lines(node: cn.CompressionNode, label: str, attrs: str) -> Iterator[str]:
+    yield _node_line(f's{node.id}', label, attrs)
+    yield f'    n{node.id} -> s{node.id};'
+
+
+def _node_line(node_id: str, label: str, attrs: str) -> str:
+    escaped = label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'    {node_id} [label="{escaped}" {attrs}];'
+
+
+def _get_attrs(node: cn.CompressionNode) -> str:
+    if node.is_solved:
+        return _SOLUTION_ATTRS
+    elif len(node.children) == 0:
+        return _FAILED_ATTRS
+
+    return _NODE_ATTRS
+
+
+def _get_label(node: cn.CompressionNode, equation: eq.Equation) -> str:
+    label = f'ID: {node.id}\n'
+    label += _get_compression_action_representation(node.compression_action)
+    label += _get_option_representation(node.option)
+    label += f'{equation}'
+
+    return label
+
+
+def _get_option_representation(o: opt.Option | None) -> str:
+    subts = 'No substitutions'
+    if o is not None and len(o.substitutions) > 0:
+        subts = ', '.join([str(s) for s in sorted(o.substitutions, key=lambda x: ord(x.var.sym))])
+
+    restr = 'No restrictions'
+    if o is not None and o.restriction is not None:
+        restr = str(o.restriction)
+
+    return f'{subts}\n{restr}\n'
+
+
+def _get_compression_action_representation(
+        action: tuple[ac.CompressBlockAction | ac.CompressPairAction, c.BlockConst | c.PairConst] | None,
+) -> str:
+    return f'{action[0]} → {action[1]}\n' if action is not None else 'No compression action\n'
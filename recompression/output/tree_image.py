@@ -1,61 +1,43 @@
-import anytree
-import anytree.exporter as exporter
+import os
+import subprocess
 
-from recompression.models import compression_node as cn, option as opt, actions as ac, const as c
-from utils.time import timeit
+from recompression.models import compression_node as cn
+from recompression.output import dot
 
+# форматы, которые записываются в файл как есть, без Graphviz
+_DOT_FORMATS = ('dot', 'gv')
 
-class TreeImage:
-    def generate(self, path: str, root: cn.CompressionNode):
-        anytree_root = self._convert_to_anytree_node(root)
-
-        exporter.DotExporter(
-            anytree_root,
-            graph='strict digraph',
-            nodeattrfunc=self._node_attr_func,
-        ).to_picture(path)
-
-    def _node_attr_func(self, node: anytree.Node) -> str | None:
-        if hasattr(node, 'is_solution'):
-            return 'color=lightgreen fillcolor=lightgreen style=filled shape=box'
-        elif hasattr(node, 'is_bad'):
-            return 'color=red shape=box'
-
-        return 'shape=box'
-
-    def _convert_to_anytree_node(self, node: cn.CompressionNode):
-        name = f'ID: {node.id}\n'
-        name += _get_compression_action_representation(node.compression_action)
-        name += _get_option_representation(node.option)
-        name += f'{node.equation}'
-
-        attrs = {}
-        if node.equation.is_solved:
-            attrs["is_solution"] = True
-        elif len(node.children) == 0:
-            attrs["is_bad"] = True
-
-        anytree_node = anytree.Node(name, **attrs)
-
-        for child in node.children:
-            anytree_child = self._convert_to_anytree_node(child)
-            anytree_child.parent = anytree_node
-        return anytree_node
-
-
-def _get_option_representation(o: opt.Option | None) -> str:
-    subts = 'No substitutions'
-    if o is not None and len(o.substitutions) > 0:
-        subts = ', '.join([str(s) for s in sorted(o.substitutions, key=lambda x: ord(x.var.sym))])
-
-    restr = 'No restrictions'
-    if o is not None and o.restriction is not None:
-        restr = str(o.restriction)
-
-    return f'{subts}\n{restr}\n'
 
+class TreeImage:
+    def __init__(self, collapse_failed: bool = False, max_depth: int | None = None):
+        """
+        :param collapse_failed: заменять поддеревья без решений одним узлом (см. DotWriter)
+        :param max_depth: сколько уровней дерева выводить (см. DotWriter)
+        """
+        self._writer = dot.DotWriter(collapse_failed, max_depth)
 
-def _get_compression_action_representation(
-        action: tuple[ac.CompressBlockAction | ac.CompressPairAction, c.BlockConst | c.PairConst] | None,
-) -> str:
-    return f'{action[0]} → {action[1]}\n' if action is not None else 'No compression action\n'
+    def generate(self, path: str, root: cn.CompressionNode):
+        """
+        Сохраняет дерево по пути path. Формат определяется по расширению: .dot и .gv записываются
+        как есть, остальные рисует dot из Graphviz, читая описание дерева из stdin по мере его вывода
+
+        :raises subprocess.CalledProcessError: если dot завершился с ошибкой
+        """
+        file_format = os.path.splitext(path)[1][1:]
+        if file_format in _DOT_FORMATS:
+            with open(path, 'w', encoding='utf-8') as f:
+                self._writer.write(f, root)
+            return
+
+        process = subprocess.Popen(['dot', '-T', file_format, '-o', path], stdin=subprocess.PIPE, encoding='utf-8')
+        try:
+            self._writer.write(process.stdin, root)
+            process.stdin.close()
+        except BrokenPipeError:
+            # dot завершился, не дочитав описание: причину он уже вывел в stderr
+            pass
+        finally:
+            return_code = process.wait()
+
+        if return_code != 0:
+            raise subprocess.CalledProcessError(return_code, process.args)
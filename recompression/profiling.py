@@ -0,0 +1,109 @@
+import functools
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass
+class PhaseStats:
+    """
+    Статистика одного этапа поиска
+    """
+    calls: int = 0
+    total_time: float = 0
+    max_time: float = 0
+    # сколько элементов этап произвел: для перебора вариантов - варианты, для эвристик - отброшенные ветви
+    items: int = 0
+
+    def add(self, elapsed: float, items: int = 0):
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.items += items
+
+    def merge(self, other: 'PhaseStats'):
+        self.calls += other.calls
+        self.total_time += other.total_time
+        self.max_time = max(self.max_time, other.max_time)
+        self.items += other.items
+
+
+class Profiler:
+    """
+    Замеряет этапы поиска и складывает их статистику в phases. Выключенный профилировщик ничего не замеряет
+    """
+
+    def __init__(self, phases: dict[str, PhaseStats] | None = None):
+        """
+        :param phases: куда складывать статистику этапов, None - профилировщик выключен
+        """
+        self._phases = phases
+
+    def record(self, phase: str, elapsed: float, items: int = 0):
+        if self._phases is None:
+            return
+
+        phase_stats = self._phases.get(phase)
+        if phase_stats is None:
+            phase_stats = self._phases[phase] = PhaseStats()
+
+        phase_stats.add(elapsed, items)
+
+    def wrap(self, phase: str, func: Callable[..., T]) -> Callable[..., T]:
+        """
+        :return: функция, каждый вызов которой записывается как вызов этапа phase. Выключенный
+            профилировщик возвращает саму func, поэтому в горячих местах замеры ничего не стоят
+        """
+        if self._phases is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(phase, time.perf_counter() - start)
+
+        return wrapper
+
+    def wrap_iter(self, phase: str, func: Callable[..., Iterable[T]]) -> Callable[..., Iterable[T]]:
+        """
+        То же, что wrap, для функций, возвращающих элементы лениво: один вызов - один проход
+        по результату, время вызова - суммарное время получения его элементов (без времени, которое
+        потребитель тратит между ними), элементы этапа - полученные элементы
+        """
+        if self._phases is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self._iterate(phase, func, args, kwargs)
+
+        return wrapper
+
+    def _iterate(self, phase: str, func: Callable[..., Iterable[T]], args: tuple, kwargs: dict) -> Iterator[T]:
+        start = time.perf_counter()
+        iterator = iter(func(*args, **kwargs))
+        elapsed = time.perf_counter() - start
+        items = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+
+                items += 1
+                yield item
+        finally:
+            self.record(phase, elapsed, items)
+
+
+DISABLED = Profiler()
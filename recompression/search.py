@@ -0,0 +1,116 @@
+import heapq
+import itertools
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Iterator
+from enum import Enum
+from typing import Generic, TypeVar
+
+from recompression.models import equation as eq
+
+T = TypeVar('T')
+
+
+class Frontier(ABC, Generic[T]):
+    """
+    Граница поиска: хранит еще не раскрытые узлы и определяет порядок их раскрытия.
+    Дети узла добавляются итератором, поэтому граница сама решает, когда их создавать
+    """
+
+    @abstractmethod
+    def push(self, items: Iterator[T]):
+        ...
+
+    @abstractmethod
+    def pop(self) -> T | None:
+        """
+        :return: следующий узел для раскрытия, либо None, если граница пуста
+        """
+        ...
+
+
+class DepthFirstFrontier(Frontier[T]):
+    """
+    Поиск в глубину. Дети узла создаются по одному, только когда поддерево предыдущего
+    ребенка полностью раскрыто, поэтому порядок раскрытия совпадает с рекурсивным обходом
+    """
+
+    def __init__(self):
+        self._stack: list[Iterator[T]] = []
+
+    def push(self, items: Iterator[T]):
+        self._stack.append(items)
+
+    def pop(self) -> T | None:
+        while len(self._stack) > 0:
+            item = next(self._stack[-1], None)
+            if item is not None:
+                return item
+
+            self._stack.pop()
+
+        return None
+
+
+class BreadthFirstFrontier(Frontier[T]):
+    """
+    Поиск в ширину: узел раскрывается целиком, его дети встают в конец очереди
+    """
+
+    def __init__(self):
+        self._queue: deque[T] = deque()
+
+    def push(self, items: Iterator[T]):
+        self._queue.extend(items)
+
+    def pop(self) -> T | None:
+        return self._queue.popleft() if len(self._queue) > 0 else None
+
+
+class BestFirstFrontier(Frontier[T]):
+    """
+    Поиск по приоритету: первым раскрывается узел с наименьшим приоритетом,
+    при равенстве приоритетов - добавленный раньше
+    """
+
+    def __init__(self, priority: Callable[[T], float]):
+        self._priority = priority
+        self._heap: list[tuple[float, int, T]] = []
+        self._counter = itertools.count()
+
+    def push(self, items: Iterator[T]):
+        for item in items:
+            heapq.heappush(self._heap, (self._priority(item), next(self._counter), item))
+
+    def pop(self) -> T | None:
+        return heapq.heappop(self._heap)[2] if len(self._heap) > 0 else None
+
+
+def remaining_length(equation: eq.Equation) -> int:
+    """
+    Приоритет поиска по приоритету: суммарная длина образца и шаблона
+    """
+    return len(equation.sample.ids) + len(equation.template.ids)
+
+
+class SearchPolicy(Enum):
+    DFS = 'dfs'
+    BFS = 'bfs'
+    BEST_FIRST = 'best'
+
+    def __str__(self):
+        return f'{self.value}'
+
+    __repr__ = __str__
+
+    def create_frontier(self, get_equation: Callable[[T], eq.Equation]) -> Frontier[T]:
+        """
+        :param get_equation: возвращает уравнение элемента границы
+        """
+        if self == SearchPolicy.BFS:
+            return BreadthFirstFrontier()
+
+        if self == SearchPolicy.BEST_FIRST:
+            return BestFirstFrontier(lambda item: remaining_length(get_equation(item)))
+
+        return DepthFirstFrontier()
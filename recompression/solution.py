@@ -0,0 +1,71 @@
+from collections.abc import Iterator
+
+from recompression.models import actions as ac, compression_node as cn, const as c, equation as eq, var as v
+
+
+def get_solution_paths(root: cn.CompressionNode) -> Iterator[list[cn.CompressionNode]]:
+    """
+    :param root: корень построенного дерева
+    :return: пути от корня до узлов-решений в порядке обхода в глубину
+    """
+    path: list[cn.CompressionNode] = []
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        del path[depth:]
+        path.append(node)
+
+        if node.is_solved:
+            yield list(path)
+
+        stack.extend((child, depth + 1) for child in reversed(node.children))
+
+
+def get_assignment(path: list[cn.CompressionNode]) -> dict[v.Var, list[c.AlphabetConst]]:
+    """
+    Восстанавливает значения переменных исходного уравнения: подстановки на пути применяются
+    к каждой переменной, а сжатые константы раскрываются обратно в константы алфавита
+
+    :param path: путь от корня дерева до узла-решения
+    :return: значения переменных уравнения из корня пути
+    """
+    values = {var: eq.Template(var) for var in path[0].equation.template.get_vars_set()}
+    pairs: dict[c.PairConst, c.Pair] = {}
+    blocks: dict[tuple[str, int], c.AlphabetConst | c.PairConst | c.BlockConst] = {}
+
+    for node in path[1:]:
+        if node.option is not None and len(node.option.substitutions) > 0:
+            values = {var: tpl.apply_substitutions(node.option.substitutions) for var, tpl in values.items()}
+
+        if node.compression_action is not None:
+            action, new_const = node.compression_action
+            if isinstance(action, ac.CompressPairAction):
+                pairs[new_const] = action.pair
+            else:
+                blocks[(new_const.sym, new_const.version)] = action.const
+
+    # решенное уравнение либо состоит из одной переменной, равной образцу, либо не содержит переменных
+    solved = path[-1].equation
+    final: dict[v.Var, list] = {}
+    if len(solved.template.elements) == 1 and isinstance(solved.template.elements[0], v.Var):
+        final[solved.template.elements[0]] = list(solved.sample.elements)
+
+    def decompress(element) -> list[c.AlphabetConst]:
+        result = []
+        stack = [element]
+        while stack:
+            el = stack.pop()
+            if isinstance(el, c.AlphabetConst):
+                result.append(el)
+            elif isinstance(el, c.PairConst):
+                stack.extend(reversed(pairs[el]))
+            elif isinstance(el, c.BlockConst):
+                stack.extend([blocks[(el.sym, el.version)]] * el.compression_factor)
+            elif el in final:
+                stack.extend(reversed(final[el]))
+            else:
+                raise ValueError(f'Значение переменной {el} не определено')
+
+        return result
+
+    return {var: [sym for el in tpl.elements for sym in decompress(el)] for var, tpl in values.items()}
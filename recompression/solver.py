@@ -1,15 +1,21 @@
+import multiprocessing.synchronize
 import time
-from collections import Counter
+from collections import Counter, deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from typing import Optional
 
+from recompression import budget as bg, canonical, profiling, search, transposition_table as tt
+from recompression.compress_block import BlockCompressor
 from recompression.compress_pair import PairCompressor
 from recompression.get_empty_substitutions import get_empty_options, get_full_empty_option
 from recompression.get_most_profit_actions import get_most_profit_actions
+from recompression.get_options_for_block import get_options_for_block
 from recompression.get_options_for_pair import get_options_for_pair
-from recompression.heuristics import heuristics as h
+from recompression.heuristics import heuristics as h, scheduler as hs
 from recompression.models import equation as eq, compression_node as cn, actions as ac, option as opt, \
-    substitution as sb
-from utils.time import timeit
+    substitution as sb, var_restriction as vr, const as c
 
 
 @dataclass
@@ -17,10 +23,19 @@ class SolverStats:
     total_working_time: float = 0
     heuristics_timings: dict[str, list[float]] = None
     branches_dropped_by_heuristics: dict[str, int] = None
+    memo_hits: int = 0
+    memo_misses: int = 0
+    siblings_deduplicated: int = 0
+    # статистика этапов поиска, собирается только при профилировании (см. Solver, параметр profile)
+    phases: dict[str, profiling.PhaseStats] = None
+    # поиск остановлен до построения всего дерева, потому что исчерпано ограничение exhausted_budget
+    truncated: bool = False
+    exhausted_budget: bg.BudgetKind | None = None
 
     def __post_init__(self):
         self.heuristics_timings = {}
         self.branches_dropped_by_heuristics = {}
+        self.phases = {}
 
     def add_heuristics_timing(self, name: str, value: float):
         if name not in self.heuristics_timings:
@@ -28,134 +43,760 @@ class SolverStats:
 
         self.heuristics_timings[name].append(value)
 
-    def add_dropped_branches(self, name: str):
+    def add_dropped_branches(self, name: str, count: int = 1):
         if name not in self.branches_dropped_by_heuristics:
             self.branches_dropped_by_heuristics[name] = 0
 
-        self.branches_dropped_by_heuristics[name] += 1
+        self.branches_dropped_by_heuristics[name] += count
+
+    def merge(self, other: 'SolverStats'):
+        """
+        Добавляет статистику поиска, выполненного в другом процессе. Время работы не суммируется
+        """
+        for name, timings in other.heuristics_timings.items():
+            self.heuristics_timings.setdefault(name, []).extend(timings)
+        for name, count in other.branches_dropped_by_heuristics.items():
+            self.add_dropped_branches(name, count)
+
+        self.memo_hits += other.memo_hits
+        self.memo_misses += other.memo_misses
+        self.siblings_deduplicated += other.siblings_deduplicated
+        for phase, phase_stats in other.phases.items():
+            self.phases.setdefault(phase, profiling.PhaseStats()).merge(phase_stats)
+        if other.truncated and not self.truncated:
+            self.truncate(other.exhausted_budget)
+
+    def truncate(self, exhausted_budget: bg.BudgetKind):
+        self.truncated = True
+        self.exhausted_budget = exhausted_budget
+
+
+class _SearchFrame:
+    """
+    Состояние узла во время поиска: нужно, чтобы узнать, когда поддерево узла построено целиком
+    """
+    __slots__ = ('node', 'parent', 'depth', 'key', 'naming', 'siblings', 'open_children', 'is_expanded',
+                 'is_reused', 'has_solution')
+
+    def __init__(self, node: cn.CompressionNode, parent: Optional['_SearchFrame'], depth: int = 0):
+        self.node = node
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else depth
+        self.key = None
+        self.naming = None
+        # уже разобранные дети узла по ключам уравнений
+        self.siblings: dict | None = None
+        self.open_children = 0
+        self.is_expanded = False
+        self.is_reused = False
+        self.has_solution = False
+
+
+@dataclass
+class _SubtreeTask:
+    """
+    Поддерево, раскрываемое в отдельном процессе
+    """
+    heuristics: list[h.Heurisitcs]
+    adaptive_heuristics: bool
+    profile: bool
+    budget: bg.Budget
+    memo_size: int
+    symmetry: bool
+    solutions_only: bool
+    policy: search.SearchPolicy
+    node: cn.CompressionNode
+    depth: int
+    pair_compressor: PairCompressor
+    block_compressor: BlockCompressor
+
+
+@dataclass
+class _SubtreeResult:
+    # корень поддерева, отвязанный от предков
+    node: cn.CompressionNode
+    has_solution: bool
+    stats: SolverStats
+
+
+# сколько поддеревьев в среднем приходится на один процесс: остаток от деления поддеревьев
+# между процессами тем меньше, чем их больше
+_TASKS_PER_WORKER = 4
+
+# флаг отмены поиска, общий для процессов-исполнителей одного пула: поднимается, когда решения
+# больше не нужны, и уже начатые поддеревья перестают раскрываться
+_cancel_event: multiprocessing.synchronize.Event | None = None
 
 
 class Solver:
-    def __init__(self, equation_heuristics: list[h.Heurisitcs]):
+    def __init__(
+            self,
+            equation_heuristics: list[h.Heurisitcs],
+            memo_size: int = 0,
+            symmetry: bool = False,
+            policy: search.SearchPolicy = search.SearchPolicy.DFS,
+            workers: int = 1,
+            parallel_threshold: int = 8,
+            adaptive_heuristics: bool = False,
+            profile: bool = False,
+            budget: bg.Budget | None = None,
+            solutions_only: bool = False,
+    ):
+        """
+        :param equation_heuristics: эвристики, отсекающие заведомо нерешаемые ветви
+        :param memo_size: размер таблицы уже разобранных уравнений, 0 - не запоминать поддеревья
+        :param symmetry: считать одинаковыми уравнения, отличающиеся только именами переменных и версиями
+            констант: такие соседние узлы и записи таблицы переиспользуют уже построенное поддерево
+        :param policy: порядок раскрытия узлов
+        :param workers: число процессов, между которыми распределяются поддеревья
+        :param parallel_threshold: минимальная суммарная длина шаблона и образца, при которой поддерево
+            раскрывается в отдельном процессе, более короткие раскрываются в текущем
+        :param adaptive_heuristics: менять порядок эвристик по их стоимости и пропускать дорогие эвристики
+            на глубинах, где они ничего не отбрасывают (см. HeuristicsScheduler)
+        :param profile: собирать в SolverStats.phases число вызовов, время и число произведенных элементов
+            каждого этапа раскрытия узла
+        :param budget: ограничения числа узлов, времени и памяти. Исчерпав одно из них, поиск останавливается,
+            а решатель возвращает недостроенное дерево с найденными решениями и отмечает это в SolverStats
+        :param solutions_only: отбрасывать поддеревья без решений, как только они построены. В дереве остаются
+            только пути к решениям, а узлы запоминают число и глубину отброшенных потомков (см. CompressionNode)
+        """
+        if workers < 1:
+            raise ValueError('Число процессов должно быть положительным')
+
         self._heuristics = equation_heuristics
+        self._adaptive_heuristics = adaptive_heuristics
+        self._profile = profile
+        self._budget = budget if budget is not None else bg.Budget()
+        self._budget_tracker: bg.BudgetTracker | None = None
+        self._cancel_event: multiprocessing.synchronize.Event | None = None
+        self._solutions_only = solutions_only
+        self._scheduler = hs.HeuristicsScheduler(equation_heuristics, adaptive_heuristics)
         self._pair_compressor = PairCompressor()
+        self._block_compressor = BlockCompressor()
+        self._set_profiler(profiling.DISABLED)
         self._node_id_counter = 1
+        self._memo_size = memo_size
+        self._memo = tt.TranspositionTable(memo_size) if memo_size > 0 else None
+        self._symmetry = symmetry
+        self._canonicalizer = canonical.Canonicalizer() if symmetry else None
+        self._policy = policy
+        self._workers = workers
+        self._parallel_threshold = parallel_threshold
+        # найденные, но еще не отданные решения: собираются, только когда решения запрошены потоком
+        self._solutions: deque[list[cn.CompressionNode]] | None = None
+
+    def _set_profiler(self, profiler: profiling.Profiler):
+        """
+        Подменяет этапы раскрытия узла замеряемыми. Без профилирования этапы - исходные функции
+        """
+        self._profiler = profiler
+        self._get_actions = profiler.wrap('get_most_profit_actions', get_most_profit_actions)
+        self._get_empty_options = profiler.wrap_iter('get_empty_options', get_empty_options)
+        self._get_pair_options = profiler.wrap_iter('get_options_for_pair', get_options_for_pair)
+        self._get_block_options = profiler.wrap_iter('get_options_for_block', get_options_for_block)
+        self._apply_option = profiler.wrap('apply_option', opt.Option.apply_to)
+        self._compress_pair = profiler.wrap('compress_pair', self._pair_compressor.compress_pair)
+        self._compress_block = profiler.wrap('compress_block', self._block_compressor.compress_block)
+        self._check_trivial_solutions = profiler.wrap('trivial_solutions', self._add_trivial_solutions)
 
     def _next_node_id(self) -> int:
         self._node_id_counter += 1
         return self._node_id_counter
 
     def solve(self, equation: eq.Equation) -> tuple[cn.CompressionNode, SolverStats]:
+        self._validate(equation)
+
+        root = cn.CompressionNode.empty(equation)
+        stats = SolverStats()
+        if equation.is_solved:
+            return root, stats
+
+        for _ in self._run(root, stats):
+            pass
+
+        return root, stats
+
+    def solve_iter(self, equation: eq.Equation, stats: SolverStats | None = None) -> Iterator[list[cn.CompressionNode]]:
+        """
+        Строит дерево, отдавая решения по мере их нахождения. Поиск останавливается,
+        как только потребитель перестает запрашивать решения, дерево при этом остается недостроенным
+
+        :param equation: уравнение
+        :param stats: статистика, которую заполняет поиск
+        :return: пути от корня дерева до узлов-решений
+        """
+        self._validate(equation)
+
+        root = cn.CompressionNode.empty(equation)
+        if equation.is_solved:
+            yield [root]
+            return
+
+        self._solutions = deque()
+        try:
+            yield from self._run(root, stats if stats is not None else SolverStats())
+        finally:
+            self._solutions = None
+
+    @staticmethod
+    def _validate(equation: eq.Equation):
         if len(equation.template.get_vars_set()) == 0:
             raise ValueError('Шаблон должен содержать как минимум 1 переменную')
 
         if len(equation.sample.elements) == 0:
             raise ValueError('Образец не может быть пустым')
 
-        if equation.is_solved:
-            return cn.CompressionNode.empty(equation), SolverStats()
-
+    def _run(self, root: cn.CompressionNode, stats: SolverStats) -> Iterator[list[cn.CompressionNode]]:
         self._pair_compressor.reset()
+        self._block_compressor.reset()
+        self._scheduler.reset()
+        self._set_profiler(profiling.Profiler(stats.phases) if self._profile else profiling.DISABLED)
+        self._budget_tracker = self._budget.start() if not self._budget.is_unlimited else None
         self._node_id_counter = 1
+        if self._memo is not None:
+            self._memo.clear()
 
-        root = cn.CompressionNode.empty(equation)
-        stats = SolverStats()
         start = time.perf_counter()
-        self._solve(root, stats)
+        try:
+            if self._workers > 1:
+                yield from self._search_parallel(root, stats)
+            else:
+                yield from self._search(_SearchFrame(root, None), stats)
+        finally:
+            stats.total_working_time = time.perf_counter() - start
+
+    def _search(self, start_frame: _SearchFrame, stats: SolverStats) -> Iterator[list[cn.CompressionNode]]:
+        frontier = self._policy.create_frontier(lambda frame: frame.node.equation)
+        frontier.push(iter([start_frame]))
+
+        while (frame := frontier.pop()) is not None:
+            yield from self._pop_solutions()
+            if self._is_budget_exhausted(stats):
+                break
+
+            frontier.push(self._expand(frame, stats))
+
+        yield from self._pop_solutions()
+
+    def _is_budget_exhausted(self, stats: SolverStats) -> bool:
+        """
+        Проверяет ограничения перед раскрытием очередного узла и перед сжатием каждого его варианта, поэтому
+        долгое раскрытие одного узла тоже прерывается. Нераскрытые узлы остаются в дереве без детей
+        (или с частью детей). В процессе-исполнителе поиск так же останавливается, когда его отменил
+        основной процесс
+        """
+        if stats.truncated:
+            return True
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            return True
+        if self._budget_tracker is None:
+            return False
+
+        exhausted_budget = self._budget_tracker.check(self._node_id_counter)
+        if exhausted_budget is None:
+            return False
+
+        stats.truncate(exhausted_budget)
+        return True
+
+    def _pop_solutions(self) -> Iterator[list[cn.CompressionNode]]:
+        while self._solutions:
+            yield self._solutions.popleft()
+
+    def _search_parallel(self, root: cn.CompressionNode, stats: SolverStats) -> Iterator[list[cn.CompressionNode]]:
+        """
+        Раскрывает верхние уровни дерева в ширину, пока не наберется достаточно независимых поддеревьев,
+        и раскрывает длинные из них в отдельных процессах. Поддеревья сливаются в порядке их создания,
+        поэтому идентификаторы узлов и версии констант не зависят от того, какой процесс закончил раньше
+        """
+        frames = deque([_SearchFrame(root, None)])
+        while 0 < len(frames) < self._workers * _TASKS_PER_WORKER:
+            if self._is_budget_exhausted(stats):
+                return
+
+            frames.extend(self._expand(frames.popleft(), stats))
+            yield from self._pop_solutions()
+
+        remote_frames = [
+            frame for frame in frames if search.remaining_length(frame.node.equation) >= self._parallel_threshold
+        ]
+        if len(remote_frames) == 0:
+            for frame in frames:
+                yield from self._search(frame, stats)
+            return
+
+        # лимит узлов делится между поддеревьями поровну, а срок окончания у них общий
+        subtree_budget = self._budget
+        if self._budget_tracker is not None:
+            subtree_budget = self._budget_tracker.get_remaining(self._node_id_counter, len(remote_frames))
+
+        cancel_event = multiprocessing.Event()
+        pool = ProcessPoolExecutor(
+            max_workers=self._workers,
+            initializer=_init_subtree_worker,
+            initargs=(cancel_event,),
+        )
+        try:
+            futures = [
+                pool.submit(_solve_subtree, _SubtreeTask(
+                    self._heuristics,
+                    self._adaptive_heuristics,
+                    self._profile,
+                    subtree_budget,
+                    self._memo_size,
+                    self._symmetry,
+                    self._solutions_only,
+                    self._policy,
+                    # узел передается без предков: его уравнение не восстанавливается по ним
+                    frame.node.detach(),
+                    frame.depth,
+                    self._pair_compressor,
+                    self._block_compressor,
+                ))
+                for frame in remote_frames
+            ]
+
+            remote_ids = {id(frame) for frame in remote_frames}
+            for frame in frames:
+                if id(frame) not in remote_ids:
+                    yield from self._search(frame, stats)
+
+            for frame, future in zip(remote_frames, futures):
+                # основной процесс ждет и сливает поддеревья не дольше своего срока
+                time_left = self._budget_tracker.get_time_left() if self._budget_tracker is not None else None
+                if time_left == 0:
+                    stats.truncate(bg.BudgetKind.TIME)
+                    return
+                try:
+                    result = future.result(timeout=time_left)
+                except TimeoutError:
+                    stats.truncate(bg.BudgetKind.TIME)
+                    return
+
+                self._merge_subtree(frame, result, stats)
+                yield from self._pop_solutions()
+        finally:
+            # если решения больше не нужны, еще не начатые поддеревья не раскрываются,
+            # а начатые прерываются, не дожидаясь их построения
+            cancel_event.set()
+            pool.shutdown(cancel_futures=True)
+
+    def _merge_subtree(self, frame: _SearchFrame, result: _SubtreeResult, stats: SolverStats):
+        """
+        Подвешивает к узлу поддерево, построенное в другом процессе: константы переименовываются
+        в константы текущих компрессоров, узлы получают идентификаторы текущего дерева
+        """
+        renaming = canonical.Renaming.from_translation(self._get_consts_translation(result.node.children))
+        frame.node.children.extend(
+            renaming.rename_node(child, self._next_node_id, frame.node) for child in result.node.children
+        )
+        frame.node.pruned_nodes += result.node.pruned_nodes
+        frame.node.pruned_depth = max(frame.node.pruned_depth, result.node.pruned_depth)
+        frame.has_solution = result.has_solution
+        frame.is_expanded = True
+        stats.merge(result.stats)
+        self._add_subtree_solutions(frame)
+
+        self._complete(frame)
+
+    def _get_consts_translation(self, nodes: list[cn.CompressionNode]) -> dict[c.Const, c.Const]:
+        """
+        Сопоставляет константам, созданным в другом процессе, константы текущих компрессоров. Узлы обходятся
+        в прямом порядке: сжимаемые узлом константы созданы его предками и к этому моменту уже сопоставлены
+        """
+        translation = {}
+        visited = set()
+        stack = list(reversed(nodes))
+        while stack:
+            node = stack.pop()
+            if id(node) in visited:
+                continue
+            visited.add(id(node))
+            stack.extend(reversed(node.children))
 
-        stats.total_working_time = time.perf_counter() - start
+            if node.compression_action is None:
+                continue
 
-        return root, stats
+            action, new_const = node.compression_action
+            if isinstance(action, ac.CompressPairAction):
+                a, b = action.pair
+                translation[new_const] = self._pair_compressor.get_const(
+                    (translation.get(a, a), translation.get(b, b)),
+                )
+                continue
 
-    def _solve(self, node: cn.CompressionNode, stats: SolverStats):
+            merged = self._block_compressor.get_const(translation.get(action.const, action.const))
+            translation[new_const] = merged
+            node_eq = node.equation
+            for const in node_eq.template.get_consts_set() | node_eq.sample.get_consts_set():
+                if isinstance(const, c.BlockConst) and (const.sym, const.version) == (new_const.sym, new_const.version):
+                    translation[const] = c.BlockConst(merged.sym, merged.version, const.compression_factor)
+
+        return {const: merged for const, merged in translation.items() if const != merged}
+
+    def _expand(self, frame: _SearchFrame, stats: SolverStats) -> Iterator[_SearchFrame]:
+        """
+        Раскрывает узел: подвешивает к нему детей и возвращает тех из них, которые нужно раскрыть дальше
+        """
+        node = frame.node
         node_eq = node.equation
-        actions = get_most_profit_actions(node_eq.sample)
 
-        for action in actions:
-            if isinstance(action, ac.CompressPairAction):
-                self._do_pair_compression(node, action, stats)
-            else:
-                print(f'ERROR: unknown action {action}')
-                continue
+        parent_option = node.option
+        if parent_option is not None:
+            parent_option = parent_option.optimize(node_eq)
+            if node.compression_action is not None and isinstance(node.compression_action[0], ac.CompressBlockAction):
+                # подстановки блоков уже применены, а ограничения варианта относятся к новым переменным
+                parent_option = opt.Option([], parent_option.restriction)
+
+        frame.key, frame.naming = self._get_key(
+            node_eq,
+            parent_option.restriction if parent_option is not None else None,
+        )
+        if frame.key is not None and self._reuse(frame, stats):
+            frame.is_reused = True
+            self._add_subtree_solutions(frame)
+        else:
+            frame.siblings = {} if self._canonicalizer is not None else None
+
+            for action in self._get_actions(node_eq.sample):
+                if isinstance(action, ac.CompressPairAction):
+                    children = self._do_pair_compression(frame, parent_option, action, stats)
+                else:
+                    children = self._do_block_compression(frame, parent_option, action, stats)
+
+                for child_node in children:
+                    frame.open_children += 1
+                    yield _SearchFrame(child_node, frame)
+
+        frame.is_expanded = True
+        self._complete(frame)
+
+    def _complete(self, frame: _SearchFrame):
+        """
+        Завершает узел, если он раскрыт и поддеревья всех его детей построены, и поднимается к родителю
+        """
+        while frame is not None and frame.is_expanded and frame.open_children == 0:
+            frame.siblings = None
+            if self._solutions_only:
+                frame.node.prune()
+            # поиску уравнения детей больше не нужны, при необходимости они восстанавливаются по узлу
+            for child in frame.node.children:
+                child.release_equation()
+
+            if frame.key is not None and not frame.is_reused:
+                entry = tt.UNSOLVABLE
+                if frame.has_solution:
+                    entry = (list(frame.node.children), frame.naming, frame.node.pruned_nodes, frame.node.pruned_depth)
+                if self._memo is not None:
+                    self._memo.put(frame.key, entry)
+                if frame.parent is not None and frame.parent.siblings is not None:
+                    frame.parent.siblings[frame.key] = entry
+
+            parent = frame.parent
+            if parent is not None:
+                parent.has_solution |= frame.has_solution
+                parent.open_children -= 1
+
+            frame = parent
+
+    def _add_solution(self, frame: _SearchFrame, *nodes: cn.CompressionNode):
+        """
+        Отмечает, что в поддереве узла найдено решение
+
+        :param frame: узел
+        :param nodes: путь от узла до узла-решения
+        """
+        frame.has_solution = True
+        if self._solutions is not None:
+            self._solutions.append(self._get_path(frame) + list(nodes))
+
+    def _add_subtree_solutions(self, frame: _SearchFrame):
+        """
+        Добавляет к найденным решениям решения поддерева, подвешенного к узлу целиком
+        """
+        if self._solutions is None or not frame.has_solution:
+            return
+
+        path = self._get_path(frame)
+        stack = [(child, [child]) for child in reversed(frame.node.children)]
+        while stack:
+            node, nodes = stack.pop()
+            if node.is_solved:
+                self._solutions.append(path + nodes)
+
+            stack.extend((child, nodes + [child]) for child in reversed(node.children))
+
+    @staticmethod
+    def _get_path(frame: _SearchFrame) -> list[cn.CompressionNode]:
+        path = []
+        while frame is not None:
+            path.append(frame.node)
+            frame = frame.parent
+
+        return path[::-1]
+
+    def _get_key(
+            self,
+            equation: eq.Equation,
+            restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None,
+    ) -> tuple[tt.Key | canonical.CanonicalForm | None, canonical.Naming | None]:
+        if self._canonicalizer is not None:
+            return self._canonicalizer.canonicalize(equation, restriction)
+
+        if self._memo is not None:
+            return tt.equation_key(equation, restriction), None
+
+        return None, None
+
+    def _reuse(self, frame: _SearchFrame, stats: SolverStats) -> bool:
+        """
+        Пытается подвесить к узлу поддерево уже разобранного соседнего узла или записи таблицы
+
+        :return: True, если поддерево переиспользовано
+        """
+        siblings = frame.parent.siblings if frame.parent is not None else None
+        if siblings is not None and frame.key in siblings:
+            has_solution = self._reuse_entry(frame.node, siblings[frame.key], frame.naming)
+            if has_solution is not None:
+                stats.siblings_deduplicated += 1
+                frame.has_solution = has_solution
+                return True
+
+        if self._memo is not None:
+            entry = self._memo.get(frame.key)
+            has_solution = self._reuse_entry(frame.node, entry, frame.naming) if entry is not None else None
+            if has_solution is not None:
+                stats.memo_hits += 1
+                frame.has_solution = has_solution
+                return True
+
+            stats.memo_misses += 1
+
+        return False
+
+    def _reuse_entry(
+            self,
+            node: cn.CompressionNode,
+            entry: tt.Entry,
+            naming: canonical.Naming | None,
+    ) -> bool | None:
+        """
+        Подвешивает к узлу уже построенное поддерево
+
+        :return: есть ли в поддереве решения, либо None, если поддерево нельзя переиспользовать
+        """
+        if entry == tt.UNSOLVABLE:
+            return False
+
+        children, entry_naming, pruned_nodes, pruned_depth = entry
+        if naming is not None:
+            renaming = canonical.Renaming(entry_naming, naming)
+            if not renaming.is_identity:
+                try:
+                    children = [renaming.rename_node(child, self._next_node_id, node) for child in children]
+                except canonical.RenameConflict:
+                    return None
+
+                # отброшенные потомки копии не разделяются с исходным поддеревом, а считаются заново
+                node.pruned_nodes += pruned_nodes
+                node.pruned_depth = max(node.pruned_depth, pruned_depth)
+
+        node.children.extend(children)
+        return True
 
     def _do_pair_compression(
             self,
-            parent_node: cn.CompressionNode,
+            parent_frame: _SearchFrame,
+            parent_option: opt.Option | None,
             action: ac.CompressPairAction,
             stats: SolverStats,
-    ):
-        parent_option = parent_node.option
-        if parent_option is not None:
-            parent_option = parent_option.optimize(parent_node.equation)
-
-        for empty_opt in get_empty_options(action.pair, parent_node.equation.template, parent_option):
-            emptied_eq = empty_opt.apply_to(parent_node.equation)
-            for option in get_options_for_pair(
-                    emptied_eq,
-                    action.pair,
-                    empty_opt,
-            ):
-                new_const, new_eq = self._pair_compressor.compress_pair(
+    ) -> Iterator[cn.CompressionNode]:
+        """
+        Подвешивает к узлу детей, полученных сжатием пары
+
+        :return: дети, которые нужно раскрыть дальше
+        """
+        parent_node = parent_frame.node
+        # варианты меняют только шаблон: образец сжимается при первом варианте, остальные дети его разделяют
+        compressed_sample = None
+
+        for empty_opt in self._get_empty_options(action.pair, parent_node.equation.template, parent_option):
+            emptied_eq = self._apply_option(empty_opt, parent_node.equation)
+            for option in self._get_pair_options(emptied_eq, action.pair, empty_opt):
+                if self._is_budget_exhausted(stats):
+                    return
+
+                new_const, new_eq = self._compress_pair(
                     action.pair,
-                    option.apply_to(emptied_eq)
+                    self._apply_option(option, emptied_eq),
+                    compressed_sample,
                 )
+                compressed_sample = new_eq.sample
 
-                if new_eq.is_solved:
-                    parent_node.children.append(
-                        cn.CompressionNode(self._next_node_id(), new_eq, option, (action, new_const), []),
-                    )
-                    continue
-
-                is_dropped = False
-                for heuristic in self._heuristics:
-                    start = time.perf_counter()
-                    is_satisfable = heuristic.is_satisfable(new_eq, option)
-                    stats.add_heuristics_timing(heuristic.get_name(), time.perf_counter() - start)
+                child_node = self._add_child(parent_frame, new_eq, option, (action, new_const), stats)
+                if child_node is not None:
+                    yield child_node
 
-                    if not is_satisfable:
-                        stats.add_dropped_branches(heuristic.get_name())
-                        is_dropped = True
-                        break
-
-                if is_dropped:
+    def _do_block_compression(
+            self,
+            parent_frame: _SearchFrame,
+            parent_option: opt.Option | None,
+            action: ac.CompressBlockAction,
+            stats: SolverStats,
+    ) -> Iterator[cn.CompressionNode]:
+        """
+        Подвешивает к узлу детей, полученных сжатием всех блоков константы. Блоки сжимаются
+        все сразу, независимо от длины, указанной в действии
+
+        :return: дети, которые нужно раскрыть дальше
+        """
+        parent_eq = parent_frame.node.equation
+        compressed_sample = None
+
+        for option in self._get_block_options(parent_eq, action.const, parent_option):
+            if self._is_budget_exhausted(stats):
+                return
+
+            new_const, new_eq = self._compress_block(
+                action.const,
+                self._apply_option(option, parent_eq),
+                compressed_sample,
+            )
+            compressed_sample = new_eq.sample
+
+            child_node = self._add_child(parent_frame, new_eq, option, (action, new_const), stats)
+            if child_node is not None:
+                yield child_node
+
+    def _add_child(
+            self,
+            parent_frame: _SearchFrame,
+            new_eq: eq.Equation,
+            option: opt.Option,
+            compression_action: tuple[ac.CompressBlockAction | ac.CompressPairAction, c.Const],
+            stats: SolverStats,
+    ) -> cn.CompressionNode | None:
+        """
+        Подвешивает к узлу ребенка, полученного сжатием, если эвристики его не отбросили
+
+        :return: ребенок, если его нужно раскрыть дальше
+        """
+        parent_node = parent_frame.node
+
+        if new_eq.is_solved:
+            solution_node = cn.CompressionNode(
+                self._next_node_id(), new_eq, option, compression_action, [], parent_node,
+            )
+            parent_node.children.append(solution_node)
+            self._add_solution(parent_frame, solution_node)
+            return None
+
+        depth = parent_frame.depth + 1
+        for heuristic in self._scheduler.get_heuristics(depth):
+            start = time.perf_counter()
+            is_satisfable = heuristic.is_satisfable(new_eq, option)
+            elapsed = time.perf_counter() - start
+            stats.add_heuristics_timing(heuristic.get_name(), elapsed)
+            # элементы этапа эвристики - отброшенные ею ветви
+            self._profiler.record(f'heuristic:{heuristic.get_name()}', elapsed, int(not is_satisfable))
+            self._scheduler.record(heuristic, depth, not is_satisfable, elapsed)
+
+            if not is_satisfable:
+                stats.add_dropped_branches(heuristic.get_name())
+                return None
+
+        child_node = cn.CompressionNode(self._next_node_id(), new_eq, option, compression_action, [], parent_node)
+        parent_node.children.append(child_node)
+
+        if self._check_trivial_solutions(parent_frame, child_node, option):
+            return None
+
+        return child_node
+
+    def _add_trivial_solutions(
+            self,
+            parent_frame: _SearchFrame,
+            child_node: cn.CompressionNode,
+            option: opt.Option,
+    ) -> bool:
+        """
+        Подвешивает к ребенку решения, которые получаются обнулением переменных
+
+        :return: True, если ребенка не нужно раскрывать дальше
+        """
+        new_eq = child_node.equation
+
+        o = get_full_empty_option(new_eq.template, option)
+        if o is not None:
+            trivial_eq = o.apply_to(new_eq)
+            if trivial_eq.is_solved:
+                solution_node = cn.CompressionNode(self._next_node_id(), trivial_eq, o, None, [], child_node)
+                child_node.children.append(solution_node)
+                self._add_solution(parent_frame, child_node, solution_node)
+                return True
+
+        if len(new_eq.sample.elements) == 1:
+            for var, count in Counter(new_eq.template.elements).items():
+                if count != 1:
                     continue
 
-                child_node = cn.CompressionNode(self._next_node_id(), new_eq, option, (action, new_const), [])
-                parent_node.children.append(child_node)
+                emptied_vars = new_eq.template.get_vars_set() - {var}
 
-                o = get_full_empty_option(new_eq.template, option)
-                if o is not None:
-                    trivial_eq = o.apply_to(new_eq)
-                    if trivial_eq.is_solved:
-                        child_node.children.append(cn.CompressionNode(self._next_node_id(), trivial_eq, o, None, []))
-                        continue
-
-                if len(new_eq.sample.elements) == 1:
-                    for var, count in Counter(new_eq.template.elements).items():
-                        if count != 1:
-                            continue
-
-                        emptied_vars = new_eq.template.get_vars_set() - {var}
-
-                        can = True
-                        for vr in emptied_vars:
-                            subst = sb.EmptySubstitution(vr)
-                            if option.restriction is not None and not option.restriction.is_substitution_satisfies(
-                                    subst):
-                                can = False
-
-                        if not can:
-                            continue
-
-                        o = opt.Option(
-                            [sb.EmptySubstitution(vr) for vr in new_eq.template.get_vars_set() if vr != var],
-                            None
-                        )
-
-                        trivial_eq = o.apply_to(new_eq)
-                        if trivial_eq.is_solved:
-                            child_node.children.append(cn.CompressionNode(self._next_node_id(), trivial_eq, o, None, []))
+                can = True
+                for emptied_var in emptied_vars:
+                    subst = sb.EmptySubstitution(emptied_var)
+                    if option.restriction is not None and not option.restriction.is_substitution_satisfies(
+                            subst):
+                        can = False
 
+                if not can:
                     continue
 
-                self._solve(child_node, stats)
+                o = opt.Option(
+                    [sb.EmptySubstitution(emptied_var) for emptied_var in new_eq.template.get_vars_set()
+                     if emptied_var != var],
+                    None
+                )
+
+                trivial_eq = o.apply_to(new_eq)
+                if trivial_eq.is_solved:
+                    solution_node = cn.CompressionNode(self._next_node_id(), trivial_eq, o, None, [], child_node)
+                    child_node.children.append(solution_node)
+                    self._add_solution(parent_frame, child_node, solution_node)
+
+            return True
+
+        return False
+
+
+def _init_subtree_worker(cancel_event: multiprocessing.synchronize.Event):
+    global _cancel_event
+    _cancel_event = cancel_event
+
+
+def _solve_subtree(task: _SubtreeTask) -> _SubtreeResult:
+    """
+    Раскрывает поддерево в процессе-исполнителе
+    """
+    subtree_solver = Solver(
+        task.heuristics,
+        memo_size=task.memo_size,
+        symmetry=task.symmetry,
+        solutions_only=task.solutions_only,
+        policy=task.policy,
+        adaptive_heuristics=task.adaptive_heuristics,
+        profile=task.profile,
+        budget=task.budget,
+    )
+    subtree_solver._pair_compressor = task.pair_compressor
+    subtree_solver._block_compressor = task.block_compressor
+    subtree_solver._cancel_event = _cancel_event
+
+    frame = _SearchFrame(task.node, None, task.depth)
+    stats = SolverStats()
+    subtree_solver._set_profiler(profiling.Profiler(stats.phases) if task.profile else profiling.DISABLED)
+    subtree_solver._budget_tracker = task.budget.start() if not task.budget.is_unlimited else None
+    for _ in subtree_solver._search(frame, stats):
+        pass
+
+    return _SubtreeResult(task.node, frame.has_solution, stats)
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from recompression.models import compression_node as cn, equation as eq, var_restriction as vr
+
+# Маркер поддерева, в котором не нашлось ни одного решения
+UNSOLVABLE = 'UNSOLVABLE'
+
+Key = Hashable
+
+# дети узла, именование элементов его уравнения, число и глубина отброшенных потомков узла, либо UNSOLVABLE
+Entry = tuple[list[cn.CompressionNode], dict | None, int, int] | str
+
+
+def restriction_key(restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None) -> tuple | None:
+    """
+    Строит ключ ограничения, не зависящий от порядка простых ограничений
+
+    :param restriction: ограничение
+    :return: (множество простых ограничений, множество членов дизъюнкции или None)
+    """
+    if restriction is None:
+        return None
+
+    if isinstance(restriction, vr.RestrictionOR):
+        return frozenset(), frozenset((restriction.left, restriction.right))
+
+    if isinstance(restriction, vr.RestrictionAND):
+        restriction_or = restriction.restriction_or
+        return (
+            frozenset(restriction.simple_restrictions),
+            frozenset((restriction_or.left, restriction_or.right)) if restriction_or is not None else None,
+        )
+
+    return frozenset((restriction,)), None
+
+
+def equation_key(
+        equation: eq.Equation,
+        restriction: vr.RestrictionAND | vr.RestrictionOR | vr.Restriction | None,
+) -> tuple[bytes, bytes, tuple | None]:
+    return equation.template.ids.tobytes(), equation.sample.ids.tobytes(), restriction_key(restriction)
+
+
+class TranspositionTable:
+    """
+    Таблица уже разобранных уравнений: по ключу уравнения и ограничения хранит детей узла,
+    поддерево которого содержит решения, вместе с именованием элементов уравнения и числом и глубиной
+    отброшенных потомков узла, либо маркер UNSOLVABLE.
+    Размер таблицы ограничен, при переполнении вытесняются давно не использованные записи
+    """
+
+    def __init__(self, max_size: int):
+        if max_size <= 0:
+            raise ValueError('Размер таблицы должен быть положительным')
+
+        self._max_size = max_size
+        self._entries: OrderedDict[Key, Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Key) -> Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+
+        return entry
+
+    def put(self, key: Key, entry: Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
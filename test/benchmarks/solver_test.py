@@ -0,0 +1,47 @@
+import dataclasses
+
+import pytest
+
+from benchmarks.solver import Result, compare
+
+base = Result(
+    case='long_runs/4',
+    equation='XbY=aaaabaaaa',
+    heuristics='pref-suff',
+    time=0.1,
+    nodes=100,
+    depth=5,
+    solutions=4,
+    peak_memory=1000,
+)
+
+test_data = [
+    # рост в пределах порога
+    [{'nodes': 110, 'peak_memory': 1200}, []],
+    [{'nodes': 130}, ['long_runs/4 [pref-suff]: nodes 130, было 100 (+30%)']],
+    [{'depth': 7}, ['long_runs/4 [pref-suff]: depth 7, было 5 (+40%)']],
+    # малый абсолютный рост времени не считается регрессией
+    [{'time': 0.104}, []],
+    [{'time': 0.2}, ['long_runs/4 [pref-suff]: time 0.2, было 0.1 (+100%)']],
+    # число решений сравнивается точно, в обе стороны
+    [{'solutions': 5}, ['long_runs/4 [pref-suff]: решений 5, было 4']],
+    [{'solutions': 3, 'nodes': 50}, ['long_runs/4 [pref-suff]: решений 3, было 4']],
+]
+
+
+@pytest.mark.parametrize('changes,expected_regressions', test_data)
+def test_compare(changes, expected_regressions):
+    assert compare([dataclasses.replace(base, **changes)], [base], threshold=0.2) == expected_regressions
+
+
+def test_compare_keys():
+    extra = dataclasses.replace(base, case='long_runs/30')
+    missing = dataclasses.replace(base, case='long_runs/8')
+    other_family = dataclasses.replace(base, case='var_count/2')
+    other_heuristics = dataclasses.replace(base, heuristics='z3')
+
+    # случаи семейств и эвристик, которые не запускались, не считаются пропавшими
+    assert compare([base, extra], [base, missing, other_family, other_heuristics], threshold=0.2) == [
+        'long_runs/30 [pref-suff]: нет в сохраненных результатах',
+        'long_runs/8 [pref-suff]: нет в результатах запуска',
+    ]
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from main import BatchItem, parse_arguments, read_batch, run_batch, solve_batch_item
+from recompression import budget, solver
+from recompression.heuristics import prefix_suffix
+
+
+@pytest.mark.parametrize('output_depth', ['0', '-1'])
+def test_parse_arguments_output_depth(output_depth, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['main.py', 'XYX=abaab', '-output', 'tree.dot', '-output-depth', output_depth])
+
+    # ошибка выводится при разборе аргументов, до поиска
+    with pytest.raises(SystemExit):
+        parse_arguments()
+
+
+@pytest.mark.parametrize('flag,value', [
+    ['-limit', '-1'],
+    ['-memo', '-1'],
+    ['-max-nodes', '0'],
+    ['-max-nodes', '-1'],
+    ['-time-limit', '0'],
+    ['-timeout', '-1.5'],
+    ['-max-memory', '0'],
+    ['-max-memory', '-1'],
+])
+def test_parse_arguments_negative(flag, value, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['main.py', 'XYX=abaab', flag, value])
+
+    with pytest.raises(SystemExit):
+        parse_arguments()
+
+
+def test_read_batch(tmp_path):
+    path = tmp_path / 'batch.txt'
+    path.write_text('\n'.join([
+        'XYX=abaab',
+        '# комментарий',
+        '',
+        '{"id": 7, "template": "XYZ", "sample": "abcab"}',
+        '{"equation": "XX=abc"}',
+    ]), encoding='utf-8')
+
+    assert list(read_batch(str(path))) == [
+        BatchItem(1, 'XYX=abaab'),
+        BatchItem(4, 'XYZ=abcab', 7),
+        BatchItem(5, 'XX=abc'),
+    ]
+
+
+def test_read_batch_invalid_json(tmp_path):
+    path = tmp_path / 'batch.txt'
+    path.write_text('\n'.join([
+        'Xa=ba',
+        '{"equation": ',
+        '{"template": "XYZ"}',
+        '{"equation": "XX=abc"}',
+    ]), encoding='utf-8')
+
+    items = list(read_batch(str(path)))
+
+    # некорректная строка не останавливает чтение пакета
+    assert [(item.line, item.error is not None) for item in items] == [(1, False), (2, True), (3, True), (4, False)]
+    assert items[3] == BatchItem(4, 'XX=abc')
+
+
+def test_run_batch_invalid_line(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'batch.txt'
+    path.write_text('\n'.join(['Xa=ba', '{"equation": ', '{"id": 3, "equation": "XX=abab"}']), encoding='utf-8')
+    monkeypatch.setattr('sys.argv', ['main.py', '-pref-suff', '-batch', str(path)])
+    _, config = parse_arguments()
+
+    run_batch(config)
+
+    results = {result['line']: result for result in map(json.loads, capsys.readouterr().out.splitlines())}
+    assert results[1]['solutions'] == [{'X': 'b'}]
+    assert set(results[2]) == {'line', 'error'}
+    assert results[3]['solutions'] == [{'X': 'ab'}]
+
+
+test_data = [
+    [BatchItem(1, 'XYX=abaab', 'a'), {'solved': True, 'solutions': [{'X': 'ab', 'Y': 'a'}, {'X': '', 'Y': 'abaab'}]}],
+    [BatchItem(2, 'XX=abc'), {'solved': False, 'solutions': []}],
+    # ошибка одного сопоставления не останавливает пакет
+    [BatchItem(3, 'ab=ab'), {'solved': False}],
+]
+
+
+@pytest.mark.parametrize('item,expected', test_data)
+def test_solve_batch_item(item, expected):
+    result = solve_batch_item(solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]), item)
+
+    assert result['line'] == item.line
+    assert result.get('id') == item.id
+    assert result['solved'] == expected['solved']
+    if 'solutions' in expected:
+        assert sorted(map(str, result['solutions'])) == sorted(map(str, expected['solutions']))
+        assert result['nodes'] > 0
+    else:
+        assert 'error' in result
+
+
+def test_solve_batch_item_truncated():
+    s = solver.Solver([], budget=budget.Budget(time_limit=0.01))
+    result = solve_batch_item(s, BatchItem(1, 'XYZW=abcdab'))
+
+    # решения, найденные до остановки, выводятся
+    assert result['truncated'] == 'time'
+    assert result['nodes'] > 0
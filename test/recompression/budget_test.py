@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from recompression import budget as bg
+
+test_data = [
+    [bg.Budget(), 10 ** 6, None],
+    [bg.Budget(max_nodes=10), 9, None],
+    [bg.Budget(max_nodes=10), 10, bg.BudgetKind.NODES],
+    [bg.Budget(time_limit=0), 1, bg.BudgetKind.TIME],
+    [bg.Budget(deadline=time.time() - 1), 1, bg.BudgetKind.TIME],
+    [bg.Budget(time_limit=60, deadline=time.time() - 1), 1, bg.BudgetKind.TIME],
+    # число узлов проверяется раньше времени
+    [bg.Budget(max_nodes=1, time_limit=0), 1, bg.BudgetKind.NODES],
+]
+
+
+@pytest.mark.parametrize('budget,nodes,expected', test_data)
+def test_check(budget, nodes, expected):
+    assert budget.start().check(nodes) == expected
+
+
+def test_check_memory():
+    tracker = bg.Budget(max_memory=1).start()
+
+    # память проверяется раз в MEMORY_CHECK_PERIOD проверок
+    results = [tracker.check(1) for _ in range(bg.BudgetTracker.MEMORY_CHECK_PERIOD)]
+    assert results[:-1] == [None] * (bg.BudgetTracker.MEMORY_CHECK_PERIOD - 1)
+    assert results[-1] == bg.BudgetKind.MEMORY
+
+
+def test_get_remaining():
+    tracker = bg.Budget(max_nodes=100, time_limit=60, max_memory=1024).start()
+    time.sleep(0.01)
+
+    remaining = tracker.get_remaining(40, parts=4)
+    assert remaining.max_nodes == 15
+    # время задается сроком окончания, общим для всех частей
+    assert remaining.time_limit is None
+    assert time.time() < remaining.deadline < time.time() + 60
+    assert remaining.max_memory == 1024
+
+    assert tracker.get_remaining(200).max_nodes == 0
+    assert bg.Budget().start().get_remaining(40).is_unlimited
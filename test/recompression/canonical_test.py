@@ -0,0 +1,62 @@
+import pytest
+
+from recompression.canonical import Canonicalizer, Renaming
+from recompression.models import compression_node as cn, const as c, equation as eq, option as opt, var as v, \
+    var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+p1 = c.PairConst('a', 1)
+p2 = c.PairConst('a', 2)
+p3 = c.PairConst('b', 3)
+
+test_data = [
+    # переменные переименованы
+    [([X, a, Y], [a, a, b], None), ([Y, a, X], [a, a, b], None), True],
+    # версии сжатых констант переименованы
+    [([X, p1], [b, p1], None), ([X, p2], [b, p2], None), True],
+    [([X, p1], [p3, p1], None), ([X, p3], [p1, p3], None), True],
+    # ограничения переименованы вместе с переменными
+    [([X, Y], [a, b], vr.VarNotEmpty(X)), ([Y, X], [a, b], vr.VarNotEmpty(Y)), True],
+    # ограничение на отсутствующую в шаблоне переменную не учитывается
+    [([X, a], [a, a], vr.VarNotEmpty(Y)), ([X, a], [a, a], None), True],
+    # константы алфавита не переименовываются
+    [([X, a], [b, a], None), ([X, b], [a, b], None), False],
+    [([X, Y], [a, b], vr.VarNotEmpty(X)), ([X, Y], [a, b], vr.VarNotEmpty(Y)), False],
+    [([X, a, X], [a, a, a], None), ([X, a, Y], [a, a, a], None), False],
+]
+
+
+@pytest.mark.parametrize('first,second,is_same', test_data)
+def test(first, second, is_same):
+    canonicalizer = Canonicalizer()
+
+    first_form, _ = canonicalizer.canonicalize(eq.Equation(eq.Template(*first[0]), eq.Sample(*first[1])), first[2])
+    second_form, _ = canonicalizer.canonicalize(eq.Equation(eq.Template(*second[0]), eq.Sample(*second[1])), second[2])
+
+    assert (first_form == second_form) == is_same
+    assert (first_form.digest() == second_form.digest()) == is_same
+
+
+def test_renaming_copies_subtree():
+    canonicalizer = Canonicalizer()
+    source_eq = eq.Equation(eq.Template(X, a, Y), eq.Sample(b, a, b))
+    target_eq = eq.Equation(eq.Template(Y, a, X), eq.Sample(b, a, b))
+
+    child = cn.CompressionNode(2, eq.Equation(eq.Template(X, a, b), eq.Sample(b, a, b)), opt.Option(
+        [opt.PopRight(Y, b)], vr.VarNotEmpty(X),
+    ), None, [])
+
+    _, source_naming = canonicalizer.canonicalize(source_eq, None)
+    _, target_naming = canonicalizer.canonicalize(target_eq, None)
+
+    copy = Renaming(source_naming, target_naming).rename_node(child, lambda: 10)
+
+    assert copy.id == 10
+    assert copy.equation == eq.Equation(eq.Template(Y, a, b), eq.Sample(b, a, b))
+    assert copy.option.substitutions == [opt.PopRight(X, b)]
+    assert copy.option.restriction == vr.VarNotEmpty(Y)
@@ -0,0 +1,58 @@
+import types
+
+import pytest
+
+from recompression.get_empty_substitutions import get_empty_options
+from recompression.models import const as c, equation as eq, option as opt, substitution as sb, var as v, \
+    var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+Z = v.Var('Z')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+test_data = [
+    # переменные не стоят между константами пары
+    [[X, a, b, Y], None, [
+        opt.Option([], None),
+    ]],
+    [[a, X, b], None, [
+        opt.Option([], vr.VarNotEmpty(X)),
+        opt.Option([sb.EmptySubstitution(X)], None),
+    ]],
+    [[a, X, Y, b], None, [
+        opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None)),
+        opt.Option([sb.EmptySubstitution(X)], vr.VarNotEmpty(Y)),
+        opt.Option([sb.EmptySubstitution(Y)], vr.VarNotEmpty(X)),
+        opt.Option([sb.EmptySubstitution(X), sb.EmptySubstitution(Y)], None),
+    ]],
+    # ограничение родителя запрещает обнулять X
+    [[a, X, Y, b], opt.Option([], vr.VarNotEmpty(X)), [
+        opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None)),
+        opt.Option([sb.EmptySubstitution(Y)], vr.VarNotEmpty(X)),
+    ]],
+    # ограничение родителя запрещает обнулять X и Y одновременно: отбрасываются все такие подмножества
+    [[a, X, Y, Z, b], opt.Option([], vr.RestrictionOR(vr.VarNotEmpty(X), vr.VarNotEmpty(Y))), [
+        opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y), vr.VarNotEmpty(Z)], None)),
+        opt.Option([sb.EmptySubstitution(X)], vr.RestrictionAND([vr.VarNotEmpty(Y), vr.VarNotEmpty(Z)], None)),
+        opt.Option([sb.EmptySubstitution(Y)], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Z)], None)),
+        opt.Option([sb.EmptySubstitution(Z)], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None)),
+        opt.Option([sb.EmptySubstitution(X), sb.EmptySubstitution(Z)], vr.VarNotEmpty(Y)),
+        opt.Option([sb.EmptySubstitution(Y), sb.EmptySubstitution(Z)], vr.VarNotEmpty(X)),
+    ]],
+]
+
+
+@pytest.mark.parametrize('template_elements,parent_option,expected_options', test_data)
+def test(template_elements, parent_option, expected_options):
+    result = get_empty_options((a, b), eq.Template(*template_elements), parent_option)
+    # варианты строятся лениво
+    assert isinstance(result, types.GeneratorType)
+
+    result = list(result)
+    # первым идет вариант без обнулений
+    assert len(result[0].substitutions) == 0
+    assert len(result) == len(expected_options)
+    assert {o.get_key() for o in result} == {o.get_key() for o in expected_options}
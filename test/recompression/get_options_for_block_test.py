@@ -0,0 +1,89 @@
+import types
+
+import pytest
+
+from recompression.get_options_for_block import get_options_for_block
+from recompression.models import const as c, equation as eq, option as opt, substitution as sb, var as v, \
+    var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+
+def _kept(var: v.Var) -> list[vr.Restriction]:
+    return [vr.VarNotEmpty(var), vr.VarNotStartsWith(var, a), vr.VarNotEndsWith(var, a)]
+
+
+def _key(option: opt.Option) -> tuple:
+    restriction = option.restriction
+    if isinstance(restriction, vr.RestrictionAND):
+        restriction = (frozenset(restriction.simple_restrictions), restriction.restriction_or)
+
+    return frozenset(option.substitutions), restriction
+
+
+test_data = [
+    # блок образца уже есть в шаблоне: X пуста или не содержит a по краям
+    [[X, a, a], [a, a], None, [
+        opt.Option([sb.EmptySubstitution(X)], None),
+        opt.Option([], vr.RestrictionAND(_kept(X), None)),
+    ]],
+    # длины блоков ограничены длиной блока образца
+    [[X, b], [a, a, b], None, [
+        opt.Option([sb.EmptySubstitution(X)], None),
+        opt.Option([sb.BlockSubstitution(X, a, 2)], None),
+        opt.Option([sb.PopBlockLeft(X, a, 2)], vr.RestrictionAND(_kept(X), None)),
+        opt.Option([sb.PopBlockRight(X, a, 2)], vr.RestrictionAND(_kept(X), None)),
+        opt.Option([], vr.RestrictionAND(_kept(X), None)),
+    ]],
+    # ограничение родителя запрещает начинать с a
+    [[X, b], [a, a, b], opt.Option([], vr.VarNotStartsWith(X, a)), [
+        opt.Option([sb.EmptySubstitution(X)], vr.VarNotStartsWith(X, a)),
+        opt.Option([sb.PopBlockRight(X, a, 2)], vr.RestrictionAND(_kept(X), None)),
+        opt.Option([], vr.RestrictionAND(_kept(X), None)),
+    ]],
+    # ограничение родителя, выполненное подстановкой, снимается с новой переменной
+    [[b, X], [b, a, b], opt.Option([], vr.VarNotEndsWith(X, b)), [
+        opt.Option([sb.EmptySubstitution(X)], vr.VarNotEndsWith(X, b)),
+        opt.Option([sb.BlockSubstitution(X, a, 1)], None),
+        opt.Option([sb.PopBlockLeft(X, a, 1)], vr.RestrictionAND([*_kept(X), vr.VarNotEndsWith(X, b)], None)),
+        opt.Option([sb.PopBlockRight(X, a, 1)], vr.RestrictionAND(_kept(X), None)),
+        opt.Option([], vr.RestrictionAND([*_kept(X), vr.VarNotEndsWith(X, b)], None)),
+    ]],
+]
+
+
+@pytest.mark.parametrize('template_elements,sample_elements,parent_option,expected_options', test_data)
+def test(template_elements, sample_elements, parent_option, expected_options):
+    equation = eq.Equation(eq.Template(*template_elements), eq.Sample(*sample_elements))
+
+    result = list(get_options_for_block(equation, a, parent_option))
+
+    assert len(result) == len(expected_options)
+    assert set(map(_key, result)) == set(map(_key, expected_options))
+
+
+def test_long_block():
+    Z = v.Var('Z')
+    equation = eq.Equation(eq.Template(X, Y, Z), eq.Sample(*[a] * 30))
+
+    result = get_options_for_block(equation, a, None)
+
+    # варианты строятся лениво и только такие, в которых блоки шаблона совпадают с блоками образца
+    assert isinstance(result, types.GeneratorType)
+    blocks_only = [
+        option for option in result
+        if len(option.substitutions) == 3 and all(
+            isinstance(subst, (sb.BlockSubstitution, sb.EmptySubstitution)) for subst in option.substitutions
+        )
+    ]
+    # X=a^i, Y=a^j, Z=a^k, i+j+k=30, и все переменные пусты: в шаблоне не остается блоков, которые
+    # могли бы не совпасть с образцом, такой вариант отбрасывают эвристики
+    assert len(blocks_only) == 31 * 32 // 2 + 1
+    assert all(
+        sum(subst.count for subst in option.substitutions if isinstance(subst, sb.BlockSubstitution)) in (0, 30)
+        for option in blocks_only
+    )
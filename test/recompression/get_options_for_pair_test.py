@@ -0,0 +1,71 @@
+import types
+
+import pytest
+
+from recompression import get_options_for_pair as gofp
+from recompression.get_options_for_pair import get_options_for_pair
+from recompression.models import const as c, equation as eq, option as opt, substitution as sb, var as v, \
+    var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+test_data = [
+    # переменных нет, остается вариант родителя
+    [[a, b], [a, b], None, [
+        opt.Option([], None),
+    ]],
+    # переменная между константами пары
+    [[a, X, b], [a, a, b, b], None, [
+        opt.Option([sb.PopLeft(X, b), sb.PopRight(X, a)], None),
+        opt.Option([sb.PopLeft(X, b)], vr.VarNotEndsWith(X, a)),
+        opt.Option([sb.PopRight(X, a)], vr.VarNotStartsWith(X, b)),
+        opt.Option([], vr.RestrictionAND([vr.VarNotStartsWith(X, b), vr.VarNotEndsWith(X, a)], None)),
+    ]],
+    # соседние переменные
+    [[X, Y], [a, b], None, [
+        opt.Option([sb.PopRight(X, a), sb.PopLeft(Y, b)], None),
+        opt.Option([], vr.RestrictionOR(vr.VarNotEndsWith(X, a), vr.VarNotStartsWith(Y, b))),
+    ]],
+    # ограничение родителя отсекает часть вариантов
+    [[X, b, Y], [a, b, a, b], opt.Option([], vr.VarNotEndsWith(X, a)), [
+        opt.Option([], vr.VarNotEndsWith(X, a)),
+    ]],
+]
+
+
+@pytest.mark.parametrize('template_elements,sample_elements,parent_option,expected_options', test_data)
+def test(template_elements, sample_elements, parent_option, expected_options):
+    equation = eq.Equation(eq.Template(*template_elements), eq.Sample(*sample_elements))
+    parent_option = parent_option or opt.Option([], None)
+
+    result = get_options_for_pair(equation, (a, b), parent_option)
+    # варианты строятся лениво
+    assert isinstance(result, types.GeneratorType)
+
+    result = list(result)
+    assert len(result) == len(expected_options)
+    assert {o.get_key() for o in result} == {o.get_key() for o in expected_options}
+
+
+def test_parent_contradiction_prunes_prefix(monkeypatch):
+    equation = eq.Equation(eq.Template(a, X, b, Y, a, Y, b), eq.Sample(a, b, a, b))
+    parent_option = opt.Option([], vr.VarNotStartsWith(X, b))
+
+    extend = gofp._extend
+    prefixes = []
+
+    def spy_extend(acc, rest, start, r):
+        prefixes.extend(acc)
+        return extend(acc, rest, start, r)
+
+    monkeypatch.setattr(gofp, '_extend', spy_extend)
+    result = list(get_options_for_pair(equation, (a, b), parent_option))
+
+    assert len(result) > 0
+    assert len(prefixes) > 0
+    # начало набора, противоречащее родителю, не продолжается
+    assert all(len(parent_option.combine(prefix)) > 0 for prefix in prefixes)
@@ -0,0 +1,48 @@
+import pytest
+
+from recompression.heuristics.counting import CountingHeuristics
+from recompression.models import const as c, equation as eq, option as opt, var as v, var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+test_data = [
+    [[X, X], [a, a], None, True],
+    # нечетное число a не делится между двумя вхождениями X
+    [[X, X], [a, a, a], None, False],
+    [[X, a, X], [a, a, a], None, True],
+    # констант шаблона больше, чем в образце
+    [[X, b, b], [a, b], None, False],
+    [[X, Y], [a], None, True],
+    # обе переменные не пусты, а константа одна
+    [[X, Y], [a], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None), False],
+    # простой проверки недостаточно, системы решает z3
+    [[X, X, Y, Y, Y], [a], None, False],
+    [[X, X, Y, Y, Y], [a, a, a, a, a], None, True],
+    [[X, X, Y], [a, b, b], vr.VarNotEmpty(X), True],
+    [[X, X, Y], [a, b], vr.VarNotEmpty(X), False],
+]
+
+
+@pytest.mark.parametrize('template_elements,sample_elements,restriction,expected', test_data)
+def test(template_elements, sample_elements, restriction, expected):
+    heuristics = CountingHeuristics()
+    equation = eq.Equation(eq.Template(*template_elements), eq.Sample(*sample_elements))
+
+    # второй вызов берет результат из кеша
+    for _ in range(2):
+        assert heuristics.is_satisfable(equation, opt.Option([], restriction)) == expected
+
+
+def test_results_do_not_depend_on_check_order():
+    heuristics = CountingHeuristics()
+
+    results = [
+        heuristics.is_satisfable(eq.Equation(eq.Template(*tpl), eq.Sample(*spl)), opt.Option([], restriction))
+        for tpl, spl, restriction, _ in test_data
+    ]
+
+    assert results == [expected for *_, expected in test_data]
@@ -0,0 +1,34 @@
+import pytest
+
+from recompression.heuristics.length import LengthHeuristics
+from recompression.models import const as c, equation as eq, option as opt, var as v, var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+test_data = [
+    [[X, X], [a, b], None, True],
+    # нечетная длина не делится между двумя вхождениями X
+    [[X, X], [a, b, a], None, False],
+    # констант шаблона больше, чем элементов образца
+    [[X, a, b], [a, b], vr.VarNotEmpty(X), False],
+    [[X, a, b], [a, b], None, True],
+    # 2|X| + 3|Y| = 1
+    [[X, X, Y, Y, Y], [a], None, False],
+    # 2|X| + 3|Y| = 5, |X| >= 1, |Y| >= 1
+    [[X, X, Y, Y, Y], [a, b, a, b, a], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None), True],
+    # 2|X| + 3|Y| = 4, |Y| >= 1
+    [[X, X, Y, Y, Y], [a, b, a, b], vr.VarNotEmpty(Y), False],
+    # без переменных длины должны совпадать
+    [[a], [a, b], None, False],
+]
+
+
+@pytest.mark.parametrize('template_elements,sample_elements,restriction,expected', test_data)
+def test(template_elements, sample_elements, restriction, expected):
+    equation = eq.Equation(eq.Template(*template_elements), eq.Sample(*sample_elements))
+
+    assert LengthHeuristics().is_satisfable(equation, opt.Option([], restriction)) == expected
@@ -0,0 +1,44 @@
+import pytest
+
+from recompression.heuristics import parikh
+from recompression.models import const as c, equation as eq, option as opt, var as v, var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+test_data = [
+    [[X, X], [a, a], None, True],
+    # нечетное число a не делится между двумя вхождениями X
+    [[X, X], [a, a, a], None, False],
+    # констант шаблона больше, чем в образце
+    [[X, b, b], [a, b], None, False],
+    # без переменных остаток должен быть нулевым
+    [[a], [a, a], None, False],
+    # Y забирает все оставшиеся константы
+    [[X, X, Y], [a, b, b], None, True],
+    # обе переменные не пусты, а константа одна
+    [[X, Y], [a], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None), False],
+    # 2x + 2y = 3 не решается в целых числах
+    [[X, X, Y, Y], [a, a, a], None, False],
+    # Y может забрать все константы, только если X пуста, а X не пуста - нужен z3
+    [[X, X, Y], [a, b, b], vr.VarNotEmpty(X), None],
+    [[X, X, Y, Y, Y], [a], None, None],
+]
+
+
+@pytest.mark.parametrize('template_elements,sample_elements,restriction,expected', test_data)
+def test_decide(template_elements, sample_elements, restriction, expected):
+    equation = eq.Equation(eq.Template(*template_elements), eq.Sample(*sample_elements))
+
+    assert parikh.decide(parikh.get_parikh_system(equation, opt.Option([], restriction))) == expected
+
+
+@pytest.mark.parametrize('template_elements,sample_elements,restriction,expected', test_data)
+def test_heuristics(template_elements, sample_elements, restriction, expected):
+    equation = eq.Equation(eq.Template(*template_elements), eq.Sample(*sample_elements))
+
+    # нерешенные простой проверкой ветви не отбрасываются
+    assert parikh.ParikhHeuristics().is_satisfable(equation, opt.Option([], restriction)) == (expected is not False)
@@ -0,0 +1,103 @@
+import functools
+
+import pytest
+
+from main import collect_tree_stats, parse_equation
+from recompression import solution, solver
+from recompression.heuristics import counting, heuristics as h, length, prefix_suffix, scheduler as hs
+
+
+class _Named(h.Heurisitcs):
+    def __init__(self, name: str):
+        self._name = name
+
+    def get_name(self) -> str:
+        return self._name
+
+
+def _record(scheduler: hs.HeuristicsScheduler, heuristic: h.Heurisitcs, elapsed: float, calls: int, drops: int = 0):
+    for i in range(calls):
+        scheduler.record(heuristic, 0, i < drops, elapsed)
+
+
+def test_not_adaptive_keeps_order():
+    heuristics = [_Named('slow'), _Named('fast')]
+    scheduler = hs.HeuristicsScheduler(heuristics, reorder_period=1)
+    _record(scheduler, heuristics[0], 1.0, 1)
+    _record(scheduler, heuristics[1], 0.001, 1, 1)
+
+    assert list(scheduler.get_heuristics(1)) == heuristics
+
+
+def test_reorder_by_cost_per_drop():
+    slow, fast, useless = _Named('slow'), _Named('fast'), _Named('useless')
+    scheduler = hs.HeuristicsScheduler([useless, slow, fast], adaptive=True, reorder_period=1)
+    # slow отбрасывает чаще, но на одну отброшенную ветвь тратит больше времени, чем fast
+    _record(scheduler, slow, 0.1, 10, 5)
+    _record(scheduler, fast, 0.01, 10, 1)
+    _record(scheduler, useless, 0.001, 10)
+
+    assert list(scheduler.get_heuristics(1)) == [fast, slow, useless]
+
+
+def test_skip_expensive_heuristic_without_drops():
+    cheap, expensive = _Named('cheap'), _Named('expensive')
+    scheduler = hs.HeuristicsScheduler(
+        [cheap, expensive], adaptive=True, reorder_period=1, min_depth_calls=2, probe_period=3,
+    )
+    _record(scheduler, cheap, 0.001, 1, 1)
+
+    for depth in (1, 2):
+        for _ in range(2):
+            scheduler.record(expensive, depth, depth == 2, 1.0)
+
+    # на глубине 1 эвристика ничего не отбросила и запускается только на каждой третьей проверке
+    assert [list(scheduler.get_heuristics(1)) for _ in range(3)] == [[cheap], [cheap], [cheap, expensive]]
+    # на глубине 2 эвристика отбрасывала ветви
+    assert list(scheduler.get_heuristics(2)) == [cheap, expensive]
+
+
+def test_not_run_heuristic_does_not_make_others_expensive():
+    fresh, ran = _Named('fresh'), _Named('ran')
+    scheduler = hs.HeuristicsScheduler([ran, fresh], adaptive=True, reorder_period=1, min_depth_calls=1)
+    scheduler.record(ran, 1, False, 1.0)
+
+    # fresh еще не запускалась и ставится первой, а ran не считается дорогой
+    assert [list(scheduler.get_heuristics(1)) for _ in range(2)] == [[fresh, ran], [fresh, ran]]
+
+
+def test_no_heuristics():
+    scheduler = hs.HeuristicsScheduler([], adaptive=True, reorder_period=1)
+
+    assert list(scheduler.get_heuristics(1)) == []
+
+    root, _ = solver.Solver([], adaptive_heuristics=True).solve(parse_equation('XYZ=abcab'))
+    assert len(_get_assignments(root)) > 0
+
+
+def _get_assignments(root) -> set[tuple]:
+    return {
+        tuple(sorted((str(var), ''.join(str(el) for el in value)) for var, value in assignment.items()))
+        for assignment in map(solution.get_assignment, solution.get_solution_paths(root))
+    }
+
+
+@pytest.mark.parametrize('equation_raw', ['XYX=abaab', 'ZbXYbX=abcab', 'YX=ccaaabba'])
+def test_adaptive_keeps_solutions(equation_raw, monkeypatch):
+    def create_heuristics():
+        return [counting.CountingHeuristics(), length.LengthHeuristics(), prefix_suffix.PrefixSuffixHeuristics()]
+
+    root, _ = solver.Solver(create_heuristics()).solve(parse_equation(equation_raw))
+
+    # порядок пересчитывается на каждой проверке, а эвристики пропускаются после первого бесполезного запуска
+    monkeypatch.setattr(hs, 'HeuristicsScheduler', functools.partial(
+        hs.HeuristicsScheduler, reorder_period=1, min_depth_calls=1, probe_period=2,
+    ))
+    adaptive_root, adaptive_stats = solver.Solver(create_heuristics(), adaptive_heuristics=True).solve(
+        parse_equation(equation_raw),
+    )
+
+    assert sum(map(len, adaptive_stats.heuristics_timings.values())) > 0
+    assert _get_assignments(adaptive_root) == _get_assignments(root)
+    # пропущенные эвристики оставляют лишние ветви, но не отбрасывают нужные
+    assert collect_tree_stats(adaptive_root).nodes_count >= collect_tree_stats(root).nodes_count
@@ -0,0 +1,67 @@
+import pytest
+
+from recompression.models import actions as ac, compression_node as cn, const as c, equation as eq, option as opt, \
+    substitution as sb, var as v
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+ab = c.PairConst('a', 100)
+a_block = c.BlockConst('a', 101)
+
+test_data = [
+    # Y=bY, затем сжатие пары ab
+    [eq.Equation(eq.Template(X, a, Y), eq.Sample(a, a, b, a)), opt.Option([sb.PopLeft(Y, b)], None),
+     (ac.CompressPairAction((a, b)), ab),
+     eq.Equation(eq.Template(X, ab, Y), eq.Sample(a, ab, a))],
+    # X=Xa, затем сжатие блоков a
+    [eq.Equation(eq.Template(X, a, Y), eq.Sample(a, a, b, a)), opt.Option([sb.PopRight(X, a)], None),
+     (ac.CompressBlockAction(a, 2, []), a_block),
+     eq.Equation(eq.Template(X, c.BlockConst('a', 101, 2), Y), eq.Sample(c.BlockConst('a', 101, 2), b, a))],
+    # узел без сжатия
+    [eq.Equation(eq.Template(X, a, Y), eq.Sample(a, b)), opt.Option([sb.EmptySubstitution(X)], None), None,
+     eq.Equation(eq.Template(a, Y), eq.Sample(a, b))],
+]
+
+
+@pytest.mark.parametrize('parent_equation,option,compression_action,expected', test_data)
+def test_replay(parent_equation, option, compression_action, expected):
+    root = cn.CompressionNode.empty(parent_equation)
+    child = cn.CompressionNode(2, expected, option, compression_action, [], root)
+    grandchild = cn.CompressionNode(3, expected, None, None, [], child)
+    root.children.append(child)
+    child.children.append(grandchild)
+
+    assert child.replay(parent_equation) == expected
+
+    child.release_equation()
+    grandchild.release_equation()
+    assert child.equation == expected
+    assert grandchild.equation == expected
+    assert grandchild.get_equation(expected) == expected
+
+    # корень не освобождается: по нему восстанавливаются остальные узлы
+    root.release_equation()
+    assert root.equation == parent_equation
+
+
+def test_prune():
+    equation = eq.Equation(eq.Template(X, Y), eq.Sample(a, b))
+    solved = eq.Equation(eq.Template(a, b), eq.Sample(a, b))
+
+    root = cn.CompressionNode.empty(equation)
+    dead = cn.CompressionNode(2, equation, None, None, [], root)
+    alive = cn.CompressionNode(3, equation, None, None, [], root)
+    solution = cn.CompressionNode(4, solved, None, None, [], alive)
+    root.children.extend([dead, alive])
+    alive.children.append(solution)
+
+    # поддерево dead уже обрезано: в нем было еще два узла глубиной до двух уровней
+    dead.pruned_nodes, dead.pruned_depth = 2, 2
+    root.prune()
+
+    assert root.children == [alive]
+    assert (root.pruned_nodes, root.pruned_depth) == (3, 3)
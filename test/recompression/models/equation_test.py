@@ -0,0 +1,152 @@
+import pickle
+
+import pytest
+
+from recompression.models import const as c, equation as eq, substitution as sb, var as v
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+p = c.PairConst('a', 1)
+
+test_data = [
+    # пара не встречается
+    [[X, a, Y], (a, b), [X, a, Y]],
+    # одно вхождение
+    [[X, a, b, Y], (a, b), [X, p, Y]],
+    # несколько вхождений подряд
+    [[a, b, a, b, X], (a, b), [p, p, X]],
+    # пара из переменной и константы не сжимается
+    [[X, b, a, b], (a, b), [X, b, p]],
+]
+
+
+@pytest.mark.parametrize('template_elements,pair,expected_elements', test_data)
+def test_with_replaced_pair(template_elements, pair, expected_elements):
+    tpl = eq.Template(*template_elements)
+
+    result = tpl.with_replaced_pair(pair, p)
+
+    assert result == eq.Template(*expected_elements)
+    assert list(result.elements) == expected_elements
+
+
+def test_ids_are_interned():
+    tpl = eq.Template(X, a, X, b)
+    spl = eq.Sample(a, b, a)
+
+    assert tpl.ids[0] == tpl.ids[2] < 0
+    assert tpl.ids[1] == spl.ids[0] == spl.ids[2] > 0
+    assert tpl.ids[3] == spl.ids[1]
+
+
+def test_pickle_restores_elements():
+    equation = eq.Equation(eq.Template(X, p, Y), eq.Sample(a, p, b))
+
+    restored = pickle.loads(pickle.dumps(equation))
+
+    assert restored == equation
+    assert list(restored.template.elements) == [X, p, Y]
+
+
+substitutions_test_data = [
+    # подстановка переменной, которой нет в шаблоне
+    [[X, a], [sb.PopLeft(Y, a)], [X, a]],
+    # вынесение константы слева и справа у одной переменной
+    [[X, a, X], [sb.PopLeft(X, b), sb.PopRight(X, a)], [b, X, a, a, b, X, a]],
+    # опустошение одной переменной и вынесение у другой
+    [[X, Y, X], [sb.EmptySubstitution(X), sb.PopRight(Y, b)], [Y, b]],
+    # вынесение после опустошения ничего не меняет
+    [[X, Y], [sb.EmptySubstitution(X), sb.PopLeft(X, a)], [Y]],
+    # вынесение блоков слева и справа
+    [[X, b, X], [sb.PopBlockLeft(X, a, 2), sb.PopBlockRight(X, a, 1)], [a, a, X, a, b, a, a, X, a]],
+    # переменная целиком состоит из блока
+    [[X, b, Y], [sb.BlockSubstitution(X, a, 3)], [a, a, a, b, Y]],
+]
+
+
+@pytest.mark.parametrize('template_elements,substs,expected_elements', substitutions_test_data)
+def test_apply_substitutions(template_elements, substs, expected_elements):
+    tpl = eq.Template(*template_elements)
+
+    sequential = tpl
+    for subst in substs:
+        sequential = sequential.apply_substitution(subst)
+
+    assert list(tpl.apply_substitutions(substs).elements) == expected_elements
+    assert sequential == tpl.apply_substitutions(substs)
+
+
+blocks_test_data = [
+    # блоков нет
+    [[a, b, a], [a, b, a]],
+    # блок длины 1 не сжимается
+    [[a, b, b], [a, c.BlockConst('b', 1, 2)]],
+    # блоки разной длины одной константы
+    [[b, b, a, b, b, b], [c.BlockConst('b', 1, 2), a, c.BlockConst('b', 1, 3)]],
+]
+
+
+@pytest.mark.parametrize('sample_elements,expected_elements', blocks_test_data)
+def test_with_replaced_blocks(sample_elements, expected_elements):
+    spl = eq.Sample(*sample_elements)
+
+    assert list(spl.with_replaced_blocks(b, c.BlockConst('b', 1)).elements) == expected_elements
+
+
+Z = v.Var('Z')
+
+var_groups_test_data = [
+    [[X, Y, X], [(eq.VarGroupType.GENERIC, 0, 3), (eq.VarGroupType.LEFT, 1, 2), (eq.VarGroupType.RIGHT, 0, 2),
+                 (eq.VarGroupType.LEFT_RIGHT, 0, 3)]],
+    # группа ограничена константами
+    [[a, X, Y, Z, X, a], [(eq.VarGroupType.GENERIC, 1, 4), (eq.VarGroupType.LEFT, 2, 3),
+                          (eq.VarGroupType.RIGHT, 1, 3), (eq.VarGroupType.LEFT_RIGHT, 1, 4)]],
+    # у LEFT_RIGHT обрезаны суффикс, префикс и обе стороны
+    [[X, Y, Z, X, Y, Z], [(eq.VarGroupType.GENERIC, 0, 6), (eq.VarGroupType.LEFT, 3, 3),
+                          (eq.VarGroupType.RIGHT, 0, 3), (eq.VarGroupType.LEFT_RIGHT, 2, 4),
+                          (eq.VarGroupType.LEFT_RIGHT, 0, 4), (eq.VarGroupType.LEFT_RIGHT, 1, 4)]],
+    # две группы, вторая из одной переменной
+    [[X, Y, X, Y, X, a, Y], [(eq.VarGroupType.GENERIC, 0, 5), (eq.VarGroupType.LEFT, 3, 2),
+                             (eq.VarGroupType.RIGHT, 0, 2), (eq.VarGroupType.LEFT_RIGHT, 2, 3),
+                             (eq.VarGroupType.LEFT_RIGHT, 0, 3), (eq.VarGroupType.LEFT_RIGHT, 1, 3),
+                             (eq.VarGroupType.GENERIC, 6, 1)]],
+    [[a, b], []],
+]
+
+
+@pytest.mark.parametrize('template_elements,expected', var_groups_test_data)
+def test_get_var_groups(template_elements, expected):
+    tpl = eq.Template(*template_elements)
+
+    # второй вызов берет группы из кеша
+    for _ in range(2):
+        assert tpl.get_var_groups() == expected
+
+
+index_test_data = [
+    # сжатие пары рядом с блоками
+    [[a, a, b, a, b, b, b], [('pair', (a, b))]],
+    # соседние вхождения пары образуют блок новой константы
+    [[a, b, a, b, a, b], [('pair', (a, b)), ('block', p)]],
+    [[b, b, a, b, b, a, a, a], [('block', b), ('pair', (a, c.BlockConst('b', 1, 2)))]],
+]
+
+
+@pytest.mark.parametrize('sample_elements,compressions', index_test_data)
+def test_sample_index_is_updated(sample_elements, compressions):
+    spl = eq.Sample(*sample_elements)
+    spl.get_pairs()
+
+    for kind, arg in compressions:
+        if kind == 'pair':
+            spl = spl.with_replaced_pair(arg, p)
+        else:
+            spl = spl.with_replaced_blocks(arg, c.BlockConst(arg.sym, 1))
+
+        # индекс сжатого образца совпадает с построенным заново
+        fresh = eq.Sample.from_ids(spl.ids)
+        assert spl.get_pairs() == fresh.get_pairs()
+        assert spl.get_blocks() == fresh.get_blocks()
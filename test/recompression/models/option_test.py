@@ -0,0 +1,44 @@
+import pytest
+
+from recompression.models import const as c, option as opt, substitution as sb, var as v, var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+test_data = [
+    [opt.Option([], vr.VarNotEmpty(X)), opt.Option([], vr.VarNotEmpty(Y)),
+     [opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None))]],
+    # подстановка противоречит ограничению
+    [opt.Option([sb.PopLeft(X, a)], None), opt.Option([], vr.VarNotStartsWith(X, a)), []],
+    # X=aX делает X непустой
+    [opt.Option([sb.PopLeft(X, a)], None), opt.Option([], vr.VarNotEmpty(X)), [opt.Option([sb.PopLeft(X, a)], None)]],
+    # подстановка нарушает одну сторону дизъюнкции
+    [opt.Option([sb.PopRight(X, b)], None),
+     opt.Option([], vr.RestrictionOR(vr.VarNotEndsWith(X, b), vr.VarNotEmpty(Y))),
+     [opt.Option([sb.PopRight(X, b)], vr.VarNotEmpty(Y))]],
+    # две дизъюнкции раскрываются в четыре варианта, одинаковые стороны склеиваются
+    [opt.Option([], vr.RestrictionOR(vr.VarNotEmpty(X), vr.VarNotEmpty(Y))),
+     opt.Option([], vr.RestrictionOR(vr.VarNotEmpty(X), vr.VarNotStartsWith(Y, a))),
+     [opt.Option([], vr.VarNotEmpty(X)),
+      opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotStartsWith(Y, a)], None)),
+      opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(Y), vr.VarNotEmpty(X)], None)),
+      opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(Y), vr.VarNotStartsWith(Y, a)], None))]],
+    # дизъюнкция выполнена одним из простых ограничений
+    [opt.Option([], vr.VarNotEmpty(X)),
+     opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(Y)], vr.RestrictionOR(vr.VarNotEmpty(X), vr.VarNotEmpty(Y)))),
+     [opt.Option([], vr.RestrictionAND([vr.VarNotEmpty(X), vr.VarNotEmpty(Y)], None))]],
+]
+
+
+def _key(option: opt.Option):
+    restriction = vr.RestrictionMask.from_restriction(option.restriction)
+    return frozenset(option.substitutions), restriction
+
+
+@pytest.mark.parametrize('first,second,expected', test_data)
+def test_combine(first, second, expected):
+    # порядок простых ограничений в результате не важен
+    assert sorted(map(str, map(_key, first.combine(second)))) == sorted(map(str, map(_key, expected)))
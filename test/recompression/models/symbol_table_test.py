@@ -0,0 +1,17 @@
+from recompression.models import const as c, symbol_table as st, var as v
+
+X = v.Var('X')
+
+a = c.AlphabetConst('a')
+b = c.AlphabetConst('b')
+
+
+def test_reset():
+    # общая таблица не сбрасывается: ее идентификаторы хранят уравнения других тестов
+    table = st.SymbolTable()
+    table.get_ids([a, b, X])
+    table.reset()
+
+    assert table.find_id(a) is None
+    assert list(table.get_ids([b, X])) == [1, -1]
+    assert table.get_element(1) == b
@@ -0,0 +1,26 @@
+from recompression.models import const as c, option as opt, substitution as sb, var as v, var_restriction as vr
+
+X = v.Var('X')
+Y = v.Var('Y')
+
+a = c.AlphabetConst('a')
+
+
+def test_reset():
+    atoms = list(vr._atoms)
+    try:
+        vr.get_atom_mask(vr.VarNotEmpty(X))
+        vr.reset()
+
+        # после сброса биты выдаются заново с младшего
+        assert vr.get_atom_mask(vr.VarNotStartsWith(Y, a)) == 1
+        assert vr.get_substitutions_masks([sb.PopLeft(Y, a)]) == (1, 2)
+
+        combined = opt.Option([], vr.VarNotEmpty(X)).combine(opt.Option([sb.PopLeft(Y, a)], None))
+        assert combined == [opt.Option([sb.PopLeft(Y, a)], vr.VarNotEmpty(X))]
+    finally:
+        # биты остальных ограничений восстанавливаются в прежнем порядке: маски,
+        # сохраненные в вариантах других тестов, остаются верными
+        vr.reset()
+        for atom in atoms:
+            vr.get_atom_mask(atom)
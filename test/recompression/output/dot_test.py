@@ -0,0 +1,87 @@
+import re
+
+import pytest
+
+from main import collect_tree_stats, parse_equation
+from recompression import solver
+from recompression.heuristics import prefix_suffix
+from recompression.output import dot, tree_image
+
+test_data = [
+    'XYX=abaab',
+    'ZbXYbX=abcab',
+    # решений нет
+    'XbX=aaaabaaaaa',
+]
+
+
+def _solve(equation_raw: str, **options):
+    root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()], **options).solve(parse_equation(equation_raw))
+    return root
+
+
+def _parse(lines: list[str]) -> tuple[list[str], list[str], list[str]]:
+    """
+    :return: узлы дерева, узлы-сводки и ребра
+    """
+    nodes = [line for line in lines if re.match(r'\s*n\d+ \[', line)]
+    summaries = [line for line in lines if re.match(r'\s*s\d+ \[', line)]
+    edges = [line for line in lines if '->' in line]
+    return nodes, summaries, edges
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+@pytest.mark.parametrize('options', [{}, {'memo_size': 100}])
+def test_write(equation_raw, options):
+    root = _solve(equation_raw, **options)
+    lines = list(dot.DotWriter().iter_lines(root))
+    nodes, summaries, _ = _parse(lines)
+
+    assert lines[0] == 'strict digraph tree {' and lines[-1] == '}'
+    # общие поддеревья выводятся один раз
+    assert len(nodes) == collect_tree_stats(root).nodes_count
+    assert len(summaries) == 0
+    assert sum('fillcolor=lightgreen' in line for line in nodes) == collect_tree_stats(root).solution_nodes_count
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+def test_collapse_failed(equation_raw):
+    root = _solve(equation_raw)
+    pruned_root = _solve(equation_raw, solutions_only=True)
+    stats = collect_tree_stats(root)
+
+    for tree in (root, pruned_root):
+        nodes, summaries, edges = _parse(list(dot.DotWriter(collapse_failed=True).iter_lines(tree)))
+        collapsed = sum(int(re.search(r'Узлов без решений: (\d+)', line).group(1)) for line in summaries)
+
+        # выводятся только пути к решениям, остальные узлы посчитаны в сводках. Тупиком может быть только
+        # корень нерешаемого уравнения, все дети которого отброшены решателем
+        assert len(nodes) + collapsed == stats.nodes_count
+        assert all('color=red shape=box' not in line for line in nodes[1:])
+        assert len(edges) == len(nodes) - 1 + len(summaries)
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+@pytest.mark.parametrize('max_depth', [1, 2, 3])
+def test_max_depth(equation_raw, max_depth):
+    root = _solve(equation_raw)
+    nodes, summaries, _ = _parse(list(dot.DotWriter(max_depth=max_depth).iter_lines(root)))
+    hidden = sum(int(re.search(r'Не показано узлов: (\d+)', line).group(1)) for line in summaries)
+
+    expected_nodes = 0
+    level = [root]
+    for _ in range(max_depth):
+        expected_nodes += len(level)
+        level = [child for node in level for child in node.children]
+
+    assert len(nodes) == expected_nodes
+    assert len(nodes) + hidden == collect_tree_stats(root).nodes_count
+
+
+def test_generate_dot(tmp_path):
+    root = _solve('XYX=abaab')
+    path = tmp_path / 'tree.dot'
+
+    tree_image.TreeImage(collapse_failed=True).generate(str(path), root)
+
+    assert path.read_text(encoding='utf-8').splitlines() == list(dot.DotWriter(collapse_failed=True).iter_lines(root))
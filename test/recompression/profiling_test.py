@@ -0,0 +1,58 @@
+import pytest
+
+from recompression import profiling
+
+
+def _options(n: int):
+    yield from range(n)
+
+
+def test_disabled():
+    assert profiling.DISABLED.wrap('phase', _options) is _options
+    assert profiling.DISABLED.wrap_iter('phase', _options) is _options
+
+
+test_data = [
+    # ленивый этап: вызов - один проход, элементы - полученные элементы
+    [[3, 0, 2], 3, 5],
+    [[], 0, 0],
+]
+
+
+@pytest.mark.parametrize('sizes,calls,items', test_data)
+def test_wrap_iter(sizes, calls, items):
+    phases = {}
+    options = profiling.Profiler(phases).wrap_iter('options', _options)
+
+    for size in sizes:
+        assert list(options(size)) == list(range(size))
+
+    if calls == 0:
+        assert phases == {}
+        return
+
+    assert phases['options'].calls == calls
+    assert phases['options'].items == items
+    assert phases['options'].max_time <= phases['options'].total_time
+
+
+def test_wrap():
+    phases = {}
+    add = profiling.Profiler(phases).wrap('add', lambda a, b: a + b)
+
+    assert add(1, 2) == 3
+    assert add(2, b=3) == 5
+    assert phases['add'].calls == 2
+    assert phases['add'].items == 0
+
+
+def test_merge():
+    stats = profiling.PhaseStats()
+    stats.add(0.5, 2)
+    other = profiling.PhaseStats()
+    other.add(1, 1)
+    other.add(0.25)
+
+    stats.merge(other)
+
+    assert stats == profiling.PhaseStats(calls=3, total_time=1.75, max_time=1, items=3)
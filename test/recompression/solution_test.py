@@ -0,0 +1,29 @@
+import pytest
+
+from main import parse_equation
+from recompression import solution, solver
+from recompression.heuristics import prefix_suffix
+
+test_data = [
+    ['XYX=abaab', [{'X': 'ab', 'Y': 'a'}, {'X': '', 'Y': 'abaab'}]],
+    ['XbX=aaaabaaaa', [{'X': 'aaaa'}]],
+    ['ZbXYbX=abcab', [{'X': '', 'Y': 'ca', 'Z': 'a'}]],
+    # блоки раскрываются в повторения константы
+    ['XaY=aaaa', [{'X': 'a' * i, 'Y': 'a' * (3 - i)} for i in range(4)]],
+    ['XX=abc', []],
+]
+
+
+@pytest.mark.parametrize('equation_raw,expected_assignments', test_data)
+def test(equation_raw, expected_assignments):
+    root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+
+    assignments = []
+    for path in solution.get_solution_paths(root):
+        assert path[0] is root
+        assert path[-1].equation.is_solved
+
+        assignment = solution.get_assignment(path)
+        assignments.append({str(var): ''.join(str(el) for el in value) for var, value in assignment.items()})
+
+    assert {tuple(sorted(a.items())) for a in assignments} == {tuple(sorted(a.items())) for a in expected_assignments}
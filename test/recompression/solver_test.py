@@ -0,0 +1,334 @@
+import itertools
+import multiprocessing
+import time
+
+import pytest
+
+from main import collect_tree_stats, parse_equation
+from recompression import budget, profiling, search, solution, solver
+from recompression.compress_block import BlockCompressor
+from recompression.compress_pair import PairCompressor
+from recompression.heuristics import counting, prefix_suffix
+from recompression.models import actions as ac, compression_node as cn
+
+test_data = [
+    'XYX=abaab',
+    'XYZ=abcd',
+    'ZbXYbX=abcab',
+]
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+def test(equation_raw):
+    stats = []
+    for policy in search.SearchPolicy:
+        root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()], policy=policy).solve(
+            parse_equation(equation_raw),
+        )
+        stats.append(collect_tree_stats(root))
+
+    # порядок раскрытия узлов не влияет на итоговое дерево
+    assert all(s == stats[0] for s in stats)
+    assert stats[0].solution_nodes_count > 0
+
+
+# числа узлов и узлов-решений в деревьях, которые строил рекурсивный решатель до перехода на явную границу поиска
+recursive_test_data = [
+    ['XYZ=abcd', 277, 117],
+    ['ZbXYbX=abcab', 9, 1],
+    ['XY=abc', 10, 4],
+    ['YXbZ=abcba', 82, 12],
+]
+
+
+@pytest.mark.parametrize('equation_raw,nodes_count,solution_nodes_count', recursive_test_data)
+@pytest.mark.parametrize('policy', list(search.SearchPolicy))
+def test_recursive_solver_counts(equation_raw, nodes_count, solution_nodes_count, policy):
+    root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()], policy=policy).solve(
+        parse_equation(equation_raw),
+    )
+
+    stats = collect_tree_stats(root)
+    assert stats.nodes_count == nodes_count
+    assert stats.solution_nodes_count == solution_nodes_count
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+def test_parallel(equation_raw):
+    sequential_root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+
+    roots = []
+    for _ in range(2):
+        root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()], workers=2, parallel_threshold=0).solve(
+            parse_equation(equation_raw),
+        )
+        roots.append(root)
+
+    assert collect_tree_stats(roots[0]) == collect_tree_stats(sequential_root)
+    # идентификаторы узлов и версии констант не зависят от порядка завершения процессов
+    assert str(roots[0]) == str(roots[1])
+
+
+def test_cancelled_subtree(monkeypatch):
+    cancel_event = multiprocessing.Event()
+    cancel_event.set()
+    monkeypatch.setattr(solver, '_cancel_event', cancel_event)
+
+    root = cn.CompressionNode.empty(parse_equation('XYZ=abcab'))
+    result = solver._solve_subtree(solver._SubtreeTask(
+        heuristics=[],
+        adaptive_heuristics=False,
+        profile=False,
+        budget=budget.Budget(),
+        memo_size=0,
+        symmetry=False,
+        solutions_only=False,
+        policy=search.SearchPolicy.DFS,
+        node=root,
+        depth=0,
+        pair_compressor=PairCompressor(),
+        block_compressor=BlockCompressor(),
+    ))
+
+    # основной процесс отменил поиск: процесс-исполнитель не раскрывает поддерево
+    assert result.node.children == []
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+def test_adaptive_heuristics(equation_raw):
+    heuristics = [counting.CountingHeuristics(), prefix_suffix.PrefixSuffixHeuristics()]
+    root, _ = solver.Solver(heuristics).solve(parse_equation(equation_raw))
+    adaptive_root, _ = solver.Solver(heuristics, adaptive_heuristics=True).solve(parse_equation(equation_raw))
+
+    # пропуск эвристик может оставить в дереве лишние ветви, но не теряет решений
+    assert collect_tree_stats(adaptive_root).solution_nodes_count == collect_tree_stats(root).solution_nodes_count
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+def test_solve_iter(equation_raw):
+    root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+
+    s = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()])
+    solutions = list(s.solve_iter(parse_equation(equation_raw)))
+    assert len(solutions) == collect_tree_stats(root).solution_nodes_count
+
+    for path in solutions:
+        assert path[-1].equation.is_solved
+        assert all(child in node.children for node, child in zip(path, path[1:]))
+
+    first = next(s.solve_iter(parse_equation(equation_raw)))
+    # поиск останавливается на первом решении
+    assert collect_tree_stats(first[0]).nodes_count <= collect_tree_stats(root).nodes_count
+
+
+blocks_test_data = [
+    # блок длины 8 сжимается за один шаг
+    ['XaY=aaaaaaaa', [{'X': 'a' * i, 'Y': 'a' * (7 - i)} for i in range(8)]],
+    ['XbX=aaaabaaaa', [{'X': 'aaaa'}]],
+    ['XbY=aaaabaaaa', [{'X': 'aaaa', 'Y': 'aaaa'}]],
+    ['XY=aabb', [{'X': 'aabb'[:i], 'Y': 'aabb'[i:]} for i in range(5)]],
+    # решение Y=c теряется, если блок aaa не сжимается
+    ['YX=ccaaabba', [{'X': 'ccaaabba'[i:], 'Y': 'ccaaabba'[:i]} for i in range(9)]],
+]
+
+
+def _get_pair_actions(sample):
+    pairs = sample.get_pairs()
+    if len(pairs) == 0:
+        return []
+
+    max_count = max(pairs.values())
+    pair = min((pair for pair, count in pairs.items() if count == max_count), key=sample.get_pair_index)
+    return [ac.CompressPairAction(pair)]
+
+
+@pytest.mark.parametrize('equation_raw,expected_assignments', blocks_test_data)
+def test_block_compression(equation_raw, expected_assignments):
+    root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+
+    stack = [root]
+    block_nodes = 0
+    while stack:
+        node = stack.pop()
+        if node.compression_action is not None and isinstance(node.compression_action[0], ac.CompressBlockAction):
+            block_nodes += 1
+        stack.extend(node.children)
+
+    assert block_nodes > 0
+
+    assignments = {
+        tuple(sorted((str(var), ''.join(str(el) for el in value)) for var, value in assignment.items()))
+        for assignment in map(solution.get_assignment, solution.get_solution_paths(root))
+    }
+    assert assignments == {tuple(sorted(a.items())) for a in expected_assignments}
+
+
+def _brute_force_assignments(equation_raw: str) -> set[tuple]:
+    template, sample = equation_raw.split('=')
+    variables = list(dict.fromkeys(sym for sym in template if sym.isupper()))
+    values = {sample[i:j] for i in range(len(sample) + 1) for j in range(i, len(sample) + 1)}
+
+    assignments = set()
+    for assignment in itertools.product(values, repeat=len(variables)):
+        assignment = dict(zip(variables, assignment))
+        if ''.join(assignment.get(sym, sym) for sym in template) == sample:
+            assignments.add(tuple(sorted(assignment.items())))
+
+    return assignments
+
+
+# ограничения переменных, оставшихся после сжатия блоков, снимаются, когда пара выталкивает из них другую константу
+@pytest.mark.parametrize('equation_raw', [
+    'aX=aabacb',
+    'aaX=aabab',
+    'XY=aaacab',
+    'XY=babbcbc',
+    'bX=bccbcab',
+    'XbY=aabcaab',
+    'XaX=bacabac',
+])
+def test_block_compression_brute_force(equation_raw):
+    root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+
+    assignments = {
+        tuple(sorted((str(var), ''.join(str(el) for el in value)) for var, value in assignment.items()))
+        for assignment in map(solution.get_assignment, solution.get_solution_paths(root))
+    }
+    assert assignments == _brute_force_assignments(equation_raw)
+
+
+@pytest.mark.parametrize('equation_raw', [equation_raw for equation_raw, _ in blocks_test_data[1:]])
+def test_block_compression_tree_size(equation_raw, monkeypatch):
+    root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+
+    monkeypatch.setattr(solver, 'get_most_profit_actions', _get_pair_actions)
+    pairs_root, _ = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+
+    # блоки сжимаются вместо пар, а не вместе с ними: дерево растет не больше чем на порядок
+    assert collect_tree_stats(root).nodes_count <= 10 * collect_tree_stats(pairs_root).nodes_count
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+def test_siblings_share_sample(equation_raw, monkeypatch):
+    # уравнения раскрытых узлов освобождаются, а восстановленные уже не разделяют буфер
+    monkeypatch.setattr(cn.CompressionNode, 'release_equation', lambda node: None)
+    root, _ = solver.Solver([]).solve(parse_equation(equation_raw))
+
+    samples = {}
+    for child in root.children:
+        if child.compression_action is not None:
+            samples.setdefault(str(child.compression_action[0]), set()).add(id(child.equation.sample))
+
+    # образец сжимается один раз на действие, дети одного действия разделяют один буфер
+    assert len(samples) > 0
+    assert all(len(ids) == 1 for ids in samples.values())
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+@pytest.mark.parametrize('options', [{}, {'memo_size': 100, 'symmetry': True}, {'workers': 2}])
+def test_released_equations(equation_raw, options, monkeypatch):
+    heuristics = [prefix_suffix.PrefixSuffixHeuristics()]
+    root, _ = solver.Solver(heuristics, **options).solve(parse_equation(equation_raw))
+
+    # уравнения, восстановленные по предкам, совпадают с построенными при поиске
+    monkeypatch.setattr(cn.CompressionNode, 'release_equation', lambda node: None)
+    full_root, _ = solver.Solver(heuristics, **options).solve(parse_equation(equation_raw))
+
+    assert str(root) == str(full_root)
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+@pytest.mark.parametrize('options', [{}, {'memo_size': 100, 'symmetry': True}, {'workers': 2}])
+def test_solutions_only(equation_raw, options):
+    heuristics = [prefix_suffix.PrefixSuffixHeuristics()]
+    root, _ = solver.Solver(heuristics, **options).solve(parse_equation(equation_raw))
+    pruned_root, _ = solver.Solver(heuristics, solutions_only=True, **options).solve(parse_equation(equation_raw))
+
+    # отброшенные узлы учитываются в статистике дерева
+    assert collect_tree_stats(pruned_root) == collect_tree_stats(root)
+
+    # все листья, кроме корня нерешаемого уравнения, - решения
+    stack = list(pruned_root.children)
+    while stack:
+        node = stack.pop()
+        assert node.is_solved or len(node.children) > 0
+        stack.extend(node.children)
+
+
+@pytest.mark.parametrize('equation_raw', test_data)
+def test_profile(equation_raw):
+    root, stats = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()]).solve(parse_equation(equation_raw))
+    profiled_root, profiled_stats = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()], profile=True).solve(
+        parse_equation(equation_raw),
+    )
+
+    # профилирование не меняет дерево
+    assert str(profiled_root) == str(root)
+    assert stats.phases == {}
+
+    phases = profiled_stats.phases
+    assert phases['get_most_profit_actions'].calls > 0
+    # каждый вариант сжатия пары сжимается
+    assert phases['get_options_for_pair'].items == phases['compress_pair'].calls
+    # эвристикой проверяются все сжатые уравнения, кроме решенных
+    compressed = phases['compress_pair'].calls + phases.get('compress_block', profiling.PhaseStats()).calls
+    assert phases['heuristic:prefix-suffix'].calls <= compressed
+    dropped = profiled_stats.branches_dropped_by_heuristics.get('prefix-suffix', 0)
+    assert phases['heuristic:prefix-suffix'].items == dropped
+
+
+budget_test_data = [
+    [budget.Budget(max_nodes=50), budget.BudgetKind.NODES],
+    [budget.Budget(time_limit=0), budget.BudgetKind.TIME],
+]
+
+
+@pytest.mark.parametrize('solver_budget,exhausted_budget', budget_test_data)
+@pytest.mark.parametrize('workers', [1, 2])
+def test_budget(solver_budget, exhausted_budget, workers):
+    heuristics = [prefix_suffix.PrefixSuffixHeuristics()]
+    root, stats = solver.Solver(heuristics, workers=workers, parallel_threshold=0).solve(parse_equation('XYZ=abcab'))
+    partial_root, partial_stats = solver.Solver(
+        heuristics,
+        workers=workers,
+        parallel_threshold=0,
+        budget=solver_budget,
+    ).solve(parse_equation('XYZ=abcab'))
+
+    assert not stats.truncated
+    assert partial_stats.truncated
+    assert partial_stats.exhausted_budget == exhausted_budget
+
+    # недостроенное дерево - часть полного, найденные решения сохраняются
+    partial_tree_stats = collect_tree_stats(partial_root)
+    assert partial_tree_stats.nodes_count < collect_tree_stats(root).nodes_count
+    assert partial_tree_stats.solution_nodes_count <= collect_tree_stats(root).solution_nodes_count
+
+
+def test_budget_time_parallel():
+    s = solver.Solver([], workers=2, parallel_threshold=0, budget=budget.Budget(time_limit=0.5))
+    start = time.perf_counter()
+    _, stats = s.solve(parse_equation('XYZW=abcdabcdab'))
+
+    # поддеревья из очереди пула заканчиваются к общему сроку, а не через time_limit после своего начала
+    assert stats.exhausted_budget == budget.BudgetKind.TIME
+    assert time.perf_counter() - start < 2
+
+
+def test_budget_solve_iter():
+    s = solver.Solver([prefix_suffix.PrefixSuffixHeuristics()], budget=budget.Budget(max_nodes=100))
+    stats = solver.SolverStats()
+    solutions = list(s.solve_iter(parse_equation('XYZ=abcab'), stats))
+
+    assert stats.truncated
+    assert len(solutions) > 0
+    assert all(path[-1].equation.is_solved for path in solutions)
+
+
+def test_budget_inside_expansion():
+    root, stats = solver.Solver([], budget=budget.Budget(max_nodes=10)).solve(parse_equation('XYZ=' + 'a' * 30))
+
+    # у корня сотни вариантов, но раскрытие останавливается, не перебрав их все
+    assert stats.truncated
+    assert stats.exhausted_budget == budget.BudgetKind.NODES
+    assert collect_tree_stats(root).nodes_count <= 20
@@ -11,4 +11,17 @@ number_to_index_mapping = {
     '9': '₉'
 }
 
+number_to_power_mapping = {
+    '0': '⁰',
+    '1': '¹',
+    '2': '²',
+    '3': '³',
+    '4': '⁴',
+    '5': '⁵',
+    '6': '⁶',
+    '7': '⁷',
+    '8': '⁸',
+    '9': '⁹'
+}
+
 EPSILON = 'ε'